@@ -0,0 +1,29 @@
+"""Add contacts owner/last_name/id index for keyset pagination
+
+Revision ID: 3f1c2a9d8e47
+Revises: 07b93b93bb44
+Create Date: 2026-10-16 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a9d8e47'
+down_revision: Union[str, None] = '07b93b93bb44'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index('ix_contacts_owner_id_last_name_id', 'contacts', ['owner_id', 'last_name', 'id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_contacts_owner_id_last_name_id', table_name='contacts', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,39 @@
+"""Add pg_trgm GIN indexes for contact search
+
+Revision ID: 8b5e0d7c41a2
+Revises: 3f1c2a9d8e47
+Create Date: 2026-10-16 11:04:19.552870
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b5e0d7c41a2'
+down_revision: Union[str, None] = '3f1c2a9d8e47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_COLUMNS = ('first_name', 'last_name', 'email')
+
+
+def upgrade() -> None:
+    if op.get_context().dialect.name != 'postgresql':
+        # Other databases use the in-process n-gram index of src.repository.search
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for column in SEARCH_COLUMNS:
+            op.create_index(f'ix_contacts_{column}_trgm', 'contacts', [column], unique=False, postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'}, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name != 'postgresql':
+        return
+    with op.get_context().autocommit_block():
+        for column in SEARCH_COLUMNS:
+            op.drop_index(f'ix_contacts_{column}_trgm', table_name='contacts', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,33 @@
+"""Add users.contact_count and users.contact_quota
+
+Revision ID: a3f8c2d19e57
+Revises: e2d9b6f1a845
+Create Date: 2026-10-17 09:12:44.208311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f8c2d19e57'
+down_revision: Union[str, None] = 'e2d9b6f1a845'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('contact_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('users', sa.Column('contact_quota', sa.Integer(), nullable=True))
+    # Start the counters from the existing contacts
+    op.execute(
+        "UPDATE users SET contact_count = "
+        "(SELECT count(*) FROM contacts WHERE contacts.owner_id = users.id)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'contact_quota')
+    op.drop_column('users', 'contact_count')
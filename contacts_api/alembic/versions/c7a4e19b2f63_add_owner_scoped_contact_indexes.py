@@ -0,0 +1,43 @@
+"""Add owner-scoped contact indexes, drop unused single-column ones
+
+Revision ID: c7a4e19b2f63
+Revises: 8b5e0d7c41a2
+Create Date: 2026-10-16 12:21:07.104583
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7a4e19b2f63'
+down_revision: Union[str, None] = '8b5e0d7c41a2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+birthday = sa.column('birthday')
+
+
+def upgrade() -> None:
+    # Indexes are built and dropped CONCURRENTLY (outside a transaction) so that
+    # the contacts table stays writable while the migration runs.
+    with op.get_context().autocommit_block():
+        op.create_index('ix_contacts_owner_id_email', 'contacts', ['owner_id', 'email'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_contacts_owner_id_birthday_md', 'contacts', ['owner_id', sa.extract('month', birthday), sa.extract('day', birthday)], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        # Superseded by the owner-scoped indexes (and the primary key for id)
+        op.drop_index('ix_contacts_email', table_name='contacts', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_contacts_first_name', table_name='contacts', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_contacts_id', table_name='contacts', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_contacts_last_name', table_name='contacts', postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_contacts_last_name', 'contacts', ['last_name'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_contacts_id', 'contacts', ['id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_contacts_first_name', 'contacts', ['first_name'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_contacts_email', 'contacts', ['email'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('ix_contacts_owner_id_birthday_md', table_name='contacts', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_contacts_owner_id_email', table_name='contacts', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,36 @@
+"""Add contacts birthday key expression indexes
+
+Revision ID: e2d9b6f1a845
+Revises: c7a4e19b2f63
+Create Date: 2026-10-16 14:02:38.517204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2d9b6f1a845'
+down_revision: Union[str, None] = 'c7a4e19b2f63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+birthday = sa.column('birthday')
+# month * 100 + day, exactly as queried through Contact.birthday_key
+birthday_key = sa.cast(sa.extract('month', birthday) * sa.literal_column('100') + sa.extract('day', birthday), sa.Integer())
+
+
+def upgrade() -> None:
+    # Expression indexes rather than a stored generated column, which would rewrite the
+    # table under an ACCESS EXCLUSIVE lock; built CONCURRENTLY so it stays writable.
+    with op.get_context().autocommit_block():
+        op.create_index('ix_contacts_owner_id_birthday_key', 'contacts', ['owner_id', birthday_key], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_contacts_birthday_key_owner_id_id', 'contacts', [birthday_key, 'owner_id', 'id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_contacts_birthday_key_owner_id_id', table_name='contacts', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_contacts_owner_id_birthday_key', table_name='contacts', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,80 @@
+"""
+Benchmark of bulk contact import against creating contacts one by one.
+
+Uses the database from DATABASE_URL and a dedicated benchmark user whose contacts are
+deleted before each run. Imports --rows contacts from an in-memory CSV body through
+contact_import (streamed parsing, chunked validation, multi-row INSERT / COPY) and
+creates --single-rows contacts with contacts.create_contact (INSERT, commit and refresh
+per row), and reports rows per second for both:
+
+    python -m benchmarks.contact_import --rows 50000 --single-rows 1000
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import delete, select
+
+from src.database import models
+from src.database.db import AsyncSessionLocal, Base, SessionLocal, engine
+from src.repository import contacts
+from src.schemas import ContactCreate
+from src.services import contact_import
+
+BENCH_EMAIL = "import-benchmark@example.com"
+
+
+def prepare() -> int:
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        user = db.scalar(select(models.User).where(models.User.email == BENCH_EMAIL))
+        if user is None:
+            user = models.User(email=BENCH_EMAIL, username="benchmark", password="-", confirmed=True)
+            db.add(user)
+        else:
+            db.execute(delete(models.Contact).where(models.Contact.owner_id == user.id))
+        db.commit()
+        return user.id
+
+
+def csv_body(rows: int, chunk_size: int = 64 * 1024):
+    lines = ["first_name,last_name,email,phone_number,birthday\n"] + [
+        f"First {i},Last {i % 5000:05d},contact{i}@example.com,123456789,{1970 + i % 40}-{1 + i % 12:02d}-{1 + i % 28:02d}\n"
+        for i in range(rows)
+    ]
+    body = "".join(lines).encode()
+    return [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+
+
+async def run(user_id: int, rows: int, single_rows: int):
+    chunks = csv_body(rows)
+
+    async def body():
+        for chunk in chunks:
+            yield chunk
+
+    async with AsyncSessionLocal() as db:
+        started = time.perf_counter()
+        rows_iterator = contact_import.iter_csv_rows(contact_import.iter_lines(body()))
+        result = await contact_import.import_contacts(db, user_id, rows_iterator, quota=rows + single_rows)
+        elapsed = time.perf_counter() - started
+    assert result["imported"] == rows, result
+    print(f"{'bulk import':<12} {rows:8d} rows {rows / elapsed:10.0f} rows/s")
+
+    async with AsyncSessionLocal() as db:
+        started = time.perf_counter()
+        for i in range(single_rows):
+            await contacts.create_contact(db, ContactCreate(
+                first_name=f"Single {i}", last_name="Last", email=f"single{i}@example.com",
+                phone_number="123456789", birthday="1990-01-01",
+            ), user_id)
+        elapsed = time.perf_counter() - started
+    print(f"{'one by one':<12} {single_rows:8d} rows {single_rows / elapsed:10.0f} rows/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--single-rows", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(run(prepare(), args.rows, args.single_rows))
@@ -0,0 +1,96 @@
+"""
+Benchmark of the ORM reads against the column-projected reads of contact_reads.
+
+Uses the database from DATABASE_URL and a dedicated benchmark user with --rows contacts
+(re-created before each run). Each list query is run through the ORM (loading Contact
+instances) and through contact_reads, fetching all the rows at once, and reported with its best
+latency and the peak memory allocated while it ran (tracemalloc, measured in a separate
+run because tracing slows allocation down):
+
+    python -m benchmarks.contact_reads --rows 10000
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+from datetime import date
+
+from sqlalchemy import delete, insert, select
+
+from src.database import models
+from src.database.db import AsyncSessionLocal, Base, SessionLocal, async_engine, engine
+from src.repository import contact_reads, search
+from src.repository.contacts import birthdays_query
+
+BENCH_EMAIL = "reads-benchmark@example.com"
+
+
+def prepare(rows: int) -> int:
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        user = db.scalar(select(models.User).where(models.User.email == BENCH_EMAIL))
+        if user is None:
+            user = models.User(email=BENCH_EMAIL, username="benchmark", password="-", confirmed=True)
+            db.add(user)
+            db.flush()
+        db.execute(delete(models.Contact).where(models.Contact.owner_id == user.id))
+        db.execute(insert(models.Contact), [
+            {"first_name": f"First {i}", "last_name": f"Last {i:05d}", "email": f"c{i}@example.com",
+             "phone_number": "123456789", "birthday": date(1970 + i % 40, 1 + i % 12, 1 + i % 28), "owner_id": user.id}
+            for i in range(rows)
+        ])
+        db.commit()
+        return user.id
+
+
+async def list_orm(db, user_id: int, rows: int):
+    return (await db.scalars(select(models.Contact).where(models.Contact.owner_id == user_id).limit(rows))).all()
+
+
+async def birthdays_orm(db, user_id: int, today: date):
+    return (await db.scalars(birthdays_query(select(models.Contact), user_id, today, days=366))).all()
+
+
+async def measure(label: str, read, repeat: int) -> None:
+    best = float("inf")
+    for _ in range(repeat):
+        async with AsyncSessionLocal() as db:
+            started = time.perf_counter()
+            found = await read(db)
+            if isinstance(found, tuple):
+                # Search returns the matches with the next cursor
+                found = found[0]
+            best = min(best, time.perf_counter() - started)
+    async with AsyncSessionLocal() as db:
+        tracemalloc.start()
+        await read(db)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    print(f"{label:<24} {len(found):8d} rows {best * 1000:9.2f} ms {peak / 2**20:9.2f} MiB")
+
+
+async def run(user_id: int, rows: int, repeat: int):
+    today = date(2024, 1, 1)
+    # Searched after building the in-process index once, so both reads find it ready
+    async with AsyncSessionLocal() as db:
+        await search.search_contacts(db, user_id, "Last", limit=1)
+    cases = [
+        ("list", lambda db: list_orm(db, user_id, rows),
+         lambda db: contact_reads.list_contacts(db, user_id, limit=rows)),
+        ("birthdays", lambda db: birthdays_orm(db, user_id, today),
+         lambda db: contact_reads.upcoming_birthdays(db, user_id, today, days=366)),
+        ("search", lambda db: search.search_contacts(db, user_id, "Last", limit=rows),
+         lambda db: contact_reads.search_contacts(db, user_id, "Last", limit=rows)),
+    ]
+    for name, orm_read, records_read in cases:
+        await measure(f"{name}, orm", orm_read, repeat)
+        await measure(f"{name}, records", records_read, repeat)
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(prepare(args.rows), args.rows, args.repeat))
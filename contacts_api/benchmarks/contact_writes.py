@@ -0,0 +1,77 @@
+"""
+Benchmark of single-contact updates and deletes.
+
+Uses the database from DATABASE_URL and a dedicated benchmark user whose contacts are
+re-created before each run. Compares the previous SELECT, setattr, commit and refresh
+sequence with the owner-scoped UPDATE ... RETURNING of contacts.update_contact (full and
+partial), then deletes the contacts with DELETE ... RETURNING, and reports writes per second:
+
+    python -m benchmarks.contact_writes --rows 2000
+"""
+import argparse
+import asyncio
+import time
+from datetime import date
+
+from sqlalchemy import delete, insert, select
+
+from src.database import models
+from src.database.db import AsyncSessionLocal, Base, SessionLocal, engine
+from src.repository import contacts
+from src.schemas import ContactPatch, ContactUpdate
+
+BENCH_EMAIL = "writes-benchmark@example.com"
+
+
+def prepare(rows: int):
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        user = db.scalar(select(models.User).where(models.User.email == BENCH_EMAIL))
+        if user is None:
+            user = models.User(email=BENCH_EMAIL, username="benchmark", password="-", confirmed=True)
+            db.add(user)
+            db.flush()
+        db.execute(delete(models.Contact).where(models.Contact.owner_id == user.id))
+        db.execute(insert(models.Contact), [
+            {"first_name": f"First {i}", "last_name": "Last", "email": f"c{i}@example.com",
+             "phone_number": "123456789", "birthday": date(1990, 1, 1), "owner_id": user.id}
+            for i in range(rows)
+        ])
+        db.commit()
+        ids = db.scalars(select(models.Contact.id).where(models.Contact.owner_id == user.id)).all()
+        return user.id, ids
+
+
+async def select_then_update(db, contact_id: int, contact: ContactUpdate):
+    # The implementation replaced by update_contact: three round trips per write
+    db_contact = await db.scalar(select(models.Contact).where(models.Contact.id == contact_id))
+    for key, value in contact.model_dump().items():
+        setattr(db_contact, key, value)
+    await db.commit()
+    await db.refresh(db_contact)
+    return db_contact
+
+
+async def measure(label: str, ids, write):
+    async with AsyncSessionLocal() as db:
+        started = time.perf_counter()
+        for contact_id in ids:
+            await write(db, contact_id)
+        elapsed = time.perf_counter() - started
+    print(f"{label:<22} {len(ids):8d} writes {len(ids) / elapsed:10.0f} writes/s")
+
+
+async def run(user_id: int, ids):
+    full = ContactUpdate(first_name="Jane", last_name="Doe", email="jane@example.com", phone_number="0987654321", birthday="1991-02-02")
+    patch = ContactPatch(phone_number="555000111")
+    await measure("select, update, refresh", ids, lambda db, contact_id: select_then_update(db, contact_id, full))
+    await measure("update returning", ids, lambda db, contact_id: contacts.update_contact(db, contact_id, full, user_id))
+    await measure("patch returning", ids, lambda db, contact_id: contacts.update_contact(db, contact_id, patch, user_id))
+    await measure("delete returning", ids, lambda db, contact_id: contacts.delete_contact(db, contact_id, user_id))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(run(*prepare(args.rows)))
@@ -0,0 +1,62 @@
+"""
+Latency benchmark for a running instance of the contacts API.
+
+Opens a number of concurrent clients that repeatedly call one endpoint for a fixed time
+and reports throughput together with p50/p95/p99 latency. Run it once against a build
+using the synchronous session and once against the async one to compare them:
+
+    python -m benchmarks.latency --url http://localhost:8000/contacts/ --token <access token> --clients 500
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+async def client_loop(client: httpx.AsyncClient, url: str, deadline: float, latencies: list, errors: list):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            response = await client.get(url)
+            if response.status_code >= 500:
+                errors.append(response.status_code)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+            continue
+        latencies.append(time.perf_counter() - started)
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run(url: str, token: str, clients: int, duration: float):
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    latencies, errors = [], []
+    async with httpx.AsyncClient(headers=headers, limits=limits, timeout=60) as client:
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(client_loop(client, url, deadline, latencies, errors) for _ in range(clients)))
+
+    if not latencies:
+        print(f"no successful requests, {len(errors)} errors")
+        return
+    print(f"clients:  {clients}")
+    print(f"requests: {len(latencies)} ({len(latencies) / duration:.1f} req/s), errors: {len(errors)}")
+    print(f"mean:     {statistics.mean(latencies) * 1000:.1f} ms")
+    for pct in (50, 95, 99):
+        print(f"p{pct}:      {percentile(latencies, pct) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000/contacts/")
+    parser.add_argument("--token", default="")
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=30.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.token, args.clients, args.duration))
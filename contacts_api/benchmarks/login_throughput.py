@@ -0,0 +1,59 @@
+"""
+Login throughput benchmark for password verification.
+
+Runs N concurrent password verifications the old way (passlib called directly inside the
+coroutine, blocking the event loop) and through Auth.verify_password (bounded thread pool),
+and reports logins per second together with the worst event loop stall seen by a ticker task:
+
+    python -m benchmarks.login_throughput --logins 32 --scheme bcrypt
+"""
+import argparse
+import asyncio
+import time
+
+from src.services.auth import auth_service
+
+
+async def measure(name: str, logins: int, verify):
+    worst_stall = 0.0
+
+    async def ticker():
+        nonlocal worst_stall
+        while True:
+            before = time.perf_counter()
+            await asyncio.sleep(0.001)
+            worst_stall = max(worst_stall, time.perf_counter() - before)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0.01)
+    started = time.perf_counter()
+    results = await asyncio.gather(*(verify() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    # Let the ticker observe a stall that lasted until the end of the run
+    await asyncio.sleep(0.01)
+    task.cancel()
+    assert all(results)
+    print(f"{name:<12} {logins / elapsed:8.1f} logins/s   worst loop stall {worst_stall * 1000:8.1f} ms")
+
+
+async def run(logins: int, scheme: str):
+    context = auth_service.pwd_context
+    password_hash = context.hash("zaq1@WSX", scheme=scheme)
+
+    async def blocking():
+        return context.verify("zaq1@WSX", password_hash)
+
+    async def pooled():
+        return await auth_service.verify_password("zaq1@WSX", password_hash)
+
+    print(f"{logins} concurrent logins, {scheme} hashes, {auth_service.password_executor._max_workers} hashing threads")
+    await measure("blocking", logins, blocking)
+    await measure("thread pool", logins, pooled)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=32)
+    parser.add_argument("--scheme", default="bcrypt", choices=["bcrypt", "argon2"])
+    args = parser.parse_args()
+    asyncio.run(run(args.logins, args.scheme))
@@ -0,0 +1,79 @@
+"""
+Email throughput benchmark against a local aiosmtpd server.
+
+Sends N messages the old way (a new SMTP connection per message, as FastMail does) and
+through the pooled Mailer, and reports messages per second. The server delays every
+EHLO by --handshake-ms to stand in for the TCP/TLS handshake and login of a remote server:
+
+    python -m benchmarks.mailer --messages 500 --pool-size 4 --handshake-ms 20
+"""
+import argparse
+import asyncio
+import socket
+import time
+
+import aiosmtplib
+from aiosmtpd.controller import Controller
+
+from src.services.mailer import Mailer, SMTPPool
+
+
+class NullHandler:
+    def __init__(self, handshake: float):
+        self.handshake = handshake
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        await asyncio.sleep(self.handshake)
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        return "250 OK"
+
+
+async def measure(name: str, messages: int, send):
+    started = time.perf_counter()
+    await send()
+    elapsed = time.perf_counter() - started
+    print(f"{name:<22} {messages / elapsed:8.1f} messages/s")
+
+
+async def run(messages: int, pool_size: int, handshake_ms: float):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    controller = Controller(NullHandler(handshake_ms / 1000), hostname="127.0.0.1", port=port)
+    controller.start()
+    try:
+        mailer = Mailer(SMTPPool("127.0.0.1", port, use_tls=False, start_tls=False, size=pool_size), sender="noreply@example.com")
+        batch = [
+            mailer.message(f"user{i}@example.com", "Confirm your email", "email_template.html", host="http://localhost/", username=f"user{i}", token="token")
+            for i in range(messages)
+        ]
+        semaphore = asyncio.Semaphore(pool_size)
+
+        async def connection_per_message(message):
+            async with semaphore:
+                await aiosmtplib.send(message, hostname="127.0.0.1", port=port, use_tls=False, start_tls=False)
+
+        async def unpooled():
+            await asyncio.gather(*(connection_per_message(message) for message in batch))
+
+        async def pooled():
+            assert not any(await mailer.send_batch(batch))
+
+        print(f"{messages} messages, {pool_size} concurrent connections, {handshake_ms:.0f} ms handshake")
+        await measure("connection per message", messages, unpooled)
+        await measure("pooled mailer", messages, pooled)
+        await mailer.close()
+    finally:
+        controller.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--handshake-ms", type=float, default=20.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.messages, args.pool_size, args.handshake_ms))
@@ -0,0 +1,88 @@
+"""
+Benchmark of offset vs keyset (cursor) pagination across page depth.
+
+Seeds a benchmark user with --rows contacts in the database from DATABASE_URL (only once,
+the user is reused on later runs), then fetches one page at increasing depths with
+contact_reads.list_contacts (OFFSET) and contact_reads.list_contacts_page (cursor):
+
+    python -m benchmarks.pagination --rows 1000000
+"""
+import argparse
+import asyncio
+import time
+from datetime import date
+
+from sqlalchemy import func, insert, select
+
+from src.database import models
+from src.database.db import AsyncSessionLocal, Base, SessionLocal, engine
+from src.repository import contact_reads
+from src.repository.pagination import encode_cursor
+
+BENCH_EMAIL = "pagination-benchmark@example.com"
+
+
+def seed(rows: int, batch: int = 10000) -> int:
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        user = db.scalar(select(models.User).where(models.User.email == BENCH_EMAIL))
+        if user is None:
+            user = models.User(email=BENCH_EMAIL, username="benchmark", password="-", confirmed=True)
+            db.add(user)
+            db.commit()
+        existing = db.scalar(select(func.count()).select_from(models.Contact).where(models.Contact.owner_id == user.id))
+        for start in range(existing, rows, batch):
+            db.execute(insert(models.Contact), [
+                {
+                    "first_name": f"First {i}",
+                    "last_name": f"Last {i % 5000:05d}",
+                    "email": f"contact{i}@example.com",
+                    "phone_number": "123456789",
+                    "birthday": date(1970 + i % 40, 1 + i % 12, 1 + i % 28),
+                    "owner_id": user.id,
+                }
+                for i in range(start, min(start + batch, rows))
+            ])
+            db.commit()
+            print(f"seeded {min(start + batch, rows)}/{rows}", end="\r")
+        return user.id
+
+
+async def timed(coro_factory, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        async with AsyncSessionLocal() as db:
+            started = time.perf_counter()
+            await coro_factory(db)
+            best = min(best, time.perf_counter() - started)
+    return best
+
+
+async def run(user_id: int, rows: int, limit: int, repeat: int):
+    depths = [d for d in (0, 1000, 10000, 100000, 500000, rows - limit) if 0 <= d <= rows - limit]
+    print(f"{'depth':>10} {'offset ms':>10} {'cursor ms':>10}")
+    for depth in sorted(set(depths)):
+        with SessionLocal() as db:
+            row = db.execute(
+                select(models.Contact.last_name, models.Contact.id)
+                .where(models.Contact.owner_id == user_id)
+                .order_by(models.Contact.last_name, models.Contact.id)
+                .offset(depth - 1)
+                .limit(1)
+            ).first() if depth else None
+        cursor = encode_cursor(row.last_name, row.id) if row else None
+
+        offset_time = await timed(lambda db: contact_reads.list_contacts(db, user_id, skip=depth, limit=limit), repeat)
+        cursor_time = await timed(lambda db: contact_reads.list_contacts_page(db, user_id, cursor=cursor, limit=limit), repeat)
+        print(f"{depth:>10} {offset_time * 1000:>10.2f} {cursor_time * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    user_id = seed(args.rows)
+    print()
+    asyncio.run(run(user_id, args.rows, args.limit, args.repeat))
@@ -0,0 +1,52 @@
+"""
+Benchmark of the per-request overhead of the rate limiter backends.
+
+Checks --requests requests of --users users against a generous limit, so every request is
+admitted, with the in-process token bucket and with the Redis sliding window, one permit
+per Redis call and with batched pre-admission (RATE_LIMIT_BATCH of the limit per call).
+Reports the mean time per request and the Redis round trips per request:
+
+    python -m benchmarks.rate_limit --requests 20000
+
+The Redis backends use the Redis server from the settings, or an in-process fake Redis
+with --fakeredis (which shows the round trips saved, but not the network latency).
+"""
+import argparse
+import asyncio
+import time
+
+from src.services.rate_limit import LocalTokenBucket, RateLimit, RedisSlidingWindow
+from src.services.redis_client import get_redis
+
+
+async def measure(label: str, limiter, requests: int, users: int, limit: RateLimit):
+    started = time.perf_counter()
+    for i in range(requests):
+        decision = await limiter.hit(f"benchmark:user:{i % users}", limit)
+        assert decision.allowed, decision
+    elapsed = time.perf_counter() - started
+    calls = getattr(limiter, "redis_calls", 0)
+    print(f"{label:<24} {elapsed / requests * 1e6:8.1f} us/request {calls / requests:6.3f} Redis calls/request")
+
+
+async def run(requests: int, users: int, batch: float, fake: bool):
+    if fake:
+        from fakeredis import aioredis
+        r = aioredis.FakeRedis()
+    else:
+        r = get_redis()
+    await r.delete(*[key async for key in r.scan_iter("ratelimit-*:{benchmark:*")] or ["-"])
+    limit = RateLimit(requests, 3600)
+    await measure("local token bucket", LocalTokenBucket(), requests, users, limit)
+    await measure("redis, 1 permit/call", RedisSlidingWindow(r, batch=0, prefix="ratelimit-single"), requests, users, limit)
+    await measure(f"redis, batch {batch:g}", RedisSlidingWindow(r, batch=batch, prefix="ratelimit-batched"), requests, users, limit)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--batch", type=float, default=0.1)
+    parser.add_argument("--fakeredis", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.users, args.batch, args.fakeredis))
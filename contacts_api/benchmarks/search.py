@@ -0,0 +1,49 @@
+"""
+Search throughput benchmark.
+
+Seeds the benchmark user with --rows contacts (see benchmarks.pagination), then runs
+--concurrency workers issuing searches for random name and email fragments for --duration
+seconds and reports queries per second and latency percentiles:
+
+    python -m benchmarks.search --rows 1000000 --concurrency 20
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from benchmarks.latency import percentile
+from benchmarks.pagination import seed
+from src.database.db import AsyncSessionLocal
+from src.repository import search
+
+QUERIES = ["First 12", "Last 0042", "contact9", "xample", "Frist 77", "st 1", "contact12345@example.com"]
+
+
+async def worker(user_id: int, deadline: float, latencies: list):
+    while time.perf_counter() < deadline:
+        query = random.choice(QUERIES)
+        async with AsyncSessionLocal() as db:
+            started = time.perf_counter()
+            await search.search_contacts(db, user_id, query, limit=20)
+            latencies.append(time.perf_counter() - started)
+
+
+async def run(user_id: int, concurrency: int, duration: float):
+    latencies = []
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*(worker(user_id, deadline, latencies) for _ in range(concurrency)))
+    print(f"queries: {len(latencies)} ({len(latencies) / duration:.1f} q/s)")
+    for pct in (50, 95, 99):
+        print(f"p{pct}:     {percentile(latencies, pct) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30.0)
+    args = parser.parse_args()
+    user_id = seed(args.rows)
+    print()
+    asyncio.run(run(user_id, args.concurrency, args.duration))
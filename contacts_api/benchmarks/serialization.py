@@ -0,0 +1,96 @@
+"""
+Benchmark of the serialization of a contact list response.
+
+Uses the database from DATABASE_URL and a dedicated benchmark user with --rows contacts
+(re-created before each run), and reports the best time per response of:
+
+- the ORM list through FastAPI's default path (jsonable_encoder and json.dumps of JSONResponse),
+- the ORM list through ORJSONResponse, the application's default response class,
+- the ORM list validated and dumped by a pydantic TypeAdapter (the cached read path before),
+- the column records of contact_reads dumped by a TypeAdapter over ContactRecord:
+
+    python -m benchmarks.serialization --rows 1000
+"""
+import argparse
+import asyncio
+import time
+from datetime import date
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import delete, insert, select
+
+from src import schemas
+from src.database import models
+from src.database.db import AsyncSessionLocal, Base, SessionLocal, async_engine, engine
+from src.repository import contact_reads
+from src.services.response_cache import orm_serializer
+
+BENCH_EMAIL = "serialization-benchmark@example.com"
+
+CONTACT_LIST = orm_serializer(TypeAdapter(List[schemas.Contact]))
+CONTACT_RECORDS = TypeAdapter(List[schemas.ContactRecord]).dump_json
+
+
+def prepare(rows: int) -> int:
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        user = db.scalar(select(models.User).where(models.User.email == BENCH_EMAIL))
+        if user is None:
+            user = models.User(email=BENCH_EMAIL, username="benchmark", password="-", confirmed=True)
+            db.add(user)
+            db.flush()
+        db.execute(delete(models.Contact).where(models.Contact.owner_id == user.id))
+        db.execute(insert(models.Contact), [
+            {"first_name": f"First {i}", "last_name": f"Last {i:05d}", "email": f"c{i}@example.com",
+             "phone_number": "123456789", "birthday": date(1970 + i % 40, 1 + i % 12, 1 + i % 28), "owner_id": user.id}
+            for i in range(rows)
+        ])
+        db.commit()
+        return user.id
+
+
+async def load_orm(db, user_id: int, rows: int):
+    # The ORM instances the contact list was read as before contact_reads
+    return (await db.scalars(select(models.Contact).where(models.Contact.owner_id == user_id).limit(rows))).all()
+
+
+def default_response(data) -> bytes:
+    # What a route returning ORM objects with response_model=List[Contact] does by default
+    validated = TypeAdapter(List[schemas.Contact]).validate_python(data, from_attributes=True)
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+def orjson_response(data) -> bytes:
+    validated = TypeAdapter(List[schemas.Contact]).validate_python(data, from_attributes=True)
+    return ORJSONResponse(jsonable_encoder(validated)).body
+
+
+async def measure(label: str, load, serialize, repeat: int) -> None:
+    best = float("inf")
+    for _ in range(repeat):
+        async with AsyncSessionLocal() as db:
+            started = time.perf_counter()
+            body = serialize(await load(db))
+            best = min(best, time.perf_counter() - started)
+    print(f"{label:<28} {best * 1000:8.2f} ms {len(body):10d} bytes")
+
+
+async def run(user_id: int, rows: int, repeat: int):
+    load_instances = lambda db: load_orm(db, user_id, rows)
+    load_records = lambda db: contact_reads.list_contacts(db, user_id, skip=0, limit=rows)
+    await measure("orm, JSONResponse", load_instances, default_response, repeat)
+    await measure("orm, ORJSONResponse", load_instances, orjson_response, repeat)
+    await measure("orm, TypeAdapter", load_instances, CONTACT_LIST, repeat)
+    await measure("records, TypeAdapter", load_records, CONTACT_RECORDS, repeat)
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(prepare(args.rows), args.rows, args.repeat))
@@ -0,0 +1,44 @@
+"""
+Micro-benchmark of the per-request cost of reading the authenticated user from the cache.
+
+Compares the legacy pickled ORM instance with the versioned orjson record of
+src.services.user_cache (payload size and deserialization time):
+
+    python -m benchmarks.user_cache --iterations 100000
+"""
+import argparse
+import pickle
+import timeit
+from datetime import datetime
+
+from src.database.models import User
+from src.services import user_cache
+
+
+def run(iterations: int):
+    user = User(
+        id=42,
+        email="john@example.com",
+        username="johndoe",
+        password="$argon2id$v=19$m=65536,t=3,p=2$c29tZXNhbHQ$c29tZWhhc2g",
+        created_at=datetime(2024, 6, 21, 17, 0, 35),
+        avatar="https://res.cloudinary.com/demo/image/upload/avatar.jpg",
+        refresh_token="eyJhbGciOiJIUzI1NiJ9.e30.signature",
+        confirmed=True,
+    )
+    pickled = pickle.dumps(user)
+    record = user_cache.dumps(user)
+
+    for name, payload, loads in (
+        ("pickle ORM", pickled, pickle.loads),
+        ("orjson record", record, user_cache.loads),
+    ):
+        seconds = timeit.timeit(lambda: loads(payload), number=iterations)
+        print(f"{name:<14} {len(payload):5d} bytes   {seconds / iterations * 1e6:7.2f} us/request")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=100000)
+    args = parser.parse_args()
+    run(args.iterations)
@@ -1,14 +1,37 @@
+import asyncio
+from contextlib import asynccontextmanager
 import uvicorn
 from fastapi import FastAPI, Depends
-from fastapi_limiter import FastAPILimiter
-from fastapi_limiter.depends import RateLimiter
 from src.database.db import Base, engine
-from src.routes import auth, contacts
+from src.database.query_log import QueryLogMiddleware
+from src.routes import auth, contacts, metrics, profiles
+from src.services.redis_client import get_redis, close_redis
+from src.services import user_cache
+from src.services.rate_limit import rate_limit
+from src.services.mailer import mailer
+from src.services.avatars import UploadLimitMiddleware
+from src.services.profiling import ProfilingMiddleware
+from src.services.telemetry import MetricsMiddleware
+from src.config import settings
 from fastapi.middleware.cors import CORSMiddleware
-import redis.asyncio as redis
+from fastapi.responses import ORJSONResponse
+from fastapi.staticfiles import StaticFiles
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The caches, the job queue and the rate limiter share one Redis connection
+    # pool (see get_redis), closed on shutdown.
+    # Keep this worker's in-process user cache in sync with writes made by other workers.
+    # Birthday reminders are sent by the job workers (see worker.py), not by the API.
+    listener = asyncio.create_task(user_cache.listen_for_invalidations(get_redis()))
+    yield
+    listener.cancel()
+    await mailer.close()
+    await close_redis()
 
 # Create FastAPI app instance
-app = FastAPI()
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # Define allowed origins for CORS
 origins = [
@@ -24,6 +47,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Reject oversized avatar uploads before Starlette parses and spools them (see avatars)
+app.add_middleware(UploadLimitMiddleware)
+
+# Report statements repeated within a request as possible N+1 queries (see query_log)
+if settings.N_PLUS_ONE_THRESHOLD:
+    app.add_middleware(QueryLogMiddleware)
+
+# Profile requests asking for it with the profiling token, or a sample of them (see profiling)
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+    app.include_router(profiles.router)
+
+# Record the latency of every request by route (see telemetry); added last, so it wraps
+# the other middleware too. /metrics only answers scrapers sending METRICS_TOKEN.
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(metrics.router)
+
 # Create all database tables
 Base.metadata.create_all(bind=engine)
 
@@ -31,13 +72,11 @@ Base.metadata.create_all(bind=engine)
 app.include_router(contacts.router, prefix="/contacts")
 app.include_router(auth.router, prefix="/api")
 
-@app.on_event("startup")
-async def startup():
-    # Startup event handler to initialize Redis and FastAPILimiter.
-    r = await redis.Redis(host='localhost', port=6379, db=0, encoding="utf-8", decode_responses=True)
-    await FastAPILimiter.init(r)
+# Avatars stored on the local filesystem are served by the application itself
+if settings.AVATAR_STORAGE == "local":
+    app.mount(settings.AVATAR_LOCAL_URL, StaticFiles(directory=settings.AVATAR_LOCAL_DIR, check_dir=False), name="avatars")
 
-@app.get("/", dependencies=[Depends(RateLimiter(times=2, seconds=5))])
+@app.get("/", dependencies=[Depends(rate_limit("root", per_user=False))])
 async def root():
     # Root endpoint with rate limiting.
     # Returns a welcome message.
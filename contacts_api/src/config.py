@@ -1,5 +1,5 @@
-from pydantic_settings import BaseSettings
-from typing import Optional
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from typing import Dict, Optional
 from dotenv import load_dotenv
 import os
 
@@ -8,6 +8,7 @@ load_dotenv()
 
 class Settings(BaseSettings):
     DATABASE_URL: Optional[str] = os.getenv('DATABASE_URL')
+    ASYNC_DATABASE_URL: Optional[str] = os.getenv('ASYNC_DATABASE_URL')
     SECRET_KEY: Optional[str] = os.getenv('SECRET_KEY')
     CLOUDINARY_CLOUD_NAME: Optional[str] = os.getenv('CLOUDINARY_CLOUD_NAME')
     CLOUDINARY_API_KEY: Optional[str] = os.getenv('CLOUDINARY_API_KEY')
@@ -17,17 +18,87 @@ class Settings(BaseSettings):
     MAIL_FROM: Optional[str] = os.getenv('MAIL_FROM')
     MAIL_PORT: Optional[str] = os.getenv('MAIL_PORT')
     MAIL_SERVER: Optional[str] = os.getenv('MAIL_SERVER')
+    MAIL_SSL_TLS: bool = True
+    MAIL_STARTTLS: bool = False
+    MAIL_TIMEOUT: float = 10.0
+    MAIL_POOL_SIZE: int = 4
+    MAIL_IDLE_TIMEOUT: float = 60.0
+    MAIL_MAX_RETRIES: int = 3
+    MAIL_RETRY_BACKOFF: float = 0.5
+    MAIL_BATCH_SIZE: int = 100
+    BIRTHDAY_REMINDERS_ENABLED: bool = True
+    BIRTHDAY_REMINDERS_HOUR: int = 8
+    JOBS_BATCH_SIZE: int = 10
+    JOBS_BLOCK_MS: int = 5000
+    JOBS_CLAIM_IDLE_MS: int = 60000
+    JOBS_MAX_ATTEMPTS: int = 5
+    JOBS_RETRY_BACKOFF_MS: int = 1000
+    JOBS_RETRY_MAX_BACKOFF_MS: int = 300000
+    AVATAR_STORAGE: str = "cloudinary"
+    AVATAR_MAX_BYTES: int = 5 * 1024 * 1024
+    AVATAR_SIZE: int = 256
+    AVATAR_QUALITY: int = 80
+    AVATAR_PROCESS_WORKERS: int = 2
+    AVATAR_LOCAL_DIR: str = "static/avatars"
+    AVATAR_LOCAL_URL: str = "/static/avatars"
+    AVATAR_S3_BUCKET: Optional[str] = None
+    AVATAR_S3_ENDPOINT_URL: Optional[str] = None
+    AVATAR_S3_PUBLIC_URL: Optional[str] = None
     POSTGRES_USER: Optional[str] = os.getenv('POSTGRES_USER')
     POSTGRES_PASSWORD: Optional[str] = os.getenv('POSTGRES_PASSWORD')
     POSTGRES_DB: Optional[str] = os.getenv('POSTGRES_DB')
     REDIS_URL: Optional[str] = os.getenv('REDIS_URL')
     REDIS_HOST: Optional[str] = os.getenv('REDIS_HOST')
     REDIS_PORT: Optional[str] = os.getenv('REDIS_PORT')
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_SOCKET_TIMEOUT: float = 5.0
+    REDIS_SOCKET_CONNECT_TIMEOUT: float = 2.0
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
+    USER_CACHE_L1_SIZE: int = 10000
+    USER_CACHE_L1_TTL: float = 60.0
+    TOKEN_CACHE_SIZE: int = 10000
+    TOKEN_CACHE_MAX_TTL: float = 9000.0
+    SEARCH_INDEX_CACHE_SIZE: int = 1000
+    SEARCH_INDEX_TTL: float = 300.0
+    SEARCH_SIMILARITY_THRESHOLD: float = 0.3
+    CONTACTS_QUOTA: int = 10
+    IMPORT_CHUNK_SIZE: int = 1000
+    IMPORT_MAX_ERRORS: int = 1000
+    IMPORT_MAX_BYTES: int = 64 * 1024 * 1024
+    EXPORT_BATCH_SIZE: int = 1000
+    RESPONSE_CACHE_TTL: int = 300
+    RATE_LIMIT_BACKEND: str = "redis"
+    RATE_LIMIT_BATCH: float = 0.1
+    RATE_LIMITS: Dict[str, str] = {
+        "root": "2/5",
+        "contacts_create": "5/60",
+        "contacts_import": "5/60",
+    }
     ALGORITHM: Optional[str] = os.getenv('ALGORITHM')
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: Optional[int] = None
+    DB_PGBOUNCER: bool = False
+    PASSWORD_HASH_SCHEME: str = "argon2"
+    PASSWORD_HASH_WORKERS: int = 4
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536
+    ARGON2_PARALLELISM: int = 2
+    BCRYPT_ROUNDS: int = 12
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: Optional[str] = None
+    SLOW_QUERY_MS: Optional[float] = 200.0
+    N_PLUS_ONE_THRESHOLD: int = 10
+    PROFILING_ENABLED: bool = False
+    PROFILING_TOKEN: Optional[str] = None
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_DIR: str = "profiles"
+    PROFILING_MAX_FILES: int = 100
 
-
-    class Config:
-        env_file = ".env"
+    model_config = SettingsConfigDict(env_file=".env")
 
 settings = Settings()
 
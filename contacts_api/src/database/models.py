@@ -1,23 +1,68 @@
 """
 This module defines the database models for the application using SQLAlchemy ORM.
 """
-from sqlalchemy import Column, Integer, String, Date, ForeignKey, Boolean, func
+from sqlalchemy import Column, Integer, String, Date, ForeignKey, Boolean, Index, DDL, cast, event, extract, func, literal_column
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
 from .db import Base
 from sqlalchemy.sql.sqltypes import DateTime
 
 
+def birthday_key_expression(birthday):
+    """
+    month * 100 + day of a date column (e.g. 1231 for December 31st), as indexed on contacts.
+
+    The factor is inlined rather than bound, so that queries repeat the indexed expression exactly.
+    """
+    return cast(extract("month", birthday) * literal_column("100") + extract("day", birthday), Integer)
+
+
 class Contact(Base):
     __tablename__ = "contacts"
-    id = Column(Integer, primary_key=True, index=True)
-    first_name = Column(String, index=True)
-    last_name = Column(String, index=True)
-    email = Column(String, index=True)
+    id = Column(Integer, primary_key=True)
+    first_name = Column(String)
+    last_name = Column(String)
+    email = Column(String)
     phone_number = Column(String)
     birthday = Column(Date)
     owner_id = Column(Integer, ForeignKey("users.id"))
     owner = relationship("User", back_populates="contacts")
 
+    @hybrid_property
+    def birthday_key(self):
+        """
+        month * 100 + day of the birthday; in queries, the expression of the birthday indexes.
+        """
+        return self.birthday and self.birthday.month * 100 + self.birthday.day
+
+    @birthday_key.inplace.expression
+    @classmethod
+    def _birthday_key_expression(cls):
+        return birthday_key_expression(cls.birthday)
+
+    # Every contact query is scoped to one owner, so indexes lead with owner_id
+    __table_args__ = (
+        # Serves listing, counting and keyset pagination ordered by (last_name, id)
+        Index("ix_contacts_owner_id_last_name_id", "owner_id", "last_name", "id"),
+        Index("ix_contacts_owner_id_email", "owner_id", "email"),
+        Index("ix_contacts_owner_id_birthday_md", "owner_id", extract("month", birthday), extract("day", birthday)),
+        # Upcoming birthdays of one owner, and birthdays of all owners on a given day
+        Index("ix_contacts_owner_id_birthday_key", "owner_id", birthday_key_expression(birthday)),
+        Index("ix_contacts_birthday_key_owner_id_id", birthday_key_expression(birthday), "owner_id", "id"),
+        # Trigram indexes for ILIKE '%q%' and similarity search (PostgreSQL only)
+        *(
+            Index(f"ix_contacts_{name}_trgm", name, postgresql_using="gin", postgresql_ops={name: "gin_trgm_ops"}).ddl_if(dialect="postgresql")
+            for name in ("first_name", "last_name", "email")
+        ),
+    )
+
+# The trigram indexes need the pg_trgm extension when the schema is created with create_all
+event.listen(
+    Contact.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
 class User(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True)
@@ -28,4 +73,8 @@ class User(Base):
     avatar = Column(String(255), nullable=True)
     refresh_token = Column(String(255), nullable=True)
     confirmed = Column(Boolean, default=False)
+    # Number of contacts of the user, kept by the contact writes in the same transaction
+    contact_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Maximum number of contacts of the user (set per user or plan), CONTACTS_QUOTA if null
+    contact_quota = Column(Integer, nullable=True)
     contacts = relationship("Contact", back_populates="owner")
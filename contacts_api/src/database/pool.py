@@ -0,0 +1,116 @@
+"""
+This module provides connection pool telemetry for the SQLAlchemy engines.
+
+The pool classes returned by timed_pool_class measure how long callers wait for a connection
+and count checkouts, checkins and timeouts, so the pool can be sized from real numbers.
+
+Functions:
+- timed_pool_class: Creates a pool class that records its statistics into a PoolStats object.
+- pool_status: Returns a snapshot of the current state and statistics of an engine's pool.
+"""
+import time
+from sqlalchemy import exc
+from sqlalchemy.pool import Pool
+
+
+class PoolStats:
+    """
+    Counters collected by an instrumented connection pool.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.timeouts = 0
+        self.waits = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def record_wait(self, seconds: float):
+        self.waits += 1
+        self.wait_time_total += seconds
+        if seconds > self.wait_time_max:
+            self.wait_time_max = seconds
+
+    def as_dict(self) -> dict:
+        return {
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "connects": self.connects,
+            "timeouts": self.timeouts,
+            "wait_time_total": round(self.wait_time_total, 6),
+            "wait_time_avg": round(self.wait_time_total / self.waits, 6) if self.waits else 0.0,
+            "wait_time_max": round(self.wait_time_max, 6),
+        }
+
+
+def timed_pool_class(base: type, stats: PoolStats) -> type:
+    """
+    Creates a subclass of a SQLAlchemy pool class that records its activity into stats.
+
+    The subclass is reused when the engine recreates its pool (e.g. on dispose), so the
+    counters survive reconnects.
+
+    Parameters:
+    - base: Pool class to instrument, e.g. QueuePool or AsyncAdaptedQueuePool.
+    - stats: PoolStats object receiving the measurements.
+
+    Returns:
+    - The instrumented pool class, to be passed as poolclass to create_engine.
+    """
+
+    def _do_get(self):
+        # _do_get blocks until a connection is free (or a new one is opened), which is
+        # exactly the wait time callers see at peak load.
+        started = time.perf_counter()
+        try:
+            connection = base._do_get(self)
+        except exc.TimeoutError:
+            stats.timeouts += 1
+            raise
+        finally:
+            stats.record_wait(time.perf_counter() - started)
+        stats.checkouts += 1
+        return connection
+
+    def _do_return_conn(self, record):
+        stats.checkins += 1
+        base._do_return_conn(self, record)
+
+    def _create_connection(self):
+        stats.connects += 1
+        return base._create_connection(self)
+
+    namespace = {
+        "_do_get": _do_get,
+        "_do_return_conn": _do_return_conn,
+        "_create_connection": _create_connection,
+        "stats": stats,
+    }
+    return type(f"Timed{base.__name__}", (base,), namespace)
+
+
+def pool_status(pool: Pool) -> dict:
+    """
+    Returns a snapshot of a connection pool.
+
+    Parameters:
+    - pool: The pool of a sync engine (engine.pool) or of an async engine (async_engine.pool).
+
+    Returns:
+    - A dictionary with the pool class, its size and checked-in/checked-out/overflow
+      connections (for queue pools), plus the collected statistics when the pool is instrumented.
+    """
+    status = {"pool": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if method is not None:
+            status[name] = method()
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        status.update(stats.as_dict())
+    return status
@@ -0,0 +1,144 @@
+"""
+This module logs slow SQL statements and flags N+1 query patterns.
+
+- instrument_engine logs every statement slower than SLOW_QUERY_MS. The statement is
+  normalized (literals and placeholders replaced by ?, IN lists collapsed, whitespace
+  squeezed) and its bound parameters are redacted to their types, so no contact data
+  reaches the logs.
+- QueryLogMiddleware counts the statements of each request. A statement executed
+  N_PLUS_ONE_THRESHOLD times or more within one request, typically a query run in a loop
+  over the results of another, is logged as a possible N+1 pattern with the request path.
+
+Statements are counted by their text as sent to the driver, which is identical for every
+execution of the same query since the values are bound parameters.
+
+Functions:
+- normalize_statement: Returns the shape of a statement without its values.
+- redact_parameters: Replaces bound parameters by their types.
+- instrument_engine: Logs the slow statements of an engine and counts them per request.
+- track_queries: Context manager counting statements and reporting repeated ones.
+
+Classes:
+- QueryLogMiddleware: ASGI middleware running each request within track_queries.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+# pyformat, format, numeric ($1) and named placeholders; "::" is a PostgreSQL cast
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<!:):\w+")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_SPACE = re.compile(r"\s+")
+
+# Statement counts of the current request, set by track_queries
+_queries: ContextVar[Optional[Counter]] = ContextVar("queries", default=None)
+
+
+def normalize_statement(statement: str) -> str:
+    """
+    Returns the shape of a statement: literals and placeholders become ?, IN lists of any
+    length become IN (...) and whitespace is squeezed, so executions differing only in
+    their values read the same.
+    """
+    statement = _STRING.sub("?", statement)
+    statement = _PLACEHOLDER.sub("?", statement)
+    statement = _NUMBER.sub("?", statement)
+    statement = _IN_LIST.sub("IN (...)", statement)
+    return _SPACE.sub(" ", statement).strip()
+
+
+def redact_parameters(parameters: Any, executemany: bool = False) -> Any:
+    """
+    Replaces the bound parameters of a statement by the names of their types.
+    """
+    if executemany:
+        return f"<{len(parameters)} parameter sets>"
+    if isinstance(parameters, dict):
+        return {name: type(value).__name__ for name, value in parameters.items()}
+    return [type(value).__name__ for value in parameters or ()]
+
+
+def instrument_engine(engine: Engine, threshold_ms: Optional[float] = settings.SLOW_QUERY_MS) -> None:
+    """
+    Logs the statements of an engine slower than a threshold and counts every statement in
+    the request being tracked, if any (for an AsyncEngine, pass its sync_engine).
+
+    Parameters:
+    - engine: The engine.
+    - threshold_ms: Duration from which a statement is logged, in milliseconds; None logs none.
+    """
+    @event.listens_for(engine, "before_cursor_execute")
+    def start(conn, cursor, statement, parameters, context, executemany):
+        queries = _queries.get()
+        if queries is not None:
+            queries[statement] += 1
+        conn.info.setdefault("query_log_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def stop(conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info["query_log_started"].pop()) * 1000
+        if threshold_ms is not None and elapsed_ms >= threshold_ms:
+            logger.warning(
+                "Slow query (%.1f ms): %s; parameters: %s",
+                elapsed_ms, normalize_statement(statement), redact_parameters(parameters, executemany),
+            )
+
+    @event.listens_for(engine, "handle_error")
+    def failed(context):
+        # after_cursor_execute is not called for failed statements
+        started = context.connection.info.get("query_log_started") if context.connection is not None else None
+        if started:
+            started.pop()
+
+
+@contextmanager
+def track_queries(label: str, threshold: int = settings.N_PLUS_ONE_THRESHOLD):
+    """
+    Counts the statements executed within the block and logs those executed threshold times or more.
+
+    Parameters:
+    - label: Identifies the unit of work in the log, e.g. the request method and path.
+    - threshold: Number of executions of one statement from which it is reported.
+
+    Returns:
+    - The Counter of executions by statement.
+    """
+    queries = Counter()
+    token = _queries.set(queries)
+    try:
+        yield queries
+    finally:
+        _queries.reset(token)
+        for statement, count in queries.most_common():
+            if count < threshold:
+                break
+            logger.warning("Possible N+1 query in %s: executed %d times: %s", label, count, normalize_statement(statement))
+
+
+class QueryLogMiddleware:
+    """
+    Pure ASGI middleware counting the statements of each HTTP request and reporting the
+    ones repeated N_PLUS_ONE_THRESHOLD times or more.
+    """
+
+    def __init__(self, app, threshold: int = settings.N_PLUS_ONE_THRESHOLD):
+        self.app = app
+        self.threshold = threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with track_queries(f"{scope['method']} {scope['path']}", self.threshold):
+            await self.app(scope, receive, send)
@@ -0,0 +1,124 @@
+"""
+This module is the read path of the contact list endpoints.
+
+The queries select only the columns of schemas.Contact and return plain dictionaries built
+from the result tuples: no ORM instances are created, nothing is added to the session's
+identity map and no attribute or relationship state is tracked. Together with a TypeAdapter
+over schemas.ContactRecord, the records are serialized straight to JSON without a pydantic
+validation pass. Writes keep using the ORM (see src.repository.contacts).
+
+The keyset pagination and the birthday range are built by the contacts repository
+(page_query, split_page, birthdays_query) and the search by the search module, so the
+endpoints reading ORM instances and records filter and order contacts the same way.
+
+Functions:
+- list_contacts: Returns a page of a user's contacts (offset pagination).
+- list_contacts_page: Returns a page of a user's contacts (keyset pagination).
+- search_contacts: Returns a ranked page of a user's contacts matching a query.
+- upcoming_birthdays: Returns a user's contacts with a birthday in the next days.
+"""
+from datetime import date
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src import schemas
+from src.database import models
+from src.repository import search
+from src.repository.contacts import birthdays_query, page_query, split_page
+
+FIELDS = tuple(schemas.Contact.model_fields)
+COLUMNS = tuple(getattr(models.Contact, name) for name in FIELDS)
+
+
+def records(rows: Iterable[tuple]) -> List[dict]:
+    """
+    Turns result tuples of COLUMNS into contact records (dictionaries with the fields of schemas.Contact).
+    """
+    return [dict(zip(FIELDS, row)) for row in rows]
+
+
+async def list_contacts(db: AsyncSession, user_id: int, skip: int = 0, limit: int = 10) -> List[dict]:
+    """
+    Retrieves contacts of a user with offset pagination.
+
+    Parameters:
+    - db: Database session.
+    - user_id: ID of the user whose contacts are to be retrieved.
+    - skip: Number of records to skip.
+    - limit: Maximum number of records to return.
+
+    Returns:
+    - A list of contact records.
+    """
+    result = await db.execute(select(*COLUMNS).where(models.Contact.owner_id == user_id).offset(skip).limit(limit))
+    return records(result)
+
+
+async def list_contacts_page(db: AsyncSession, user_id: int, cursor: Optional[str] = None, limit: int = 10) -> dict:
+    """
+    Retrieves a page of contacts of a user ordered by last name and id, with keyset
+    pagination: the page starts right after the (last_name, id) key stored in the cursor, so
+    deep pages are read through the (owner_id, last_name, id) index instead of scanning and
+    discarding every earlier row.
+
+    Parameters:
+    - db: Database session.
+    - user_id: ID of the user whose contacts are to be retrieved.
+    - cursor: The next_cursor returned with the previous page, or None for the first page.
+    - limit: Maximum number of records to return.
+
+    Returns:
+    - A dictionary with the contact records ("items") and the cursor of the next page ("next_cursor").
+
+    Raises:
+    - ValueError: If the cursor is malformed.
+    """
+    rows = (await db.execute(page_query(select(*COLUMNS), user_id, cursor, limit))).all()
+    items, next_cursor = split_page(rows, limit)
+    return {"items": records(items), "next_cursor": next_cursor}
+
+
+async def search_contacts(
+    db: AsyncSession,
+    user_id: int,
+    query: str,
+    limit: int = 20,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Searches the contacts of a user by first name, last name or email, best matches first, like search.search_contacts.
+
+    Parameters:
+    - db: Database session.
+    - user_id: ID of the user whose contacts are searched.
+    - query: Text to look for.
+    - limit: Maximum number of contacts to return.
+    - skip: Number of results to skip (ignored when a cursor is given).
+    - cursor: The next_cursor returned with the previous page.
+
+    Returns:
+    - A tuple of the list of matching contact records and the cursor of the next page (None on the last page).
+
+    Raises:
+    - ValueError: If the cursor is malformed.
+    """
+    rows, next_cursor = await search.search_rows(db, user_id, query, COLUMNS, limit, skip, cursor)
+    return records(rows), next_cursor
+
+
+async def upcoming_birthdays(db: AsyncSession, user_id: int, today: date, days: int = 7) -> List[dict]:
+    """
+    Retrieves the contacts of a user with a birthday from today to today + days (inclusive),
+    soonest first, regardless of the year of birth (see contacts.birthdays_query).
+
+    Parameters:
+    - db: Database session.
+    - user_id: ID of the user whose contacts are retrieved.
+    - today: First day of the range.
+    - days: Number of days after today to include.
+
+    Returns:
+    - A list of contact records.
+    """
+    return records(await db.execute(birthdays_query(select(*COLUMNS), user_id, today, days)))
@@ -1,98 +1,427 @@
 """
 This module provides CRUD operations for managing contacts in the database.
 
+All functions are coroutines working on an AsyncSession, so database I/O never blocks the event loop.
+
 Functions:
-- create_contact: Adds a new contact to the database for a specific user.
-- get_contacts: Retrieves a list of contacts for a specific user, with optional pagination.
+- create_contact: Adds a new contact to the database for a specific user, within the user's contact quota.
+- reserve_contacts: Atomically counts contacts about to be added against a user's quota.
+- reserve_contacts_up_to: Counts as many contacts about to be added as fit in a user's quota.
+- change_contact_count: Adjusts the contact counter of a user.
+- insert_contacts: Inserts many contacts of a user at once.
+- page_query: Restricts a query of contacts to one keyset (cursor) page of a user.
+- split_page: Splits a fetched keyset page from the cursor of the next one.
+- stream_contacts: Streams all contacts of a specific user in batches through a server-side cursor.
 - get_contact: Fetches a single contact by its ID.
-- update_contact: Updates the details of an existing contact.
-- delete_contact: Removes a contact from the database by its ID.
+- update_contact: Updates (fully or partially) a contact of a user in one statement.
+- delete_contact: Removes a contact of a user from the database in one statement.
+- update_contacts: Applies partial updates to many contacts of a user in one statement.
+- delete_contacts: Deletes many contacts of a user in one statement.
+- birthdays_query: Restricts a query of contacts to a user's birthdays in the next days.
+- birthdays_on: Streams the contacts of all users with a birthday on a given day.
+
+Contact lists are read without ORM instances by src.repository.contact_reads, which builds
+its queries with page_query, split_page and birthdays_query.
+
+Every committed change of a user's contacts goes through contacts_changed, which drops the
+user's search index and cached responses.
+
+The number of contacts of each user is kept in users.contact_count by the functions that
+add or delete contacts, in the same transaction, so the quota is checked without counting.
 """
 
-from sqlalchemy.orm import Session
+import calendar
+from datetime import date, timedelta
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple, Union
+from sqlalchemy import Row, Select, case, delete, func, insert, literal, or_, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager
 from src.database import models
+from src.config import settings
+from src.repository import search
+from src.services import response_cache
+from src.services.redis_client import get_redis
+from src.repository.pagination import decode_cursor, encode_cursor
 from src import schemas
 
-def create_contact(db: Session, contact: schemas.ContactCreate, user_id: int):
+async def contacts_changed(user_id: int) -> None:
+    """
+    Drops the cached search index and responses of a user after a committed change of their contacts.
+    """
+    search.invalidate(user_id)
+    await response_cache.bump_version(get_redis(), user_id)
+
+class QuotaExceeded(ValueError):
+    """
+    The user already has as many contacts as their quota allows.
+    """
+
+async def create_contact(db: AsyncSession, contact: schemas.ContactCreate, user_id: int, quota: int = settings.CONTACTS_QUOTA):
     """
-    Creates a new contact associated with a user.
+    Creates a new contact associated with a user, within the user's contact quota.
+
+    The contact counter of the user is checked and incremented in the same transaction as
+    the insert (see reserve_contacts), so concurrent creations cannot exceed the quota.
 
     Parameters:
     - db: Database session.
     - contact: Contact information to be created (schemas.ContactCreate).
     - user_id: ID of the user who owns the contact.
+    - quota: Quota of users without a quota of their own.
 
     Returns:
     - The newly created contact object.
+
+    Raises:
+    - QuotaExceeded: If the user has reached their contact quota.
     """
-    db_contact = models.Contact(**contact.dict(), owner_id=user_id)
+    if not await reserve_contacts(db, user_id, 1, quota):
+        await db.rollback()
+        raise QuotaExceeded("Contact limit reached")
+    db_contact = models.Contact(**contact.model_dump(), owner_id=user_id)
     db.add(db_contact)
-    db.commit()
-    db.refresh(db_contact)
+    await db.commit()
+    await db.refresh(db_contact)
+    await contacts_changed(user_id)
     return db_contact
 
-def get_contacts(db: Session, user_id: int, skip: int = 0, limit: int = 10):
+def _quota(default_quota: int):
+    return func.coalesce(models.User.contact_quota, default_quota)
+
+async def reserve_contacts(db: AsyncSession, user_id: int, count: int, quota: int = settings.CONTACTS_QUOTA) -> bool:
     """
-    Retrieves contacts for a specific user, with support for pagination.
+    Adds count to the contact counter of a user if the result stays within their quota, in one statement.
+
+    The check and the increment are a single conditional UPDATE of the user row, which
+    PostgreSQL re-evaluates after waiting for concurrent updates of the row, so the quota is
+    exact under concurrency without counting contacts. The caller inserts the contacts and
+    commits in the same transaction (or rolls back).
+
+    Parameters:
+    - db: Database session.
+    - user_id: ID of the user.
+    - count: Number of contacts about to be added.
+    - quota: Quota of users without a quota of their own.
+
+    Returns:
+    - True if the contacts fit in the quota and were counted, False otherwise.
+    """
+    user = models.User
+    new_count = await db.scalar(
+        update(user)
+        .where(user.id == user_id, user.contact_count + count <= _quota(quota))
+        .values(contact_count=user.contact_count + count)
+        .returning(user.contact_count),
+        execution_options={"synchronize_session": False},
+    )
+    return new_count is not None
+
+async def reserve_contacts_up_to(db: AsyncSession, user_id: int, count: int, quota: int = settings.CONTACTS_QUOTA) -> int:
+    """
+    Counts as many of count contacts about to be added as fit in the quota of a user.
+
+    Tries reserve_contacts for all of them, then for what is left of the quota as read
+    after the failed attempt, until a reservation succeeds or the quota is used up. No lock
+    is taken beyond the row lock of the successful UPDATE, held until the caller commits.
 
     Parameters:
     - db: Database session.
-    - user_id: ID of the user whose contacts are to be retrieved.
-    - skip: Number of records to skip (for pagination).
-    - limit: Maximum number of records to return.
+    - user_id: ID of the user.
+    - count: Number of contacts about to be added.
+    - quota: Quota of users without a quota of their own.
 
     Returns:
-    - A list of contacts.
+    - The number of contacts counted, from 0 to count.
     """
-    return db.query(models.Contact).filter(models.Contact.owner_id == user_id).offset(skip).limit(limit).all()
+    user = models.User
+    while count > 0:
+        if await reserve_contacts(db, user_id, count, quota):
+            return count
+        # Concurrent writers may use up the rest in between; the next UPDATE checks again
+        remaining = await db.scalar(select(_quota(quota) - user.contact_count).where(user.id == user_id))
+        count = min(count, max(remaining or 0, 0))
+    return 0
 
-def get_contact(db: Session, contact_id: int):
+async def change_contact_count(db: AsyncSession, user_id: int, delta: int) -> None:
+    """
+    Adds delta (negative after deletions) to the contact counter of a user, in the current transaction.
+    """
+    if delta:
+        await db.execute(
+            update(models.User).where(models.User.id == user_id).values(contact_count=models.User.contact_count + delta),
+            execution_options={"synchronize_session": False},
+        )
+
+INSERT_COLUMNS = ("first_name", "last_name", "email", "phone_number", "birthday", "owner_id")
+
+async def insert_contacts(db: AsyncSession, user_id: int, rows: List[dict]) -> None:
+    """
+    Inserts many contacts of a user without loading them back.
+
+    PostgreSQL with asyncpg uses COPY, other databases one INSERT executed for all rows. The rows
+    are part of the current transaction; the caller commits.
+
+    Parameters:
+    - db: Database session.
+    - user_id: ID of the user who owns the contacts.
+    - rows: Contact values (as produced by schemas.ContactCreate.model_dump()).
+    """
+    if not rows:
+        return
+    connection = await db.connection()
+    if connection.dialect.driver == "asyncpg":
+        raw_connection = await connection.get_raw_connection()
+        records = [tuple(row[name] for name in INSERT_COLUMNS[:-1]) + (user_id,) for row in rows]
+        await raw_connection.driver_connection.copy_records_to_table(
+            models.Contact.__tablename__, records=records, columns=INSERT_COLUMNS,
+        )
+    else:
+        # One cached statement executed for all rows (executemany), batched by the driver
+        await db.execute(insert(models.Contact), [dict(row, owner_id=user_id) for row in rows])
+
+def page_query(stmt: Select, user_id: int, cursor: Optional[str], limit: int) -> Select:
+    """
+    Restricts a SELECT of contacts to one keyset page of a user: the limit + 1 contacts after
+    the cursor's (last_name, id), so split_page can tell whether another page follows.
+
+    Raises:
+    - ValueError: If the cursor is malformed.
+    """
+    stmt = (
+        stmt.where(models.Contact.owner_id == user_id)
+        .order_by(models.Contact.last_name, models.Contact.id)
+        .limit(limit + 1)
+    )
+    if cursor:
+        last_name, last_id = decode_cursor(cursor, (str, int))
+        stmt = stmt.where(tuple_(models.Contact.last_name, models.Contact.id) > tuple_(last_name, last_id))
+    return stmt
+
+def split_page(contacts: Sequence, limit: int) -> Tuple[Sequence, Optional[str]]:
+    """
+    Returns the contacts of a page fetched with page_query and the cursor of the next page (None on the last page).
+    """
+    if len(contacts) <= limit:
+        return contacts, None
+    contacts = contacts[:limit]
+    return contacts, encode_cursor(contacts[-1].last_name, contacts[-1].id)
+
+EXPORT_COLUMNS = ("id", "first_name", "last_name", "email", "phone_number", "birthday")
+
+async def stream_contacts(db: AsyncSession, user_id: int, batch_size: int = 1000) -> AsyncIterator[Sequence[Row]]:
+    """
+    Streams all contacts of a user, ordered by last name and id, in batches.
+
+    Only the EXPORT_COLUMNS are selected (no ORM instances) and rows are fetched through a
+    server-side cursor batch_size at a time, so memory use does not depend on the number of contacts.
+
+    Parameters:
+    - db: Database session.
+    - user_id: ID of the user whose contacts are streamed.
+    - batch_size: Number of rows fetched from the database at a time.
+
+    Returns:
+    - An async iterator of batches of rows with the EXPORT_COLUMNS.
+    """
+    result = await db.stream(
+        select(*(getattr(models.Contact, name) for name in EXPORT_COLUMNS))
+        .where(models.Contact.owner_id == user_id)
+        .order_by(models.Contact.last_name, models.Contact.id)
+        .execution_options(yield_per=batch_size)
+    )
+    async for batch in result.partitions():
+        yield batch
+
+async def get_contact(db: AsyncSession, contact_id: int, user_id: Optional[int] = None):
     """
     Fetches a single contact by its ID.
 
     Parameters:
     - db: Database session.
     - contact_id: ID of the contact to retrieve.
+    - user_id: ID of the user the contact must belong to (any user if None).
 
     Returns:
     - The contact object if found, None otherwise.
     """
-    return db.query(models.Contact).filter(models.Contact.id == contact_id).first()
+    stmt = select(models.Contact).where(models.Contact.id == contact_id)
+    if user_id is not None:
+        stmt = stmt.where(models.Contact.owner_id == user_id)
+    return await db.scalar(stmt)
 
-def update_contact(db: Session, contact_id: int, contact: schemas.ContactUpdate):
+async def update_contact(db: AsyncSession, contact_id: int, contact: Union[schemas.ContactUpdate, schemas.ContactPatch], user_id: int):
     """
-    Updates an existing contact.
+    Updates a contact of a user with a single UPDATE ... RETURNING statement.
+
+    Only the fields set in the request body are written (null fields are left unchanged),
+    and the owner is checked in the same statement, so another user's contact is never modified.
 
     Parameters:
-    - db: Database session.
+    - db: Database session; the update is committed.
     - contact_id: ID of the contact to update.
-    - contact: New contact information (schemas.ContactUpdate).
+    - contact: New contact information (schemas.ContactUpdate, or schemas.ContactPatch for a partial update).
+    - user_id: ID of the user owning the contact.
 
     Returns:
-    - The updated contact object.
+    - The updated contact object, or None if the user has no contact with this ID.
     """
-    db_contact = db.query(models.Contact).filter(models.Contact.id == contact_id).first()
+    owned = (models.Contact.id == contact_id, models.Contact.owner_id == user_id)
+    values = contact.model_dump(exclude_unset=True, exclude_none=True)
+    if not values:
+        return await db.scalar(select(models.Contact).where(*owned))
+    db_contact = await db.scalar(
+        update(models.Contact).where(*owned).values(values).returning(models.Contact),
+        execution_options={"synchronize_session": False, "populate_existing": True},
+    )
+    await db.commit()
     if db_contact:
-        for key, value in contact.dict().items():
-            setattr(db_contact, key, value)
-        db.commit()
-        db.refresh(db_contact)
+        await contacts_changed(user_id)
     return db_contact
 
-def delete_contact(db: Session, contact_id: int):
+async def delete_contact(db: AsyncSession, contact_id: int, user_id: int):
     """
-    Deletes a contact from the database.
+    Deletes a contact of a user with a single DELETE ... RETURNING statement.
 
     Parameters:
-    - db: Database session.
+    - db: Database session; the deletion is committed.
     - contact_id: ID of the contact to delete.
+    - user_id: ID of the user owning the contact.
 
     Returns:
-    - None
-    """
-    contact = db.query(models.Contact).filter(models.Contact.id == contact_id).first()
-    if contact:
-        db.delete(contact)
-        db.commit()
-        return contact
-    return None
\ No newline at end of file
+    - The deleted contact object, or None if the user has no contact with this ID.
+    """
+    db_contact = await db.scalar(
+        delete(models.Contact).where(models.Contact.id == contact_id, models.Contact.owner_id == user_id).returning(models.Contact),
+        execution_options={"synchronize_session": False},
+    )
+    if db_contact:
+        await change_contact_count(db, user_id, -1)
+    await db.commit()
+    if db_contact:
+        await contacts_changed(user_id)
+    return db_contact
+
+PATCH_FIELDS = tuple(schemas.ContactPatch.model_fields)
+
+async def update_contacts(db: AsyncSession, user_id: int, changes: Dict[int, dict]) -> Dict[int, models.Contact]:
+    """
+    Applies partial updates to many contacts of a user with a single UPDATE ... RETURNING statement.
+
+    Each column is set with a CASE on the contact id, so every contact gets its own values
+    and columns missing from its changes keep their current value. Contacts that do not
+    exist or belong to another user are left untouched.
+
+    Parameters:
+    - db: Database session; the update is committed.
+    - user_id: ID of the user owning the contacts.
+    - changes: New field values (a subset of PATCH_FIELDS) by contact ID.
+
+    Returns:
+    - The updated contacts by ID.
+    """
+    contact = models.Contact
+    values = {}
+    for name in PATCH_FIELDS:
+        column = getattr(contact, name)
+        whens = {contact_id: literal(fields[name], column.type) for contact_id, fields in changes.items() if name in fields}
+        if whens:
+            values[name] = case(whens, value=contact.id, else_=column)
+    owned = (contact.owner_id == user_id, contact.id.in_(list(changes)))
+    if not values:
+        return {row.id: row for row in await db.scalars(select(contact).where(*owned))}
+    result = await db.scalars(
+        update(contact).where(*owned).values(values).returning(contact),
+        execution_options={"synchronize_session": False, "populate_existing": True},
+    )
+    updated = {row.id: row for row in result}
+    await db.commit()
+    if updated:
+        await contacts_changed(user_id)
+    return updated
+
+async def delete_contacts(db: AsyncSession, user_id: int, contact_ids: List[int]) -> Dict[int, models.Contact]:
+    """
+    Deletes many contacts of a user with a single DELETE ... RETURNING statement.
+
+    Parameters:
+    - db: Database session; the deletion is committed.
+    - user_id: ID of the user owning the contacts.
+    - contact_ids: IDs of the contacts to delete; IDs of other users' contacts are ignored.
+
+    Returns:
+    - The deleted contacts by ID.
+    """
+    contact = models.Contact
+    result = await db.scalars(
+        delete(contact).where(contact.owner_id == user_id, contact.id.in_(contact_ids)).returning(contact),
+        execution_options={"synchronize_session": False},
+    )
+    deleted = {row.id: row for row in result}
+    await change_contact_count(db, user_id, -len(deleted))
+    await db.commit()
+    if deleted:
+        await contacts_changed(user_id)
+    return deleted
+
+def birthday_key(day: date) -> int:
+    """
+    Returns the month * 100 + day key of a date, as computed by Contact.birthday_key.
+    """
+    return day.month * 100 + day.day
+
+def _is_feb_28_of_common_year(day: date) -> bool:
+    # Contacts born on February 29th celebrate on February 28th in common years
+    return day.month == 2 and day.day == 28 and not calendar.isleap(day.year)
+
+def birthdays_query(stmt: Select, user_id: int, today: date, days: int) -> Select:
+    """
+    Restricts a SELECT of contacts to the contacts of a user with a birthday from today to
+    today + days (inclusive), soonest first.
+
+    The lookup filters and orders by Contact.birthday_key, the expression of the
+    (owner_id, month * 100 + day) index, and ignores the year of birth. Ranges crossing the
+    new year are split in two, and February 29th birthdays are reported on February 28th
+    in common years.
+    """
+    key = models.Contact.birthday_key
+    end = today + timedelta(days=days)
+    start_key = birthday_key(today)
+    end_key = 229 if _is_feb_28_of_common_year(end) else birthday_key(end)
+    if days >= 365:
+        condition = key.isnot(None)
+    elif start_key <= end_key:
+        condition = key.between(start_key, end_key)
+    else:
+        # December -> January wraparound
+        condition = or_(key >= start_key, key <= end_key)
+    return stmt.where(models.Contact.owner_id == user_id, condition).order_by(key < start_key, key, models.Contact.id)
+
+async def birthdays_on(db: AsyncSession, day: date, batch_size: int = 1000) -> AsyncIterator[models.Contact]:
+    """
+    Streams the contacts of all users with a birthday on a given day, with their owner loaded.
+
+    Rows are read through the (month * 100 + day, owner_id, id) expression index and fetched in batches,
+    so a reminder job can go through them without loading the whole result in memory.
+    Contacts are grouped by owner.
+
+    Parameters:
+    - db: Database session.
+    - day: The day to look for; February 29th birthdays are included on February 28th of common years.
+    - batch_size: Number of rows fetched from the database at a time.
+
+    Returns:
+    - An async iterator of contacts.
+    """
+    keys = [birthday_key(day)]
+    if _is_feb_28_of_common_year(day):
+        keys.append(229)
+    result = await db.stream_scalars(
+        select(models.Contact)
+        .join(models.Contact.owner)
+        .options(contains_eager(models.Contact.owner))
+        .where(models.Contact.birthday_key.in_(keys))
+        .order_by(models.Contact.birthday_key, models.Contact.owner_id, models.Contact.id)
+        .execution_options(yield_per=batch_size)
+    )
+    async for contact in result:
+        yield contact
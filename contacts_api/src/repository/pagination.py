@@ -0,0 +1,59 @@
+"""
+This module encodes and decodes the opaque cursors used for keyset pagination.
+
+A cursor carries the sort key of the last row of a page (e.g. last name and id), serialized
+with orjson and base64url-encoded, so clients can pass it back without interpreting it.
+
+Functions:
+- encode_cursor: Builds a cursor from the sort key values of a row.
+- decode_cursor: Recovers the sort key values from a cursor.
+"""
+import base64
+import binascii
+from typing import Tuple
+import orjson
+
+
+def encode_cursor(*values) -> str:
+    """
+    Builds an opaque cursor.
+
+    Parameters:
+    - values: Sort key values of the last row returned.
+
+    Returns:
+    - The cursor as a URL-safe string.
+    """
+    return base64.urlsafe_b64encode(orjson.dumps(values)).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, types: Tuple[type, ...]) -> list:
+    """
+    Recovers the sort key values from a cursor.
+
+    Parameters:
+    - cursor: A cursor produced by encode_cursor.
+    - types: The expected type of each value, e.g. (str, int); an integer is accepted (and
+      converted) where a float is expected, since JSON does not tell 1.0 from 1.
+
+    Returns:
+    - The list of sort key values.
+
+    Raises:
+    - ValueError: If the cursor is malformed or its values do not have the expected types.
+    """
+    try:
+        values = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, orjson.JSONDecodeError, ValueError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError("Invalid cursor")
+    decoded = []
+    for value, expected in zip(values, types):
+        if expected is float and isinstance(value, int) and not isinstance(value, bool):
+            value = float(value)
+        # bool is a subclass of int, but true is not an id
+        if not isinstance(value, expected) or isinstance(value, bool) and expected is not bool:
+            raise ValueError("Invalid cursor")
+        decoded.append(value)
+    return decoded
@@ -0,0 +1,238 @@
+"""
+This module implements ranked contact search by first name, last name or email.
+
+On PostgreSQL the search runs in the database: contacts whose fields contain the query
+(ILIKE) or are similar to it (pg_trgm % operator) are matched through GIN trigram indexes and
+ranked by trigram similarity. The % operator applies SEARCH_SIMILARITY_THRESHOLD, set as
+pg_trgm.similarity_threshold for the transaction, so both backends match the same contacts. On other databases (SQLite in tests and local runs) an
+in-process n-gram index of the owner's contacts is built on first use and kept in a bounded
+cache until the owner's contacts change.
+
+Results are ordered by (score descending, id) and support both offset and cursor pagination.
+
+Functions:
+- search_rows: Returns a ranked page of selected columns of the contacts of a user matching a query.
+- search_contacts: Returns a ranked page of the contacts of a user matching a query.
+- invalidate: Drops the in-process index of an owner after its contacts changed.
+"""
+import asyncio
+import math
+from collections import Counter, defaultdict
+from typing import Dict, FrozenSet, List, Optional, Sequence, Set, Tuple
+from sqlalchemy import and_, func, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.config import settings
+from src.database import models
+from src.repository.pagination import decode_cursor, encode_cursor
+from src.services.local_cache import LocalCache
+
+SEARCH_FIELDS = ("first_name", "last_name", "email")
+
+
+def trigrams(text: str) -> Set[str]:
+    """
+    Returns the trigrams of a lower-cased text, padded like pg_trgm (two spaces before, one after).
+    """
+    padded = f"  {text.lower()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(query_grams: Set[str], grams: FrozenSet[str]) -> float:
+    """
+    Trigram similarity (shared trigrams / all trigrams) of two trigram sets, as in pg_trgm.
+    """
+    shared = len(query_grams & grams)
+    return shared / (len(query_grams) + len(grams) - shared) if shared else 0.0
+
+
+class NgramIndex:
+    """
+    In-process trigram index over the searchable fields of one owner's contacts.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Set[int]] = defaultdict(set)
+        self.fields: Dict[int, Tuple[str, ...]] = {}
+        self.grams: Dict[int, Tuple[FrozenSet[str], ...]] = {}
+
+    def add(self, contact_id: int, values: Tuple[Optional[str], ...]) -> None:
+        values = tuple((value or "").lower() for value in values)
+        grams = tuple(frozenset(trigrams(value)) for value in values)
+        self.fields[contact_id] = values
+        self.grams[contact_id] = grams
+        for value_grams in grams:
+            for gram in value_grams:
+                self.postings[gram].add(contact_id)
+
+    def search(self, query: str, threshold: float) -> List[Tuple[float, int]]:
+        """
+        Returns (score, id) pairs of contacts containing the query or similar to it, best first.
+        """
+        query = query.lower()
+        query_grams = trigrams(query)
+        if len(query) < 3:
+            # Too short to have trigrams of its own: a substring can be anywhere
+            candidates = self.fields.keys()
+        else:
+            # Count shared trigrams through the postings; a contact can only reach the
+            # similarity threshold, or contain the query, if it shares enough of them
+            shared = Counter()
+            for gram in query_grams:
+                shared.update(self.postings.get(gram, ()))
+            # A contact containing the query has all of its distinct unpadded trigrams
+            inner = {query[i:i + 3] for i in range(len(query) - 2)}
+            needed = min(math.ceil(threshold * len(query_grams)), len(inner))
+            candidates = [contact_id for contact_id, count in shared.items() if count >= needed]
+        matches = []
+        for contact_id in candidates:
+            score = max(similarity(query_grams, grams) for grams in self.grams[contact_id])
+            if score >= threshold or any(query in value for value in self.fields[contact_id]):
+                matches.append((score, contact_id))
+        matches.sort(key=lambda match: (-match[0], match[1]))
+        return matches
+
+
+_indexes = LocalCache(maxsize=settings.SEARCH_INDEX_CACHE_SIZE, ttl=settings.SEARCH_INDEX_TTL, name="search_index")
+# Concurrent searches of the same owner wait for a single index build
+_build_locks: Dict[int, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+
+def invalidate(owner_id: int) -> None:
+    """
+    Drops the in-process search index of an owner, so it is rebuilt on the next search.
+
+    Parameters:
+    - owner_id: ID of the user whose contacts changed.
+    """
+    _indexes.pop(owner_id)
+
+
+def escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+async def _search_postgresql(db: AsyncSession, user_id: int, query: str, limit: int, skip: int, after: Optional[list], entities: tuple):
+    contact = models.Contact
+    pattern = f"%{escape_like(query)}%"
+    columns = [getattr(contact, name) for name in SEARCH_FIELDS]
+    score = func.greatest(*(func.similarity(column, query) for column in columns)).label("score")
+    stmt = (
+        select(contact.id, *entities, score)
+        .where(
+            contact.owner_id == user_id,
+            or_(*(column.ilike(pattern, escape="\\") for column in columns), *(column.op("%")(query) for column in columns)),
+        )
+        .order_by(score.desc(), contact.id)
+        .limit(limit + 1)
+    )
+    if after is not None:
+        last_score, last_id = after
+        stmt = stmt.where(or_(score < last_score, and_(score == last_score, contact.id > last_id)))
+    elif skip:
+        stmt = stmt.offset(skip)
+    # % compares with pg_trgm.similarity_threshold (0.3 unless set); SET LOCAL takes no parameters
+    await db.execute(
+        text("SELECT set_config('pg_trgm.similarity_threshold', :threshold, true)"),
+        {"threshold": str(settings.SEARCH_SIMILARITY_THRESHOLD)},
+    )
+    result = await db.execute(stmt)
+    return [(row[-1], row[0], tuple(row[1:-1])) for row in result]
+
+
+async def _search_ngram_index(db: AsyncSession, user_id: int, query: str, limit: int, skip: int, after: Optional[list], entities: tuple):
+    index = _indexes.get(user_id)
+    if index is None:
+        async with _build_locks[user_id]:
+            index = _indexes.get(user_id)
+            if index is None:
+                index = NgramIndex()
+                rows = await db.execute(
+                    select(models.Contact.id, *(getattr(models.Contact, name) for name in SEARCH_FIELDS))
+                    .where(models.Contact.owner_id == user_id)
+                )
+                for row in rows:
+                    index.add(row[0], tuple(row[1:]))
+                _indexes.set(user_id, index)
+        _build_locks.pop(user_id, None)
+
+    matches = index.search(query, settings.SEARCH_SIMILARITY_THRESHOLD)
+    if after is not None:
+        last_score, last_id = after
+        matches = [m for m in matches if m[0] < last_score or (m[0] == last_score and m[1] > last_id)]
+    else:
+        matches = matches[skip:]
+    matches = matches[:limit + 1]
+    if not matches:
+        return []
+    result = await db.execute(select(models.Contact.id, *entities).where(models.Contact.id.in_([m[1] for m in matches])))
+    by_id = {row[0]: tuple(row[1:]) for row in result}
+    return [(score, contact_id, by_id[contact_id]) for score, contact_id in matches if contact_id in by_id]
+
+
+async def search_rows(
+    db: AsyncSession,
+    user_id: int,
+    query: str,
+    entities: Sequence,
+    limit: int = 20,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+) -> Tuple[List[tuple], Optional[str]]:
+    """
+    Searches the contacts of a user by first name, last name or email, best matches first,
+    selecting the given entities (the Contact model or some of its columns) of each match.
+
+    Parameters:
+    - db: Database session.
+    - user_id: ID of the user whose contacts are searched.
+    - query: Text to look for.
+    - entities: What to select for each matching contact, e.g. (models.Contact,).
+    - limit: Maximum number of contacts to return.
+    - skip: Number of results to skip (ignored when a cursor is given).
+    - cursor: The next_cursor returned with the previous page.
+
+    Returns:
+    - A tuple of the list of matches, each a tuple of the selected entities, and the cursor
+      of the next page (None on the last page).
+
+    Raises:
+    - ValueError: If the cursor is malformed.
+    """
+    after = decode_cursor(cursor, (float, int)) if cursor else None
+    backend = _search_postgresql if db.get_bind().dialect.name == "postgresql" else _search_ngram_index
+    matches = await backend(db, user_id, query, limit, skip, after, tuple(entities))
+    next_cursor = None
+    if len(matches) > limit:
+        matches = matches[:limit]
+        last_score, last_id, _ = matches[-1]
+        next_cursor = encode_cursor(last_score, last_id)
+    return [values for _, _, values in matches], next_cursor
+
+
+async def search_contacts(
+    db: AsyncSession,
+    user_id: int,
+    query: str,
+    limit: int = 20,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+) -> Tuple[List[models.Contact], Optional[str]]:
+    """
+    Searches the contacts of a user by first name, last name or email, best matches first.
+
+    Parameters:
+    - db: Database session.
+    - user_id: ID of the user whose contacts are searched.
+    - query: Text to look for.
+    - limit: Maximum number of contacts to return.
+    - skip: Number of results to skip (ignored when a cursor is given).
+    - cursor: The next_cursor returned with the previous page.
+
+    Returns:
+    - A tuple of the list of matching contacts and the cursor of the next page (None on the last page).
+
+    Raises:
+    - ValueError: If the cursor is malformed.
+    """
+    matches, next_cursor = await search_rows(db, user_id, query, (models.Contact,), limit, skip, cursor)
+    return [contact for contact, in matches], next_cursor
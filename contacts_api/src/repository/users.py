@@ -3,22 +3,33 @@ This module provides functionality for managing user entities in the application
 
 Functions:
 - get_user_by_email: Fetches a user from the database based on their email address.
-- create_user: Registers a new user in the database, including uploading an avatar image if provided.
+- create_user: Registers a new user in the database, including storing a thumbnail of the avatar image if provided.
+- update_token: Stores the current refresh token of a user.
+- update_password: Stores a new password hash of a user.
+- confirmed_email: Marks the email address of a user as confirmed.
+- update_avatar: Stores the avatar URL of a user.
+
+Writes that change cached user data invalidate the user cache of every worker.
 
 Dependencies:
-- cloudinary.uploader: Used for uploading avatar images to Cloudinary.
-- sqlalchemy.orm.Session: Used for database session management.
+- src.services.avatars: Used for turning avatar images into thumbnails and storing them.
+- sqlalchemy.ext.asyncio.AsyncSession: Used for asynchronous database session management.
 - fastapi.UploadFile: Represents a file uploaded by a client.
 """
 
+import logging
 from typing import Union
-import cloudinary.uploader
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import UploadFile
 from src.database.models import User
 from src.schemas import UserModel
+from src.services import avatars, user_cache
+from src.services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
 
-async def get_user_by_email(email: str, db: Session) -> User:
+async def get_user_by_email(email: str, db: AsyncSession) -> User:
     """
     Retrieves a user by their email address.
 
@@ -30,12 +41,12 @@ async def get_user_by_email(email: str, db: Session) -> User:
     - A User object if found, None otherwise.
     """
     
-    return db.query(User).filter(User.email == email).first()
+    return await db.scalar(select(User).where(User.email == email))
 
 
-async def create_user(body: UserModel, db: Session) -> User:
+async def create_user(body: UserModel, db: AsyncSession) -> User:
     """
-    Creates a new user in the database. If an avatar image is provided, it uploads the image to Cloudinary and stores the URL.
+    Creates a new user in the database. If an avatar image is provided, a thumbnail of it is stored and its URL saved.
 
     Parameters:
     - body: The user data (email, username, password, avatar).
@@ -45,31 +56,63 @@ async def create_user(body: UserModel, db: Session) -> User:
     - The newly created User object.
     """
     
-    avatar_url = None
-    if body.avatar:
-        try:
-            result = cloudinary.uploader.upload(body.avatar.file)
-            avatar_url = result.get("url")
-        except Exception as e:
-            print(e)
-            avatar_url = None
     new_user = User(
         email=body.email,
         username=body.username,
         password=body.password,
-        avatar=avatar_url
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
+    if body.avatar:
+        # The storage key depends on the user ID, so the avatar is stored once the user exists
+        try:
+            new_user.avatar = await avatars.save_avatar(new_user.id, body.avatar)
+            await db.commit()
+        except Exception as e:
+            logger.warning("Could not store the avatar of %s: %s", new_user.email, e)
     return new_user
 
-async def update_token(user: User, token: Union[str, None], db: Session) -> None:
+async def update_token(user: User, token: Union[str, None], db: AsyncSession) -> None:
     user.refresh_token = token
-    db.commit()
+    await db.commit()
+    await user_cache.invalidate_user(get_redis(), user.email)
+
 
+async def update_password(user: User, password_hash: str, db: AsyncSession) -> None:
+    """
+    Stores a new password hash for a user, e.g. after rehashing with the current scheme.
 
-async def confirmed_email(email: str, db: Session) -> None:
+    Parameters:
+    - user: The user to update.
+    - password_hash: The new password hash.
+    - db: The database session.
+    """
+    user.password = password_hash
+    await db.commit()
+
+
+async def confirmed_email(email: str, db: AsyncSession) -> None:
     user = await get_user_by_email(email, db)
     user.confirmed = True
-    db.commit()
\ No newline at end of file
+    await db.commit()
+    await user_cache.invalidate_user(get_redis(), email)
+
+
+async def update_avatar(email: str, url: str, db: AsyncSession) -> User:
+    """
+    Stores the avatar URL of a user.
+
+    Parameters:
+    - email: The email address of the user.
+    - url: The URL of the uploaded avatar.
+    - db: The database session.
+
+    Returns:
+    - The updated User object.
+    """
+    user = await get_user_by_email(email, db)
+    user.avatar = url
+    await db.commit()
+    await user_cache.invalidate_user(get_redis(), email)
+    return user
\ No newline at end of file
@@ -1,25 +1,25 @@
+import base64
 from typing import List
-from fastapi import APIRouter, HTTPException, Depends, status, Security, BackgroundTasks, Request, File, UploadFile
+from fastapi import APIRouter, HTTPException, Depends, status, Security, Request, File, UploadFile
 from fastapi.security import OAuth2PasswordRequestForm, HTTPAuthorizationCredentials, HTTPBearer
-from sqlalchemy.orm import Session
-from src.config import cloudinary
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.database.db import get_db
 from src.schemas import UserModel, UserResponse, TokenModel, RequestEmail
 from src.repository import users as repository_users
 from src.services.auth import auth_service
-from src.services.email import send_email
+from src.services import avatars, jobs
+from src.services.redis_client import get_redis
 
 router = APIRouter(prefix='/auth', tags=["auth"])
 security = HTTPBearer()
 
 
 @router.post("/signup", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def signup(body: UserModel, background_tasks: BackgroundTasks, request: Request, db: Session = Depends(get_db)):
+async def signup(body: UserModel, request: Request, db: AsyncSession = Depends(get_db)):
     """
     Register a new user.
 
     - **body**: JSON body containing user information (username, email, password).
-    - **background_tasks**: BackgroundTasks instance to handle sending email confirmation.
     - **request**: Request object to retrieve base URL for email confirmation link.
     - **db**: SQLAlchemy database session dependency.
 
@@ -29,14 +29,15 @@ async def signup(body: UserModel, background_tasks: BackgroundTasks, request: Re
     exist_user = await repository_users.get_user_by_email(body.email, db)
     if exist_user:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Account already exists")
-    body.password = auth_service.get_password_hash(body.password)
+    body.password = await auth_service.get_password_hash(body.password)
     new_user = await repository_users.create_user(body, db)
-    background_tasks.add_task(send_email, new_user.email, new_user.username, request.base_url)
+    # Sent by a job worker, so a slow SMTP server does not hold up API workers
+    await jobs.enqueue(get_redis(), "send_email", email=new_user.email, username=new_user.username, host=str(request.base_url))
     return {"user": new_user, "detail": "User successfully created"}
 
 
 @router.post("/login", response_model=TokenModel)
-async def login(body: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(body: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
     """
     User login endpoint.
 
@@ -51,8 +52,12 @@ async def login(body: OAuth2PasswordRequestForm = Depends(), db: Session = Depen
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid email")
     if not user.confirmed:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Email not confirmed")
-    if not auth_service.verify_password(body.password, user.password):
+    verified, new_hash = await auth_service.verify_and_update_password(body.password, user.password)
+    if not verified:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid password")
+    if new_hash:
+        # Transparently upgrade legacy (e.g. bcrypt) hashes to the current scheme
+        await repository_users.update_password(user, new_hash, db)
     # Generate JWT
     access_token = await auth_service.create_access_token(data={"sub": user.email})
     refresh_token = await auth_service.create_refresh_token(data={"sub": user.email})
@@ -61,7 +66,7 @@ async def login(body: OAuth2PasswordRequestForm = Depends(), db: Session = Depen
 
 
 @router.get('/refresh_token', response_model=TokenModel)
-async def refresh_token(credentials: HTTPAuthorizationCredentials = Security(security), db: Session = Depends(get_db)):
+async def refresh_token(credentials: HTTPAuthorizationCredentials = Security(security), db: AsyncSession = Depends(get_db)):
     """
     Refresh access token endpoint.
 
@@ -85,7 +90,7 @@ async def refresh_token(credentials: HTTPAuthorizationCredentials = Security(sec
 
 
 @router.get('/confirmed_email/{token}')
-async def confirmed_email(token: str, db: Session = Depends(get_db)):
+async def confirmed_email(token: str, db: AsyncSession = Depends(get_db)):
     """
     Confirm user email endpoint.
 
@@ -106,12 +111,11 @@ async def confirmed_email(token: str, db: Session = Depends(get_db)):
 
 
 @router.post('/request_email')
-async def request_email(body: RequestEmail, background_tasks: BackgroundTasks, request: Request, db: Session = Depends(get_db)):
+async def request_email(body: RequestEmail, request: Request, db: AsyncSession = Depends(get_db)):
     """
     Request email confirmation endpoint.
 
     - **body**: JSON body containing user email.
-    - **background_tasks**: BackgroundTasks instance to handle sending email confirmation.
     - **request**: Request object to retrieve base URL for email confirmation link.
     - **db**: SQLAlchemy database session dependency.
 
@@ -123,19 +127,35 @@ async def request_email(body: RequestEmail, background_tasks: BackgroundTasks, r
     if user.confirmed:
         return {"message": "Your email is already confirmed"}
     if user:
-        background_tasks.add_task(send_email, user.email, user.username, request.base_url)
+        await jobs.enqueue(get_redis(), "send_email", email=user.email, username=user.username, host=str(request.base_url))
     return {"message": "Check your email for confirmation."}
 
-@router.post("/upload-avatar/")
-async def upload_avatar(file: UploadFile = File(...)):
+@router.post("/upload-avatar/", status_code=status.HTTP_202_ACCEPTED)
+async def upload_avatar(file: UploadFile = File(...), current_user=Depends(auth_service.get_current_user)):
     """
     Upload avatar image endpoint.
 
+    The request body is size-limited before it is parsed (see avatars.UploadLimitMiddleware);
+    the file is checked against AVATAR_MAX_BYTES and turned into a WebP thumbnail in a
+    process pool, and a job worker stores the thumbnail and replaces the avatar of the user.
+
     - **file**: UploadFile object containing image file.
+    - **current_user**: The current authenticated user, whose avatar is replaced.
 
     Returns:
-    - JSON response with uploaded image URL.
+    - JSON response with the URL the avatar will be served from.
+
+    Raises:
+    - HTTPException: 413 if the file is too large, 400 if it is not an image.
     """
-    result = cloudinary.uploader.upload(file.file)
-    url = result.get("url")
-    return {"url": url}
\ No newline at end of file
+    try:
+        data = await avatars.read_limited(file)
+    except avatars.AvatarError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    try:
+        thumbnail = await avatars.make_thumbnail(data)
+    except avatars.AvatarError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    key = avatars.avatar_key(current_user.id, thumbnail)
+    await jobs.enqueue(get_redis(), "store_avatar", email=current_user.email, key=key, image=base64.b64encode(thumbnail).decode())
+    return {"url": avatars.get_storage().url(key)}
@@ -1,18 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.database import models
-from src.repository import contacts
+from src.repository import contact_reads, contacts
 from src import schemas
 from src.database import db
-from typing import List
+from typing import List, Literal, Optional, Union
 from src.services.auth import auth_service
-from fastapi_limiter.depends import RateLimiter
-from datetime import datetime, timedelta
+from src.services import contact_export, contact_import, response_cache
+from src.services.redis_client import get_redis
+from pydantic import TypeAdapter
+from src.services.rate_limit import rate_limit
+from src.config import settings
+from datetime import date
 
 router = APIRouter()
 
-@router.post("/", response_model=schemas.Contact, dependencies=[Depends(RateLimiter(times=5, seconds=60))])
-def create_contact(contact: schemas.ContactCreate, db: Session = Depends(db.get_db), current_user: schemas.UserDb = Depends(auth_service.get_current_user)):
+# Serializers of the cached read responses: ORM objects are validated first, the column
+# records of contact_reads are dumped directly
+CONTACT = response_cache.orm_serializer(TypeAdapter(schemas.Contact))
+CONTACT_RECORDS = TypeAdapter(List[schemas.ContactRecord]).dump_json
+CONTACT_RECORD_PAGE = TypeAdapter(schemas.ContactRecordPage).dump_json
+
+@router.post("/", response_model=schemas.Contact, dependencies=[Depends(rate_limit("contacts_create"))])
+async def create_contact(contact: schemas.ContactCreate, db: AsyncSession = Depends(db.get_db), current_user: schemas.UserDb = Depends(auth_service.get_current_user)):
     """
     Create a new contact for the current user.
     
@@ -26,41 +37,175 @@ def create_contact(contact: schemas.ContactCreate, db: Session = Depends(db.get_
     Raises:
     - HTTPException: If the contact limit for the user is reached.
     """
-    contact_count = db.query(models.Contact).filter(models.Contact.owner_id == current_user.id).count()
-    if contact_count >= 10:
+    try:
+        return await contacts.create_contact(db, contact, current_user.id)
+    except contacts.QuotaExceeded:
         raise HTTPException(status_code=400, detail="Contact limit reached")
-    return contacts.create_contact(db, contact, current_user.id)
 
-@router.get("/", response_model=List[schemas.Contact])
-def read_contacts(skip: int = 0, limit: int = 10, db: Session = Depends(db.get_db), current_user: schemas.UserDb = Depends(auth_service.get_current_user)):
+IMPORT_PARSERS = {
+    "text/csv": contact_import.iter_csv_rows,
+    "application/x-ndjson": contact_import.iter_ndjson_rows,
+    "application/ndjson": contact_import.iter_ndjson_rows,
+}
+
+@router.post("/import", response_model=schemas.ImportResult, dependencies=[Depends(rate_limit("contacts_import"))])
+async def import_contacts(request: Request, db: AsyncSession = Depends(db.get_db), current_user: schemas.UserDb = Depends(auth_service.get_current_user)):
+    """
+    Import contacts of the current user in bulk from a CSV or NDJSON request body.
+
+    The body is parsed while it is received and inserted in chunks, each committed on its own.
+    Bodies larger than IMPORT_MAX_BYTES are rejected; when that is only noticed while
+    reading, the chunks committed before stay imported.
+    CSV bodies start with a header row naming the contact fields. Invalid rows and rows
+    beyond the contact quota are skipped and reported.
+
+    - **request**: The request, with Content-Type text/csv or application/x-ndjson.
+    - **db**: SQLAlchemy database session dependency.
+    - **current_user**: The current authenticated user.
+
+    Returns:
+    - JSON response with the numbers of imported and failed rows and the errors of the failed rows.
+
+    Raises:
+    - HTTPException: If the content type is not supported or the body is too large.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    parser = IMPORT_PARSERS.get(content_type)
+    if parser is None:
+        raise HTTPException(status_code=415, detail="Expected text/csv or application/x-ndjson")
+    max_bytes = settings.IMPORT_MAX_BYTES
+    if int(request.headers.get("content-length") or 0) > max_bytes:
+        raise HTTPException(status_code=413, detail=f"Request body is larger than {max_bytes} bytes")
+    rows = parser(contact_import.iter_lines(request.stream(), max_bytes=max_bytes))
+    try:
+        return await contact_import.import_contacts(db, current_user.id, rows)
+    except contact_import.BodyTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+@router.get("/", response_model=Union[List[schemas.Contact], schemas.ContactPage])
+async def read_contacts(request: Request, skip: int = 0, limit: int = 10, pagination: Literal["offset", "cursor"] = "offset", cursor: Optional[str] = None, db: AsyncSession = Depends(db.get_db), current_user: schemas.UserDb = Depends(auth_service.get_current_user)):
     """
     Read a list of contacts for the current user.
     
-    - **skip**: Number of records to skip (pagination).
-    - **limit**: Maximum number of records to return (pagination).
+    Responses are cached and carry an ETag; send it in If-None-Match to get 304 Not Modified
+    while the contacts are unchanged.
+
+    - **skip**: Number of records to skip (offset pagination).
+    - **limit**: Maximum number of records to return.
+    - **pagination**: "offset" (default) or "cursor" for keyset pagination ordered by last name.
+    - **cursor**: The next_cursor of the previous page (cursor pagination only).
     - **db**: SQLAlchemy database session dependency.
     - **current_user**: The current authenticated user.
     
     Returns:
-    - JSON response with a list of contacts.
+    - JSON response with a list of contacts (offset pagination), or with the contacts and
+      the next_cursor to request the following page (cursor pagination).
+
+    Raises:
+    - HTTPException: If the cursor is invalid.
+    """
+    if pagination == "cursor" or cursor:
+        async def page():
+            try:
+                return await contact_reads.list_contacts_page(db, current_user.id, cursor=cursor, limit=limit)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+        return await response_cache.cached_response(get_redis(), request, current_user.id, page, CONTACT_RECORD_PAGE)
+    return await response_cache.cached_response(
+        get_redis(), request, current_user.id,
+        lambda: contact_reads.list_contacts(db, current_user.id, skip=skip, limit=limit), CONTACT_RECORDS,
+    )
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_contacts(format: Literal["csv", "ndjson", "vcard"] = "csv", current_user: schemas.UserDb = Depends(auth_service.get_current_user)):
+    """
+    Export all contacts of the current user as CSV, NDJSON or vCard 4.0.
+
+    The contacts are read through a server-side cursor and streamed batch by batch, so
+    memory use does not grow with the size of the address book.
+
+    - **format**: "csv" (default, with a header row), "ndjson" or "vcard".
+    - **current_user**: The current authenticated user.
+
+    Returns:
+    - A streamed file attachment with the contacts.
+    """
+    export_format = contact_export.FORMATS[format]
+    return StreamingResponse(
+        contact_export.export_contacts(db.AsyncSessionLocal, current_user.id, format),
+        media_type=export_format.media_type,
+        headers={"Content-Disposition": f'attachment; filename="contacts.{export_format.extension}"'},
+    )
+
+@router.patch("/batch", response_model=List[schemas.ContactBatchOutcome])
+async def update_contacts(batch: schemas.ContactBatchUpdate, db: AsyncSession = Depends(db.get_db), current_user: models.User = Depends(auth_service.get_current_user)):
+    """
+    Partially update many contacts of the current user in one statement and transaction.
+
+    - **batch**: JSON body with the list of contacts to update, each with its id and the
+      fields to change; missing or null fields are left unchanged.
+    - **db**: SQLAlchemy database session dependency.
+    - **current_user**: The current authenticated user.
+
+    Returns:
+    - JSON response with the outcome of each contact, in request order: "updated" with the
+      updated contact, or "not_found" if it does not exist or belongs to another user.
+    """
+    changes = {item.id: item.model_dump(exclude={"id"}, exclude_unset=True, exclude_none=True) for item in batch.contacts}
+    updated = await contacts.update_contacts(db, current_user.id, changes)
+    return [
+        {"id": contact_id, "status": "updated", "contact": updated[contact_id]} if contact_id in updated
+        else {"id": contact_id, "status": "not_found"}
+        for contact_id in changes
+    ]
+
+@router.delete("/batch", response_model=List[schemas.ContactBatchOutcome])
+async def delete_contacts(batch: schemas.ContactBatchDelete, db: AsyncSession = Depends(db.get_db), current_user: models.User = Depends(auth_service.get_current_user)):
+    """
+    Delete many contacts of the current user in one statement and transaction.
+
+    - **batch**: JSON body with the list of contact ids to delete.
+    - **db**: SQLAlchemy database session dependency.
+    - **current_user**: The current authenticated user.
+
+    Returns:
+    - JSON response with the outcome of each id, in request order: "deleted" with the
+      deleted contact, or "not_found" if it does not exist or belongs to another user.
     """
-    return contacts.get_contacts(db=db, user_id=current_user.id, skip=skip, limit=limit)
+    contact_ids = list(dict.fromkeys(batch.ids))
+    deleted = await contacts.delete_contacts(db, current_user.id, contact_ids)
+    return [
+        {"id": contact_id, "status": "deleted", "contact": deleted[contact_id]} if contact_id in deleted
+        else {"id": contact_id, "status": "not_found"}
+        for contact_id in contact_ids
+    ]
 
 @router.get("/{contact_id}", response_model=schemas.Contact)
-def read_contact(contact_id: int, db: Session = Depends(db.get_db)):
+async def read_contact(contact_id: int, request: Request, db: AsyncSession = Depends(db.get_db), current_user: models.User = Depends(auth_service.get_current_user)):
     """
-    Read a specific contact by its ID.
+    Read a specific contact of the current user by its ID.
     
+    The response is cached and carries an ETag, like the contact list.
+
     - **contact_id**: ID of the contact to retrieve.
     - **db**: SQLAlchemy database session dependency.
+    - **current_user**: The current authenticated user.
     
     Returns:
     - JSON response with the contact details.
+
+    Raises:
+    - HTTPException: If the contact is not found or does not belong to the current user.
     """
-    return contacts.get_contact(db=db, contact_id=contact_id)
+    async def contact():
+        found = await contacts.get_contact(db=db, contact_id=contact_id, user_id=current_user.id)
+        if found is None:
+            raise HTTPException(status_code=404, detail="Contact not found")
+        return found
+    return await response_cache.cached_response(get_redis(), request, current_user.id, contact, CONTACT)
 
 @router.put("/contacts/{contact_id}", response_model=schemas.Contact)
-def update_contact(contact_id: int, contact: schemas.ContactUpdate, db: Session = Depends(db.get_db), current_user: models.User = Depends(auth_service.get_current_user)):
+async def update_contact(contact_id: int, contact: schemas.ContactUpdate, db: AsyncSession = Depends(db.get_db), current_user: models.User = Depends(auth_service.get_current_user)):
     """
     Update a specific contact by its ID.
     
@@ -75,13 +220,34 @@ def update_contact(contact_id: int, contact: schemas.ContactUpdate, db: Session
     Raises:
     - HTTPException: If the contact is not found or does not belong to the current user.
     """
-    updated_contact = contacts.update_contact(db, contact_id, contact)
-    if updated_contact is None or updated_contact.owner_id != current_user.id:
+    updated_contact = await contacts.update_contact(db, contact_id, contact, current_user.id)
+    if updated_contact is None:
+        raise HTTPException(status_code=404, detail="Contact not found")
+    return updated_contact
+
+@router.patch("/contacts/{contact_id}", response_model=schemas.Contact)
+async def patch_contact(contact_id: int, contact: schemas.ContactPatch, db: AsyncSession = Depends(db.get_db), current_user: models.User = Depends(auth_service.get_current_user)):
+    """
+    Partially update a specific contact by its ID; only the fields given are written.
+    
+    - **contact_id**: ID of the contact to update.
+    - **contact**: JSON body containing the contact fields to change.
+    - **db**: SQLAlchemy database session dependency.
+    - **current_user**: The current authenticated user.
+    
+    Returns:
+    - JSON response with the updated contact details.
+    
+    Raises:
+    - HTTPException: If the contact is not found or does not belong to the current user.
+    """
+    updated_contact = await contacts.update_contact(db, contact_id, contact, current_user.id)
+    if updated_contact is None:
         raise HTTPException(status_code=404, detail="Contact not found")
     return updated_contact
 
 @router.delete("/contacts/{contact_id}", response_model=schemas.Contact)
-def delete_contact(contact_id: int, db: Session = Depends(db.get_db), current_user: models.User = Depends(auth_service.get_current_user)):
+async def delete_contact(contact_id: int, db: AsyncSession = Depends(db.get_db), current_user: models.User = Depends(auth_service.get_current_user)):
     """
     Delete a specific contact by its ID.
     
@@ -95,46 +261,59 @@ def delete_contact(contact_id: int, db: Session = Depends(db.get_db), current_us
     Raises:
     - HTTPException: If the contact is not found or does not belong to the current user.
     """
-    deleted_contact = contacts.delete_contact(db, contact_id)
-    if deleted_contact is None or deleted_contact.owner_id != current_user.id:
+    deleted_contact = await contacts.delete_contact(db, contact_id, current_user.id)
+    if deleted_contact is None:
         raise HTTPException(status_code=404, detail="Contact not found")
     return deleted_contact
 
-@router.get("/search/", response_model=List[schemas.Contact])
-def search_contacts(query: str, db: Session = Depends(db.get_db), current_user: models.User = Depends(auth_service.get_current_user)):
+@router.get("/search/", response_model=Union[List[schemas.Contact], schemas.ContactPage])
+async def search_contacts(request: Request, query: str, limit: int = Query(20, ge=1, le=100), skip: int = 0, pagination: Literal["offset", "cursor"] = "offset", cursor: Optional[str] = None, db: AsyncSession = Depends(db.get_db), current_user: models.User = Depends(auth_service.get_current_user)):
     """
-    Search for contacts by query string in first name, last name, or email.
+    Search for contacts by query string in first name, last name, or email, best matches first.
     
+    Responses are cached and carry an ETag, like the contact list.
+
     - **query**: Search query string.
+    - **limit**: Maximum number of contacts to return (at most 100).
+    - **skip**: Number of results to skip (offset pagination).
+    - **pagination**: "offset" (default) or "cursor".
+    - **cursor**: The next_cursor of the previous page (cursor pagination only).
     - **db**: SQLAlchemy database session dependency.
     - **current_user**: The current authenticated user.
     
     Returns:
-    - JSON response with a list of contacts matching the search criteria.
+    - JSON response with a list of contacts matching the search criteria, or with the
+      contacts and the next_cursor to request the following page (cursor pagination).
+
+    Raises:
+    - HTTPException: If the cursor is invalid.
     """
-    contacts = db.query(models.Contact).filter(
-        models.Contact.first_name.contains(query) |
-        models.Contact.last_name.contains(query) |
-        models.Contact.email.contains(query),
-        models.Contact.owner_id == current_user.id
-    ).all()
-    return contacts
+    paginated = pagination == "cursor" or cursor
+
+    async def results():
+        try:
+            items, next_cursor = await contact_reads.search_contacts(db, current_user.id, query, limit=limit, skip=skip, cursor=cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        return {"items": items, "next_cursor": next_cursor} if paginated else items
+    return await response_cache.cached_response(get_redis(), request, current_user.id, results, CONTACT_RECORD_PAGE if paginated else CONTACT_RECORDS)
 
 @router.get("/birthdays/", response_model=List[schemas.Contact])
-def upcoming_birthdays(db: Session = Depends(db.get_db), current_user: models.User = Depends(auth_service.get_current_user)):
+async def upcoming_birthdays(request: Request, days: int = Query(7, ge=0, le=366), db: AsyncSession = Depends(db.get_db), current_user: models.User = Depends(auth_service.get_current_user)):
     """
-    Retrieve contacts with upcoming birthdays within the next 7 days.
+    Retrieve contacts with upcoming birthdays within the next days, soonest first.
     
+    Responses are cached (per day) and carry an ETag, like the contact list.
+
+    - **days**: Number of days ahead to look (7 by default).
     - **db**: SQLAlchemy database session dependency.
     - **current_user**: The current authenticated user.
     
     Returns:
-    - JSON response with a list of contacts having birthdays within the next 7 days.
-    """
-    today = datetime.today().date()
-    upcoming_date = today + timedelta(days=7)
-    contacts = db.query(models.Contact).filter(
-        models.Contact.birthday.between(today, upcoming_date),
-        models.Contact.owner_id == current_user.id
-    ).all()
-    return contacts
\ No newline at end of file
+    - JSON response with a list of contacts having birthdays from today to today + days.
+    """
+    today = date.today()
+    return await response_cache.cached_response(
+        get_redis(), request, current_user.id,
+        lambda: contact_reads.upcoming_birthdays(db, current_user.id, today, days), CONTACT_RECORDS, today,
+    )
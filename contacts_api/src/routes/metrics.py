@@ -0,0 +1,71 @@
+import asyncio
+import secrets
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
+from redis.exceptions import RedisError
+from src.config import settings
+from src.database.db import engine, async_engine
+from src.database.pool import pool_status
+from src.services import jobs, response_cache, telemetry, user_cache
+from src.services.auth import auth_service
+from src.services.redis_client import get_redis
+
+router = APIRouter(tags=["metrics"])
+
+
+def require_token(authorization: Optional[str] = Header(None)):
+    """
+    Allows the request only if it carries METRICS_TOKEN as a bearer token (Authorization:
+    Bearer <token>, as sent by Prometheus with the authorization option of a scrape config).
+    Without a configured token every request is refused.
+
+    Raises:
+    - HTTPException: 403 otherwise.
+    """
+    scheme, _, token = (authorization or "").partition(" ")
+    expected = settings.METRICS_TOKEN
+    if not (expected and scheme.lower() == "bearer" and secrets.compare_digest(token.strip().encode(), expected.encode())):
+        raise HTTPException(status_code=403, detail="Invalid metrics token")
+
+
+def wants_json(request: Request) -> bool:
+    accept = request.headers.get("accept", "")
+    return "application/json" in accept and "text/plain" not in accept and "openmetrics" not in accept
+
+
+@router.get("/metrics", dependencies=[Depends(require_token)])
+async def metrics(request: Request):
+    """
+    Runtime metrics of the application, for holders of METRICS_TOKEN.
+
+    Prometheus scrapers (and any client not asking for JSON) get the Prometheus metrics of
+    all workers in the text exposition format (or OpenMetrics, if accepted): request
+    latency histograms by route and status, requests in flight, SQL statement and Redis
+    command durations, cache hits and misses, background job, password hashing and email
+    delivery durations (see telemetry).
+
+    Returns:
+    - With Accept: application/json, a JSON snapshot of this worker: the state of the database connection pools: checked-in, checked-out
+      and overflow connections, plus checkout counts, timeouts and the time spent waiting for a connection.
+      It also reports hit/miss counters of the user cache tiers, of the verified token cache
+      and of the contact response cache (with its hit ratio, counting 304 responses as hits),
+      and the depth, latency and outcomes of the background job queue.
+    """
+    if not wants_json(request):
+        # Reading the files of all workers in multiprocess mode is blocking I/O
+        body, content_type = await asyncio.to_thread(telemetry.exposition, request.headers.get("accept"))
+        return Response(body, media_type=content_type)
+    try:
+        queue = await jobs.queue_stats(get_redis())
+    except RedisError as e:
+        queue = {"error": str(e)}
+    return {
+        "database": {
+            "async_pool": pool_status(async_engine.pool),
+            "sync_pool": pool_status(engine.pool),
+        },
+        "user_cache": user_cache.stats(),
+        "token_cache": auth_service.token_cache.stats(),
+        "response_cache": response_cache.stats(),
+        "jobs": queue,
+    }
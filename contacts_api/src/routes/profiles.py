@@ -0,0 +1,49 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import FileResponse
+from src.services import profiling
+
+router = APIRouter(prefix="/profiles", tags=["profiles"])
+
+
+def require_token(x_profile: Optional[str] = Header(None)):
+    """
+    Allows the request only if its X-Profile header holds PROFILING_TOKEN.
+
+    Raises:
+    - HTTPException: 403 otherwise.
+    """
+    if not profiling.token_matches(x_profile):
+        raise HTTPException(status_code=403, detail="Invalid profiling token")
+
+
+@router.get("/", dependencies=[Depends(require_token)])
+async def read_profiles() -> List[dict]:
+    """
+    List the stored request profiles, newest first.
+
+    Returns:
+    - JSON response with the ID, size in bytes and creation time of each profile.
+    """
+    return profiling.list_profiles()
+
+
+@router.get("/{profile_id}", response_class=FileResponse, dependencies=[Depends(require_token)])
+async def read_profile(profile_id: str):
+    """
+    Download a request profile: an HTML report (pyinstrument) or pstats data (cProfile).
+
+    - **profile_id**: ID of the profile, as returned in the X-Profile-Id header of the profiled response.
+
+    Returns:
+    - The profile file.
+
+    Raises:
+    - HTTPException: If the profile does not exist.
+    """
+    try:
+        path = profiling.profile_path(profile_id)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    media_type = "text/html" if path.suffix == ".html" else "application/octet-stream"
+    return FileResponse(path, media_type=media_type, filename=profile_id)
@@ -1,7 +1,11 @@
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, ConfigDict, Field, EmailStr, field_validator
 from datetime import datetime, date
 from fastapi import UploadFile, File
-from typing import Optional
+from typing import List, Literal, Optional
+from typing_extensions import TypedDict
+
+# Maximum number of contacts changed by one batch request
+BATCH_MAX_SIZE = 1000
 
 
 class ContactBase(BaseModel):
@@ -18,11 +22,65 @@ class ContactUpdate(ContactBase):
     pass
 
 class Contact(ContactBase):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    owner_id: int
+
+class ContactPage(BaseModel):
+    items: List[Contact]
+    next_cursor: Optional[str] = None
+
+# Same fields as Contact, for serializing plain dictionaries without validation
+class ContactRecord(TypedDict):
     id: int
+    first_name: str
+    last_name: str
+    email: str
+    phone_number: str
+    birthday: date
     owner_id: int
 
-    class Config:
-        orm_mode = True
+class ContactRecordPage(TypedDict):
+    items: List[ContactRecord]
+    next_cursor: Optional[str]
+
+class ContactPatch(BaseModel):
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    email: Optional[str] = None
+    phone_number: Optional[str] = None
+    birthday: Optional[date] = None
+
+class ContactBatchPatch(ContactPatch):
+    id: int
+
+class ContactBatchUpdate(BaseModel):
+    contacts: List[ContactBatchPatch] = Field(min_length=1, max_length=BATCH_MAX_SIZE)
+
+    @field_validator("contacts")
+    @classmethod
+    def unique_ids(cls, contacts):
+        if len({contact.id for contact in contacts}) < len(contacts):
+            raise ValueError("Each contact id may appear only once")
+        return contacts
+
+class ContactBatchDelete(BaseModel):
+    ids: List[int] = Field(min_length=1, max_length=BATCH_MAX_SIZE)
+
+class ContactBatchOutcome(BaseModel):
+    id: int
+    status: Literal["updated", "deleted", "not_found"]
+    contact: Optional[Contact] = None
+
+class ImportRowError(BaseModel):
+    row: int
+    errors: List[str]
+
+class ImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: List[ImportRowError]
 
 class UserModel(BaseModel):
     username: str = Field(min_length=5, max_length=16)
@@ -31,15 +89,14 @@ class UserModel(BaseModel):
     avatar: Optional[UploadFile] = None
 
 class UserDb(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     username: str
     email: str
     created_at: datetime
     avatar: Optional[UploadFile] = None
 
-    class Config:
-        orm_mode = True
-
 
 class UserResponse(BaseModel):
     user: UserDb
@@ -1,30 +1,81 @@
-from typing import Optional
-import pickle
+from typing import Optional, Tuple
+import asyncio
+import hashlib
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from jose import JWTError, jwt
 from fastapi import HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.config import settings
 from src.database.db import get_db
 from src.repository import users as repository_users
-import redis
+from src.services import user_cache
+from src.services.local_cache import LocalCache
+from src.services.redis_client import get_redis
+from src.services.telemetry import PASSWORD_HASH_DURATION, observe
+
+logger = logging.getLogger(__name__)
+
 
 class Auth:
     """
     Auth class responsible for user authentication, JWT token management, and password handling.
     """
     
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    # The default scheme hashes new passwords; hashes in any other listed scheme are
+    # treated as deprecated and upgraded on the next successful login.
+    pwd_context = CryptContext(
+        schemes=["argon2", "bcrypt"],
+        default=settings.PASSWORD_HASH_SCHEME,
+        deprecated="auto",
+        argon2__time_cost=settings.ARGON2_TIME_COST,
+        argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+        argon2__parallelism=settings.ARGON2_PARALLELISM,
+        bcrypt__rounds=settings.BCRYPT_ROUNDS,
+    )
+    # argon2 and bcrypt release the GIL, so a bounded thread pool runs hashes in parallel
+    # without blocking the event loop.
+    password_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
     SECRET_KEY = settings.SECRET_KEY
     ALGORITHM = settings.ALGORITHM
     oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
-    r = redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, db=0)
+    # Verified claims keyed by the SHA-256 digest of the token, kept until the token expires
+    token_cache = LocalCache(maxsize=settings.TOKEN_CACHE_SIZE, ttl=settings.TOKEN_CACHE_MAX_TTL, name="token")
 
-    def verify_password(self, plain_password, hashed_password):
+    def decode_token(self, token: str) -> dict:
         """
-        Verify a user's password.
+        Decode and verify a JWT, reusing the claims of tokens verified before.
+
+        Claims are cached until the token's expiration time (at most TOKEN_CACHE_MAX_TTL seconds),
+        so a token resent on every request is only signature-checked once per worker.
+        Tokens that fail verification are never cached.
+
+        - **token**: Encoded JWT.
+
+        Returns:
+        - **dict**: The verified claims.
+
+        Raises:
+        - **JWTError**: If the token is invalid or expired.
+        """
+        key = hashlib.sha256(token.encode()).digest()
+        payload = self.token_cache.get(key)
+        if payload is None:
+            payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
+            exp = payload.get("exp")
+            if exp is not None:
+                ttl = min(exp - time.time(), self.token_cache.ttl)
+                if ttl > 0:
+                    self.token_cache.set(key, payload, ttl=ttl)
+        return payload
+
+    async def verify_password(self, plain_password, hashed_password):
+        """
+        Verify a user's password in the password hashing thread pool.
 
         - **plain_password**: Plaintext password.
         - **hashed_password**: Hashed password.
@@ -32,18 +83,36 @@ class Auth:
         Returns:
         - **bool**: True if the password matches, otherwise False.
         """
-        return self.pwd_context.verify(plain_password, hashed_password)
+        loop = asyncio.get_running_loop()
+        with observe(PASSWORD_HASH_DURATION, "verify"):
+            return await loop.run_in_executor(self.password_executor, self.pwd_context.verify, plain_password, hashed_password)
 
-    def get_password_hash(self, password: str):
+    async def verify_and_update_password(self, plain_password, hashed_password) -> Tuple[bool, Optional[str]]:
         """
-        Generate a hash from the user's password.
+        Verify a user's password and rehash it if it uses a deprecated scheme or cost.
+
+        - **plain_password**: Plaintext password.
+        - **hashed_password**: Hashed password.
+
+        Returns:
+        - **tuple**: (True, new hash or None) if the password matches, otherwise (False, None).
+        """
+        loop = asyncio.get_running_loop()
+        with observe(PASSWORD_HASH_DURATION, "verify"):
+            return await loop.run_in_executor(self.password_executor, self.pwd_context.verify_and_update, plain_password, hashed_password)
+
+    async def get_password_hash(self, password: str):
+        """
+        Generate a hash from the user's password in the password hashing thread pool.
 
         - **password**: Plaintext password.
 
         Returns:
         - **str**: Hashed password.
         """
-        return self.pwd_context.hash(password)
+        loop = asyncio.get_running_loop()
+        with observe(PASSWORD_HASH_DURATION, "hash"):
+            return await loop.run_in_executor(self.password_executor, self.pwd_context.hash, password)
 
     async def create_access_token(self, data: dict, expires_delta: Optional[float] = None):
         """
@@ -96,7 +165,7 @@ class Auth:
         - **HTTPException**: If the token is invalid or has an incorrect scope.
         """
         try:
-            payload = jwt.decode(refresh_token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
+            payload = self.decode_token(refresh_token)
             if payload['scope'] == 'refresh_token':
                 email = payload['sub']
                 return email
@@ -104,7 +173,7 @@ class Auth:
         except JWTError:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Could not validate credentials')
 
-    async def get_current_user(self, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    async def get_current_user(self, token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
         """
         Get the currently authenticated user.
 
@@ -112,7 +181,7 @@ class Auth:
         - **db**: Database session.
 
         Returns:
-        - **User**: User object.
+        - **CachedUser**: Lightweight snapshot of the user (id, email, username, confirmed, avatar).
 
         Raises:
         - **HTTPException**: If the token is invalid or the user cannot be found.
@@ -124,7 +193,7 @@ class Auth:
         )
         
         try:
-            payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
+            payload = self.decode_token(token)
             if payload.get('scope') == 'access_token':
                 email = payload.get("sub")
                 if email is None:
@@ -134,16 +203,14 @@ class Auth:
         except JWTError:
             raise credentials_exception
 
-        user = self.r.get(f"user:{email}")
+        r = get_redis()
+        user = await user_cache.get_cached_user(r, email)
         if user is None:
-            user = await repository_users.get_user_by_email(email, db)
-            if user is None:
+            db_user = await repository_users.get_user_by_email(email, db)
+            if db_user is None:
                 raise credentials_exception
-            self.r.set(f"user:{email}", pickle.dumps(user))
-            self.r.expire(f"user:{email}", 900)
-        else:
-            user = pickle.loads(user) if isinstance(user, (bytes, bytearray)) else user
-        
+            user = await user_cache.cache_user(r, db_user)
+
         return user
 
     def create_email_token(self, data: dict):
@@ -174,11 +241,11 @@ class Auth:
         - **HTTPException**: If the token is invalid.
         """
         try:
-            payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
+            payload = self.decode_token(token)
             email = payload["sub"]
             return email
         except JWTError as e:
-            print(e)
+            logger.debug("Invalid email verification token: %s", e)
             raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
                                 detail="Invalid token for email verification")
 
@@ -0,0 +1,287 @@
+"""
+This module implements the avatar pipeline: upload limits, thumbnails and storage.
+
+- Starlette parses and spools the whole multipart body before the endpoint runs, so the
+  size limit is enforced on the raw request by UploadLimitMiddleware: a Content-Length
+  above AVATAR_MAX_BYTES (plus room for the multipart framing) is answered with 413
+  without reading the body, and a body growing past it is cut off with 413 while it is
+  received. read_limited then checks the size of the file itself.
+- The image is decoded, cropped to a square, resized to AVATAR_SIZE pixels and re-encoded
+  as WebP in a process pool, keeping the CPU work off the event loop and the GIL.
+- The thumbnail is written to the AVATAR_STORAGE backend: Cloudinary, the local filesystem
+  or an S3-compatible bucket. The blocking SDK calls run in a thread.
+
+Thumbnails are stored under a key derived from the user ID and their content, so the URL
+is known before the upload, changes whenever the avatar changes (no stale browser caches)
+and re-uploading the same thumbnail is idempotent. The upload endpoint prepares the
+thumbnail and leaves the storage call and the User.avatar update to the "store_avatar" job.
+
+Classes:
+- AvatarError: The upload is not an acceptable avatar.
+- UploadLimitMiddleware: ASGI middleware rejecting oversized upload requests before they are parsed.
+- CloudinaryStorage, LocalStorage, S3Storage: Storage backends.
+
+Functions:
+- read_limited: Reads an upload, enforcing a size limit.
+- make_thumbnail: Turns an uploaded image into a WebP thumbnail in the process pool.
+- avatar_key: Returns the storage key of a thumbnail.
+- get_storage: Returns the configured storage backend.
+- save_avatar: Makes the thumbnail of an upload and stores it.
+- store_avatar: Stores a thumbnail and persists its URL (job "store_avatar").
+"""
+import asyncio
+import base64
+import hashlib
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import ORJSONResponse
+from PIL import Image, ImageOps, UnidentifiedImageError
+from src.config import cloudinary, settings
+from src.database.db import AsyncSessionLocal
+from src.repository import users as repository_users
+from src.services import jobs
+
+CHUNK_SIZE = 64 * 1024
+# Allowance for the multipart boundaries and part headers around the file
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class AvatarError(ValueError):
+    """
+    The upload is too large or is not a readable image.
+    """
+
+
+class UploadLimitMiddleware:
+    """
+    Pure ASGI middleware capping the size of the request body of an upload endpoint, before
+    the body is parsed.
+
+    - **path**: Path of the upload endpoint.
+    - **max_bytes**: Maximum size of the request body (AVATAR_MAX_BYTES plus MULTIPART_OVERHEAD by default).
+    """
+
+    def __init__(self, app, path: str = "/api/upload-avatar/", max_bytes: Optional[int] = None):
+        self.app = app
+        self.path = path
+        self.max_bytes = max_bytes if max_bytes is not None else settings.AVATAR_MAX_BYTES + MULTIPART_OVERHEAD
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] != self.path:
+            await self.app(scope, receive, send)
+            return
+        detail = f"Request body is larger than {self.max_bytes} bytes"
+        for name, value in scope["headers"]:
+            if name == b"content-length" and value.isdigit() and int(value) > self.max_bytes:
+                await ORJSONResponse({"detail": detail}, status_code=413)(scope, receive, send)
+                return
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # Raised while the framework reads the body, answered as a 413
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+async def read_limited(file: UploadFile, max_bytes: int = settings.AVATAR_MAX_BYTES) -> bytes:
+    """
+    Reads an uploaded file chunk by chunk, stopping as soon as it exceeds a size limit.
+
+    Parameters:
+    - file: The uploaded file.
+    - max_bytes: Maximum accepted size in bytes.
+
+    Returns:
+    - The content of the file.
+
+    Raises:
+    - AvatarError: If the file is larger than max_bytes.
+    """
+    chunks, size = [], 0
+    while chunk := await file.read(CHUNK_SIZE):
+        size += len(chunk)
+        if size > max_bytes:
+            raise AvatarError(f"Avatar is larger than {max_bytes} bytes")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def resize_to_webp(data: bytes, size: int, quality: int) -> bytes:
+    """
+    Crops an image to a centered square, resizes it and encodes it as WebP. CPU-bound, runs in the process pool.
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image = ImageOps.exif_transpose(image)
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+            thumbnail = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        raise AvatarError(f"Avatar is not a valid image: {e}") from None
+    output = io.BytesIO()
+    thumbnail.save(output, "WEBP", quality=quality, method=4)
+    return output.getvalue()
+
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=settings.AVATAR_PROCESS_WORKERS)
+    return _process_pool
+
+
+async def make_thumbnail(data: bytes) -> bytes:
+    """
+    Turns an uploaded image into a square WebP thumbnail of AVATAR_SIZE pixels.
+
+    Parameters:
+    - data: Content of the uploaded image.
+
+    Returns:
+    - The WebP thumbnail.
+
+    Raises:
+    - AvatarError: If the data is not a readable image.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_process_pool(), resize_to_webp, data, settings.AVATAR_SIZE, settings.AVATAR_QUALITY)
+
+
+def avatar_key(user_id: int, thumbnail: bytes) -> str:
+    return f"{user_id}-{hashlib.sha256(thumbnail).hexdigest()[:16]}.webp"
+
+
+class CloudinaryStorage:
+    """
+    Stores avatars on Cloudinary under the given folder.
+    """
+
+    def __init__(self, folder: str = "contacts_api/avatars"):
+        self.folder = folder
+
+    def _public_id(self, key: str) -> str:
+        return f"{self.folder}/{key.rsplit('.', 1)[0]}"
+
+    def url(self, key: str) -> str:
+        return cloudinary.CloudinaryImage(self._public_id(key)).build_url(format="webp")
+
+    async def save(self, key: str, data: bytes) -> str:
+        # The Cloudinary SDK is blocking, keep it off the event loop
+        await asyncio.to_thread(cloudinary.uploader.upload, io.BytesIO(data), public_id=self._public_id(key), overwrite=True)
+        return self.url(key)
+
+
+class LocalStorage:
+    """
+    Stores avatars as files in a directory served under base_url.
+    """
+
+    def __init__(self, directory: str, base_url: str):
+        self.directory = Path(directory)
+        self.base_url = base_url.rstrip("/")
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+    def _write(self, key: str, data: bytes) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first so readers never see a partial image
+        temporary = self.directory / f".{key}.{os.getpid()}.tmp"
+        temporary.write_bytes(data)
+        temporary.replace(self.directory / key)
+
+    async def save(self, key: str, data: bytes) -> str:
+        await asyncio.to_thread(self._write, key, data)
+        return self.url(key)
+
+
+class S3Storage:
+    """
+    Stores avatars in an S3-compatible bucket (AWS S3, MinIO, ...). Requires boto3.
+    """
+
+    def __init__(self, bucket: str, public_url: str, endpoint_url: Optional[str] = None, prefix: str = "avatars/"):
+        import boto3
+
+        self.client = boto3.client("s3", endpoint_url=endpoint_url)
+        self.bucket = bucket
+        self.public_url = public_url.rstrip("/")
+        self.prefix = prefix
+
+    def url(self, key: str) -> str:
+        return f"{self.public_url}/{self.prefix}{key}"
+
+    async def save(self, key: str, data: bytes) -> str:
+        await asyncio.to_thread(
+            self.client.put_object,
+            Bucket=self.bucket, Key=f"{self.prefix}{key}", Body=data,
+            ContentType="image/webp", CacheControl="public, max-age=31536000, immutable",
+        )
+        return self.url(key)
+
+
+_storage = None
+
+
+def get_storage():
+    """
+    Returns the storage backend selected by AVATAR_STORAGE, creating it on first use.
+    """
+    global _storage
+    if _storage is None:
+        if settings.AVATAR_STORAGE == "local":
+            _storage = LocalStorage(settings.AVATAR_LOCAL_DIR, settings.AVATAR_LOCAL_URL)
+        elif settings.AVATAR_STORAGE == "s3":
+            _storage = S3Storage(settings.AVATAR_S3_BUCKET, settings.AVATAR_S3_PUBLIC_URL, settings.AVATAR_S3_ENDPOINT_URL)
+        else:
+            _storage = CloudinaryStorage()
+    return _storage
+
+
+async def save_avatar(user_id: int, file: UploadFile, storage=None) -> str:
+    """
+    Makes the thumbnail of an uploaded avatar and stores it.
+
+    Parameters:
+    - user_id: ID of the user.
+    - file: The uploaded image.
+    - storage: Storage backend (the configured one by default).
+
+    Returns:
+    - The URL of the stored thumbnail.
+
+    Raises:
+    - AvatarError: If the upload is too large or not an image.
+    """
+    thumbnail = await make_thumbnail(await read_limited(file))
+    return await (storage or get_storage()).save(avatar_key(user_id, thumbnail), thumbnail)
+
+
+@jobs.job("store_avatar")
+async def store_avatar(email: str, key: str, image: str) -> None:
+    """
+    Stores a thumbnail prepared by the upload endpoint and persists its URL on the user.
+
+    The key depends on the thumbnail content, so retrying the job is safe.
+
+    Parameters:
+    - email: Email address of the user.
+    - key: Storage key of the thumbnail (see avatar_key).
+    - image: The WebP thumbnail, base64-encoded.
+    """
+    url = await get_storage().save(key, base64.b64decode(image))
+    async with AsyncSessionLocal() as db:
+        await repository_users.update_avatar(email, url, db)
@@ -0,0 +1,111 @@
+"""
+This module serializes a user's contacts for export as CSV, NDJSON or vCard 4.0.
+
+export_contacts is an async generator meant for a StreamingResponse: it reads the contacts
+in batches through contacts.stream_contacts and yields one serialized chunk per batch, so
+neither the database result nor the response body is ever held in memory as a whole.
+
+Functions:
+- to_csv: Serializes rows as CSV lines.
+- to_ndjson: Serializes rows as NDJSON lines.
+- to_vcard: Serializes rows as vCard 4.0 cards.
+- export_contacts: Streams the serialized contacts of a user.
+"""
+import csv
+import io
+from typing import AsyncIterator, Callable, Dict, NamedTuple, Sequence
+import orjson
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from src.config import settings
+from src.repository import contacts as repository_contacts
+
+COLUMNS = repository_contacts.EXPORT_COLUMNS
+
+
+def to_csv(rows: Sequence[Row]) -> str:
+    output = io.StringIO()
+    csv.writer(output, lineterminator="\n").writerows(
+        (row.id, row.first_name, row.last_name, row.email, row.phone_number, row.birthday.isoformat() if row.birthday else "")
+        for row in rows
+    )
+    return output.getvalue()
+
+
+def to_ndjson(rows: Sequence[Row]) -> bytes:
+    return b"".join(orjson.dumps(row._asdict()) + b"\n" for row in rows)
+
+
+def vcard_escape(value) -> str:
+    """
+    Escapes a vCard text value (RFC 6350, section 3.4).
+    """
+    return (
+        str(value or "").replace("\\", "\\\\").replace(",", "\\,").replace(";", "\\;")
+        .replace("\r\n", "\\n").replace("\n", "\\n")
+    )
+
+
+def to_vcard(rows: Sequence[Row]) -> str:
+    cards = []
+    for row in rows:
+        first_name, last_name = vcard_escape(row.first_name), vcard_escape(row.last_name)
+        lines = [
+            "BEGIN:VCARD",
+            "VERSION:4.0",
+            f"UID:urn:contacts-api:contact:{row.id}",
+            f"FN:{first_name} {last_name}".rstrip(),
+            f"N:{last_name};{first_name};;;",
+        ]
+        if row.email:
+            lines.append(f"EMAIL:{vcard_escape(row.email)}")
+        if row.phone_number:
+            lines.append(f"TEL;VALUE=uri:tel:{vcard_escape(row.phone_number)}")
+        if row.birthday:
+            lines.append(f"BDAY:{row.birthday:%Y%m%d}")
+        lines.append("END:VCARD")
+        cards.append("\r\n".join(lines) + "\r\n")
+    return "".join(cards)
+
+
+class ExportFormat(NamedTuple):
+    media_type: str
+    extension: str
+    header: str
+    serialize: Callable[[Sequence[Row]], object]
+
+
+FORMATS: Dict[str, ExportFormat] = {
+    "csv": ExportFormat("text/csv", "csv", ",".join(COLUMNS) + "\n", to_csv),
+    "ndjson": ExportFormat("application/x-ndjson", "ndjson", "", to_ndjson),
+    "vcard": ExportFormat("text/vcard", "vcf", "", to_vcard),
+}
+
+
+async def export_contacts(
+    session_factory: async_sessionmaker,
+    user_id: int,
+    format: str,
+    batch_size: int = settings.EXPORT_BATCH_SIZE,
+) -> AsyncIterator:
+    """
+    Streams the contacts of a user serialized in an export format, one chunk per batch.
+
+    The generator opens its own database session, since it keeps running after the
+    request handler (and its session dependency) returned.
+
+    Parameters:
+    - session_factory: Factory of database sessions.
+    - user_id: ID of the user whose contacts are exported.
+    - format: One of the FORMATS keys.
+    - batch_size: Number of contacts read and serialized at a time.
+
+    Returns:
+    - An async iterator of str or bytes chunks.
+    """
+    export_format = FORMATS[format]
+    if export_format.header:
+        yield export_format.header
+    async with session_factory() as db:
+        async for batch in repository_contacts.stream_contacts(db, user_id, batch_size):
+            yield export_format.serialize(batch)
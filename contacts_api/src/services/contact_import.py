@@ -0,0 +1,258 @@
+"""
+This module imports contacts in bulk from a streamed CSV or NDJSON request body.
+
+The body is decoded and parsed incrementally, each chunk being scanned once. Lines longer
+than MAX_LINE and CSV records longer than MAX_RECORD characters are dropped and reported
+as row errors, and bodies larger than IMPORT_MAX_BYTES are rejected, so memory use stays
+bounded whatever the client sends.
+Rows are validated in chunks of IMPORT_CHUNK_SIZE with a single pydantic TypeAdapter call
+per chunk and the valid ones are written with one batched INSERT (COPY on PostgreSQL
+with asyncpg) per chunk.
+
+Each chunk is committed on its own, together with the reservation of its rows in the
+per-user contact quota (the conditional UPDATE of reserve_contacts), so the user row is
+only locked while a chunk is written, never while the client uploads the rest of the
+body. The quota cannot be overshot by concurrent imports or creations; rows beyond it are
+reported as errors instead of being inserted. If the upload breaks off, the chunks
+committed before stay imported.
+
+Classes:
+- BodyTooLarge: The request body is larger than IMPORT_MAX_BYTES.
+
+Functions:
+- iter_lines: Splits a stream of bytes into lines.
+- iter_csv_rows: Parses CSV lines (with a header row) into dictionaries.
+- iter_ndjson_rows: Parses NDJSON lines into dictionaries.
+- import_contacts: Validates and inserts rows, reporting per-row errors.
+"""
+import codecs
+import csv
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import orjson
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from src import schemas
+from src.config import settings
+from src.repository import contacts as repository_contacts
+
+QUOTA_EXCEEDED = "Contact quota exceeded"
+
+MAX_LINE = 64 * 1024
+MAX_RECORD = 256 * 1024
+LINE_TOO_LONG = f"Line longer than {MAX_LINE} characters"
+
+contacts_adapter = TypeAdapter(List[schemas.ContactCreate])
+
+
+class BodyTooLarge(ValueError):
+    """
+    The request body is larger than IMPORT_MAX_BYTES.
+    """
+
+
+async def iter_lines(
+    chunks: AsyncIterator[bytes],
+    encoding: str = "utf-8",
+    max_line: int = MAX_LINE,
+    max_bytes: Optional[int] = None,
+) -> AsyncIterator[Optional[str]]:
+    """
+    Splits a stream of bytes into lines, without their line terminator.
+
+    Only the newly received chunk is searched for line breaks. Lines longer than max_line
+    characters are dropped as they are received and yielded as None, for the parsers to
+    report them as row errors.
+
+    Parameters:
+    - chunks: The stream, e.g. Request.stream().
+    - encoding: Text encoding of the stream.
+    - max_line: Maximum length of a line in characters.
+    - max_bytes: Maximum size of the stream in bytes, unlimited if None.
+
+    Returns:
+    - An async iterator of lines (None for the lines that are too long).
+
+    Raises:
+    - BodyTooLarge: If the stream is larger than max_bytes.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    parts: List[str] = []
+    length, received, too_long = 0, 0, False
+    async for chunk in chunks:
+        received += len(chunk)
+        if max_bytes is not None and received > max_bytes:
+            raise BodyTooLarge(f"Request body is larger than {max_bytes} bytes")
+        *lines, rest = decoder.decode(chunk).split("\n")
+        for line in lines:
+            if too_long or length + len(line) > max_line:
+                yield None
+            else:
+                parts.append(line)
+                yield "".join(parts).rstrip("\r")
+            parts, length, too_long = [], 0, False
+        if not too_long:
+            parts.append(rest)
+            length += len(rest)
+            if length > max_line:
+                parts, too_long = [], True
+    rest = decoder.decode(b"", final=True)
+    if too_long or length + len(rest) > max_line:
+        yield None
+    elif length or rest:
+        parts.append(rest)
+        yield "".join(parts).rstrip("\r")
+
+
+async def iter_csv_rows(lines: AsyncIterator[Optional[str]], max_record: int = MAX_RECORD) -> AsyncIterator[Any]:
+    """
+    Parses CSV lines into dictionaries keyed by the header row.
+
+    Quoted fields may span several lines: lines are joined until the quotes are balanced,
+    counting the quotes of each line once. Records longer than max_record characters,
+    records with a line that is too long and records with another number of fields than
+    the header are yielded as error strings.
+
+    Parameters:
+    - lines: An async iterator of lines, e.g. from iter_lines.
+    - max_record: Maximum length of a record in characters.
+
+    Returns:
+    - An async iterator of dictionaries (or error strings), one per data row.
+    """
+    header = None
+    record: List[str] = []
+    length, open_quote, error = 0, False, None
+    async for line in lines:
+        if line is None:
+            # The quotes of a dropped line are unknown: the record ends here
+            yield error or LINE_TOO_LONG
+            record, length, open_quote, error = [], 0, False, None
+            continue
+        open_quote ^= line.count('"') % 2 == 1
+        length += len(line) + 1
+        if error is None and length > max_record:
+            record, error = [], f"Record longer than {max_record} characters"
+        if error is None:
+            record.append(line)
+        if open_quote:
+            continue
+        if error is not None:
+            yield error
+        elif any(part.strip() for part in record):
+            fields = next(csv.reader(["\n".join(record)]))
+            if header is None:
+                header = [name.strip() for name in fields]
+            elif len(fields) != len(header):
+                yield f"Expected {len(header)} fields, got {len(fields)}"
+            else:
+                yield dict(zip(header, fields))
+        record, length, error = [], 0, None
+    if open_quote:
+        yield error or "Unterminated quoted field"
+
+
+async def iter_ndjson_rows(lines: AsyncIterator[Optional[str]]) -> AsyncIterator[Any]:
+    """
+    Parses NDJSON lines (one JSON object per line) into dictionaries.
+
+    Parameters:
+    - lines: An async iterator of lines, e.g. from iter_lines.
+
+    Returns:
+    - An async iterator of dictionaries (or error strings for invalid JSON and lines that are
+      too long), one per non-empty line.
+    """
+    async for line in lines:
+        if line is None:
+            yield LINE_TOO_LONG
+            continue
+        if not line.strip():
+            continue
+        try:
+            yield orjson.loads(line)
+        except orjson.JSONDecodeError as e:
+            yield f"Invalid JSON: {e}"
+
+
+def validate_chunk(rows: List[Any]) -> Tuple[List[Tuple[int, dict]], Dict[int, List[str]]]:
+    """
+    Validates a chunk of rows with ContactCreate.
+
+    Returns:
+    - A tuple of the (index, values) of the valid rows and of the error messages of the
+      invalid ones, by index in the chunk.
+    """
+    errors: Dict[int, List[str]] = {}
+    for index, row in enumerate(rows):
+        if isinstance(row, str):
+            errors[index] = [row]
+    candidates = [(index, row) for index, row in enumerate(rows) if index not in errors]
+    try:
+        contacts = contacts_adapter.validate_python([row for _, row in candidates])
+    except ValidationError as e:
+        for error in e.errors(include_url=False):
+            index = candidates[error["loc"][0]][0]
+            field = ".".join(str(part) for part in error["loc"][1:])
+            errors.setdefault(index, []).append(f"{field}: {error['msg']}" if field else error["msg"])
+        # Only the rows without errors are left, so the second pass cannot fail
+        candidates = [(index, row) for index, row in candidates if index not in errors]
+        contacts = contacts_adapter.validate_python([row for _, row in candidates])
+    return [(index, contact.model_dump()) for (index, _), contact in zip(candidates, contacts)], errors
+
+
+async def import_contacts(
+    db: AsyncSession,
+    user_id: int,
+    rows: AsyncIterator[Any],
+    quota: int = settings.CONTACTS_QUOTA,
+    chunk_size: int = settings.IMPORT_CHUNK_SIZE,
+    max_errors: int = settings.IMPORT_MAX_ERRORS,
+) -> dict:
+    """
+    Validates rows and inserts the valid ones as contacts of a user, within the contact quota.
+
+    Parameters:
+    - db: Database session; every chunk is committed.
+    - user_id: ID of the user the contacts are imported for.
+    - rows: An async iterator of row dictionaries (or error strings), e.g. from iter_csv_rows.
+    - quota: Maximum number of contacts of users without a quota of their own.
+    - chunk_size: Number of rows validated and inserted at a time.
+    - max_errors: Maximum number of row errors listed in the result.
+
+    Returns:
+    - A dictionary with the numbers of imported and failed rows and the list of row errors
+      (1-based row number and messages).
+    """
+    result = {"imported": 0, "failed": 0, "errors": []}
+    row_number = 0
+
+    async def flush(chunk):
+        valid, errors = validate_chunk(chunk)
+        accepted = valid[:await repository_contacts.reserve_contacts_up_to(db, user_id, len(valid), quota)]
+        for index, _ in valid[len(accepted):]:
+            errors[index] = [QUOTA_EXCEEDED]
+        await repository_contacts.insert_contacts(db, user_id, [values for _, values in accepted])
+        await db.commit()
+        result["imported"] += len(accepted)
+        result["failed"] += len(errors)
+        first_row = row_number - len(chunk) + 1
+        for index in sorted(errors):
+            if len(result["errors"]) >= max_errors:
+                break
+            result["errors"].append({"row": first_row + index, "errors": errors[index]})
+
+    chunk = []
+    try:
+        async for row in rows:
+            chunk.append(row)
+            row_number += 1
+            if len(chunk) >= chunk_size:
+                await flush(chunk)
+                chunk = []
+        if chunk:
+            await flush(chunk)
+    finally:
+        # Also after a broken upload, for the chunks already committed
+        if result["imported"]:
+            await repository_contacts.contacts_changed(user_id)
+    return result
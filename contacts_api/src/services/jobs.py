@@ -0,0 +1,304 @@
+"""
+This module implements a durable background job queue on a Redis stream.
+
+Request handlers enqueue jobs with enqueue (XADD) instead of running them in the request
+worker; separate worker processes (python worker.py) on any number of nodes read them
+through one consumer group (XREADGROUP), so every job is handed to a single worker.
+
+Delivery is at least once: a job is acknowledged (XACK) and deleted only after its handler
+returned. Jobs of a worker that died are left pending and are claimed by another worker
+(XAUTOCLAIM) once they have been idle for JOBS_CLAIM_IDLE_MS. A failed job is retried
+with its attempt count increased after an exponential backoff (JOBS_RETRY_BACKOFF_MS,
+doubled after every failure up to JOBS_RETRY_MAX_BACKOFF_MS): it waits in a sorted set
+scored by its due time, from which workers move due jobs back to the stream. After
+JOBS_MAX_ATTEMPTS attempts it is moved to the dead-letter stream together with the last
+error. Handlers must therefore be idempotent.
+
+Workers count processed, retried and dead-lettered jobs and the total latency (from
+enqueueing to completion) in a Redis hash, so queue_stats can report them next to the
+queue depth and the age of the oldest waiting job.
+
+Workers read with XREADGROUP BLOCK JOBS_BLOCK_MS, so they use a client of their own
+(create_worker_client) whose socket timeout outlasts the block; on the shared pool an idle
+queue would make every read time out.
+
+Functions:
+- retry_delay_ms: Returns the backoff before the next attempt of a failed job.
+- create_worker_client: Creates the Redis client of a worker.
+- job: Registers a coroutine function as the handler of a job name.
+- enqueue: Adds a job to the queue.
+- queue_stats: Returns depth, latency and outcome counters of the queue.
+
+Classes:
+- Worker: Consumes and runs jobs.
+"""
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Optional
+import orjson
+import redis.asyncio as redis
+from redis.exceptions import RedisError, ResponseError
+from src.config import settings
+from src.services.redis_client import create_client
+from src.services.telemetry import TASK_DURATION
+
+logger = logging.getLogger(__name__)
+
+STREAM = "jobs"
+GROUP = "workers"
+DEAD_LETTER_STREAM = "jobs:dead"
+DELAYED_KEY = "jobs:delayed"
+STATS_KEY = "jobs:stats"
+
+handlers: Dict[str, Callable[..., Awaitable]] = {}
+
+
+# Moves the due jobs of the delayed set back to the stream, atomically so that a job is
+# neither lost nor re-queued twice by concurrent workers. Members are JSON arrays of the
+# failed entry ID (keeping them unique) and the job's fields as a flat list.
+# KEYS: delayed set, stream. ARGV: now (ms), maximum number of jobs moved.
+# Returns the number of jobs moved and the due time of the next delayed job (-1 if none).
+PROMOTE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+for _, member in ipairs(due) do
+    redis.call('XADD', KEYS[2], '*', unpack(cjson.decode(member)[2]))
+    redis.call('ZREM', KEYS[1], member)
+end
+local next_job = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+return {#due, next_job[2] and tonumber(next_job[2]) or -1}
+"""
+
+
+def retry_delay_ms(attempts: int, base_ms: int = settings.JOBS_RETRY_BACKOFF_MS, max_ms: int = settings.JOBS_RETRY_MAX_BACKOFF_MS) -> int:
+    """
+    Returns how long a job waits before its next attempt after failing attempts times:
+    base_ms, doubled after every further failure, at most max_ms.
+    """
+    return min(base_ms * 2 ** max(attempts - 1, 0), max_ms)
+
+
+def create_worker_client(block_ms: int = settings.JOBS_BLOCK_MS) -> redis.Redis:
+    """
+    Creates a Redis client for a worker, with a socket timeout of REDIS_SOCKET_TIMEOUT on
+    top of the time its reads block waiting for jobs.
+
+    Parameters:
+    - block_ms: How long the worker's reads block, in milliseconds.
+
+    Returns:
+    - A redis.asyncio.Redis client with its own connection pool.
+    """
+    return create_client(socket_timeout=block_ms / 1000 + settings.REDIS_SOCKET_TIMEOUT)
+
+
+def job(name: str):
+    """
+    Registers the decorated coroutine function as the handler of the jobs called name.
+
+    The function is called with the keyword arguments given to enqueue and is returned unchanged.
+    """
+    def register(func):
+        handlers[name] = func
+        return func
+    return register
+
+
+async def enqueue(r: redis.Redis, name: str, **kwargs) -> str:
+    """
+    Adds a job to the queue.
+
+    Parameters:
+    - r: Asynchronous Redis client.
+    - name: Name of the job, as registered with job.
+    - kwargs: JSON-serializable arguments of the handler.
+
+    Returns:
+    - The ID of the stream entry.
+    """
+    entry_id = await r.xadd(STREAM, {
+        "name": name,
+        "kwargs": orjson.dumps(kwargs),
+        "attempts": 0,
+        "enqueued_at": int(time.time() * 1000),
+    })
+    return entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+
+
+def _decode(fields: dict) -> dict:
+    return {
+        (key.decode() if isinstance(key, bytes) else key): (value.decode() if isinstance(value, bytes) else value)
+        for key, value in fields.items()
+    }
+
+
+class Worker:
+    """
+    Reads jobs of the consumer group and runs their handlers.
+
+    - **r**: Asynchronous Redis client.
+    - **consumer**: Name of this worker in the consumer group; must be unique per process.
+    - **batch_size**: Maximum number of jobs read, and run concurrently, at a time.
+    - **block_ms**: How long a read waits for new jobs.
+    - **claim_idle_ms**: Jobs delivered to a worker and not acknowledged for this long are taken over.
+    - **max_attempts**: Number of attempts after which a job is dead-lettered.
+    - **retry_backoff_ms**: Delay before the first retry of a failed job, doubled for every further one.
+    - **max_retry_backoff_ms**: Longest delay before a retry.
+    """
+
+    def __init__(
+        self,
+        r: redis.Redis,
+        consumer: str,
+        batch_size: int = settings.JOBS_BATCH_SIZE,
+        block_ms: int = settings.JOBS_BLOCK_MS,
+        claim_idle_ms: int = settings.JOBS_CLAIM_IDLE_MS,
+        max_attempts: int = settings.JOBS_MAX_ATTEMPTS,
+        retry_backoff_ms: int = settings.JOBS_RETRY_BACKOFF_MS,
+        max_retry_backoff_ms: int = settings.JOBS_RETRY_MAX_BACKOFF_MS,
+    ):
+        self.r = r
+        self.consumer = consumer
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+        self.claim_idle_ms = claim_idle_ms
+        self.max_attempts = max_attempts
+        self.retry_backoff_ms = retry_backoff_ms
+        self.max_retry_backoff_ms = max_retry_backoff_ms
+        self.promote = r.register_script(PROMOTE_SCRIPT)
+
+    async def ensure_group(self) -> None:
+        """
+        Creates the stream and the consumer group if they do not exist yet.
+        """
+        try:
+            await self.r.xgroup_create(STREAM, GROUP, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def run_once(self) -> int:
+        """
+        Runs the jobs abandoned by dead workers, then the next batch of new jobs and due retries.
+
+        Returns:
+        - The number of jobs handled.
+        """
+        now_ms = int(time.time() * 1000)
+        _, next_due_ms = await self.promote(keys=[DELAYED_KEY, STREAM], args=[now_ms, self.batch_size])
+        _, claimed, _ = await self.r.xautoclaim(
+            STREAM, GROUP, self.consumer, min_idle_time=self.claim_idle_ms, start_id="0-0", count=self.batch_size,
+        )
+        entries = [(entry_id, fields, True) for entry_id, fields in claimed if fields]
+        if not entries:
+            # Wake up in time for the next delayed retry
+            block_ms = self.block_ms if next_due_ms < 0 else max(1, min(self.block_ms, next_due_ms - now_ms))
+            response = await self.r.xreadgroup(GROUP, self.consumer, {STREAM: ">"}, count=self.batch_size, block=block_ms)
+            entries = [(entry_id, fields, False) for _, messages in response or [] for entry_id, fields in messages]
+        await asyncio.gather(*(self._handle(*entry) for entry in entries))
+        return len(entries)
+
+    async def run(self, retry_delay: float = 1.0) -> None:
+        """
+        Handles jobs until cancelled.
+
+        Parameters:
+        - retry_delay: Seconds to wait before reading again after a Redis error.
+        """
+        await self.ensure_group()
+        while True:
+            try:
+                await self.run_once()
+            except RedisError as e:
+                logger.warning("Job worker %s lost Redis: %s", self.consumer, e)
+                await asyncio.sleep(retry_delay)
+
+    async def _handle(self, entry_id, fields: dict, claimed: bool) -> None:
+        job_fields = _decode(fields)
+        attempts = int(job_fields["attempts"])
+        if claimed:
+            # The previous worker died while running the job: that delivery counts as an attempt
+            [pending] = await self.r.xpending_range(STREAM, GROUP, min=entry_id, max=entry_id, count=1)
+            attempts = max(attempts, pending["times_delivered"] - 1)
+        if attempts >= self.max_attempts:
+            await self._finish(entry_id, "dead_lettered", job_fields, error="Worker died while running the job")
+            return
+        handler = handlers.get(job_fields["name"])
+        started = time.perf_counter()
+        try:
+            if handler is None:
+                raise LookupError(f"No handler for job {job_fields['name']!r}")
+            await handler(**orjson.loads(job_fields["kwargs"]))
+        except Exception as e:
+            # Unknown job names are not used as label values
+            TASK_DURATION.labels(job_fields["name"] if handler else "unknown", "failed").observe(time.perf_counter() - started)
+            logger.exception("Job %s (%s) failed", entry_id, job_fields["name"])
+            job_fields["attempts"] = attempts + 1
+            if job_fields["attempts"] >= self.max_attempts:
+                await self._finish(entry_id, "dead_lettered", job_fields, error=repr(e))
+            else:
+                await self._finish(entry_id, "retried", job_fields)
+            return
+        TASK_DURATION.labels(job_fields["name"], "processed").observe(time.perf_counter() - started)
+        await self._finish(entry_id, "processed", job_fields)
+
+    async def _finish(self, entry_id, outcome: str, job_fields: dict, error: Optional[str] = None) -> None:
+        # Acknowledge the entry and record its outcome atomically, so a crash in
+        # between can neither lose the job nor run its follow-up twice
+        async with self.r.pipeline(transaction=True) as pipe:
+            if outcome == "retried":
+                due_ms = int(time.time() * 1000) + retry_delay_ms(job_fields["attempts"], self.retry_backoff_ms, self.max_retry_backoff_ms)
+                entry = entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+                flat = [str(item) for field in job_fields.items() for item in field]
+                pipe.zadd(DELAYED_KEY, {orjson.dumps([entry, flat]): due_ms})
+            elif outcome == "dead_lettered":
+                pipe.xadd(DEAD_LETTER_STREAM, dict(job_fields, error=error, failed_at=int(time.time() * 1000)))
+            pipe.xack(STREAM, GROUP, entry_id)
+            pipe.xdel(STREAM, entry_id)
+            pipe.hincrby(STATS_KEY, outcome, 1)
+            if outcome == "processed":
+                pipe.hincrby(STATS_KEY, "latency_ms_total", int(time.time() * 1000) - int(job_fields["enqueued_at"]))
+            await pipe.execute()
+
+
+async def queue_stats(r: redis.Redis) -> dict:
+    """
+    Returns the state of the queue.
+
+    Parameters:
+    - r: Asynchronous Redis client.
+
+    Returns:
+    - A dictionary with the number of unfinished jobs (depth, waiting or running), of jobs
+      being run (pending), of failed jobs waiting for a retry (delayed), of dead-lettered jobs, the age of the oldest unfinished job in seconds, and the counts of
+      processed, retried and dead-lettered attempts with the mean latency of processed jobs.
+    """
+    async with r.pipeline(transaction=False) as pipe:
+        pipe.xlen(STREAM)
+        pipe.xlen(DEAD_LETTER_STREAM)
+        pipe.xrange(STREAM, "-", "+", count=1)
+        pipe.hgetall(STATS_KEY)
+        pipe.zcard(DELAYED_KEY)
+        depth, dead, oldest, counters, delayed = await pipe.execute()
+    try:
+        pending = (await r.xpending(STREAM, GROUP))["pending"]
+    except ResponseError:
+        # No worker has created the consumer group yet
+        pending = 0
+    counters = {key: int(value) for key, value in _decode(counters).items()}
+    processed = counters.get("processed", 0)
+    oldest_age = 0.0
+    if oldest:
+        oldest_id = oldest[0][0].decode() if isinstance(oldest[0][0], bytes) else oldest[0][0]
+        oldest_age = max(0.0, time.time() - int(oldest_id.split("-")[0]) / 1000)
+    return {
+        "depth": depth,
+        "pending": pending,
+        "delayed": delayed,
+        "dead_letter": dead,
+        "oldest_age_seconds": round(oldest_age, 3),
+        "processed": processed,
+        "retried": counters.get("retried", 0),
+        "dead_lettered": counters.get("dead_lettered", 0),
+        "mean_latency_ms": round(counters.get("latency_ms_total", 0) / processed, 1) if processed else 0.0,
+    }
@@ -0,0 +1,85 @@
+"""
+This module provides a small in-process cache used in front of slower lookups.
+
+LocalCache is a bounded LRU mapping whose entries expire after a TTL. It is meant to be
+used from the event loop of a single worker and keeps hit/miss counters for the metrics
+endpoint; named caches also count them in Prometheus (cache_requests_total).
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+from src.services.telemetry import CACHE_REQUESTS
+
+
+class LocalCache:
+    """
+    Bounded LRU cache with per-entry expiry and hit/miss counters.
+
+    - **maxsize**: Maximum number of entries; the least recently used entry is evicted first.
+    - **ttl**: Default time to live of an entry in seconds.
+    - **name**: Value of the cache label of the Prometheus counters; unnamed caches are not exported.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, name: Optional[str] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._hit_counter = CACHE_REQUESTS.labels(name, "hit") if name else None
+        self._miss_counter = CACHE_REQUESTS.labels(name, "miss") if name else None
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Returns the value stored under key, or None if it is missing or expired.
+        """
+        entry = self._data.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                if self._hit_counter:
+                    self._hit_counter.inc()
+                return value
+            del self._data[key]
+        self.misses += 1
+        if self._miss_counter:
+            self._miss_counter.inc()
+        return None
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Stores value under key for ttl seconds (the cache default if not given).
+        """
+        if self.maxsize <= 0:
+            return
+        self._data[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable) -> None:
+        """
+        Removes key from the cache if present.
+        """
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
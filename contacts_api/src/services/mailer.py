@@ -0,0 +1,276 @@
+"""
+This module sends email through a pool of reusable SMTP connections.
+
+FastMail opens a new SMTP connection (TCP + TLS handshake + login) for every message.
+SMTPPool instead keeps up to MAIL_POOL_SIZE authenticated connections open and hands them
+out to senders; connections dropped by the server or idle for longer than MAIL_IDLE_TIMEOUT
+are replaced transparently.
+
+Mailer renders Jinja templates, which are compiled on first use and cached by the template
+environment, sends single messages with retries and exponential backoff on transient
+errors, and sends batches concurrently, one message per pooled connection at a time.
+
+Classes:
+- SMTPPool: Pool of connected SMTP clients.
+- Mailer: Renders and sends messages through an SMTPPool.
+"""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from email.message import EmailMessage
+from pathlib import Path
+from typing import AsyncIterable, Iterable, List, Optional, Tuple
+import aiosmtplib
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from src.config import settings
+from src.services.telemetry import EMAIL_SEND_DURATION
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_FOLDER = Path(__file__).parent / "templates"
+
+
+def is_transient(error: Exception) -> bool:
+    """
+    Tells whether sending can be retried after an error: lost or refused connections,
+    timeouts and 4xx replies are transient, 5xx replies are permanent.
+    """
+    if isinstance(error, aiosmtplib.SMTPResponseException):
+        return 400 <= error.code < 500
+    return isinstance(error, (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPTimeoutError, OSError))
+
+
+class SMTPPool:
+    """
+    Pool of connected (and logged in) SMTP clients.
+
+    - **hostname**, **port**: Address of the SMTP server.
+    - **username**, **password**: Credentials, or None for servers without authentication.
+    - **use_tls**: Connect over TLS (SMTPS); **start_tls**: upgrade a plain connection with STARTTLS.
+    - **timeout**: Timeout of SMTP operations in seconds.
+    - **size**: Maximum number of open connections, and so of messages sent at the same time.
+    - **idle_timeout**: Connections unused for longer than this are closed instead of reused.
+    """
+
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: bool = True,
+        start_tls: bool = False,
+        timeout: float = 10.0,
+        size: int = 4,
+        idle_timeout: float = 60.0,
+    ):
+        self.options = dict(
+            hostname=hostname, port=port, username=username, password=password,
+            use_tls=use_tls, start_tls=start_tls, timeout=timeout,
+        )
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self._semaphore = asyncio.Semaphore(size)
+        self._idle: List[Tuple[aiosmtplib.SMTP, float]] = []
+        self.connects = 0
+
+    @asynccontextmanager
+    async def connection(self):
+        """
+        Lends a connected SMTP client; waits while all connections are in use.
+        """
+        async with self._semaphore:
+            client = await self._checkout()
+            try:
+                yield client
+            except Exception as e:
+                # A refused message leaves the session usable, anything else may not
+                if isinstance(e, aiosmtplib.SMTPResponseException) and client.is_connected:
+                    self._idle.append((client, time.monotonic()))
+                else:
+                    await self._discard(client)
+                raise
+            self._idle.append((client, time.monotonic()))
+
+    async def _checkout(self) -> aiosmtplib.SMTP:
+        while self._idle:
+            client, last_used = self._idle.pop()
+            if client.is_connected and time.monotonic() - last_used < self.idle_timeout:
+                return client
+            await self._discard(client)
+        client = aiosmtplib.SMTP(**self.options)
+        await client.connect()
+        self.connects += 1
+        return client
+
+    async def _discard(self, client: aiosmtplib.SMTP) -> None:
+        if client.is_connected:
+            try:
+                await client.quit()
+            except (aiosmtplib.SMTPException, OSError):
+                client.close()
+
+    async def close(self) -> None:
+        """
+        Closes all idle connections.
+        """
+        idle, self._idle = self._idle, []
+        for client, _ in idle:
+            await self._discard(client)
+
+
+class Mailer:
+    """
+    Renders and sends messages through an SMTPPool.
+
+    - **pool**: The SMTPPool to send through.
+    - **sender**: Address used in the From header.
+    - **template_folder**: Folder of the Jinja templates.
+    - **max_retries**: Number of retries of a message after a transient error.
+    - **retry_backoff**: Delay before the first retry in seconds, doubled on each retry.
+    - **batch_size**: Number of messages read ahead and sent concurrently by send_stream.
+    """
+
+    def __init__(
+        self,
+        pool: SMTPPool,
+        sender: str,
+        template_folder: Path = TEMPLATE_FOLDER,
+        max_retries: int = 3,
+        retry_backoff: float = 0.5,
+        batch_size: int = 100,
+    ):
+        self.pool = pool
+        self.sender = sender
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.batch_size = batch_size
+        # Templates are compiled once and kept in the environment's cache
+        self.templates = Environment(loader=FileSystemLoader(template_folder), autoescape=select_autoescape(), auto_reload=False)
+        self.stats = {"sent": 0, "failed": 0, "retries": 0}
+
+    def message(self, recipient: str, subject: str, template_name: str, **context) -> EmailMessage:
+        """
+        Builds an HTML message from a template.
+
+        Parameters:
+        - recipient: Email address of the recipient.
+        - subject: Subject of the message.
+        - template_name: File name of the template in the template folder.
+        - context: Variables passed to the template.
+
+        Returns:
+        - The message.
+        """
+        message = EmailMessage()
+        message["From"] = self.sender
+        message["To"] = recipient
+        message["Subject"] = subject
+        message.set_content(self.templates.get_template(template_name).render(**context), subtype="html")
+        return message
+
+    async def send(self, message: EmailMessage) -> None:
+        """
+        Sends a message, retrying transient errors with exponential backoff.
+
+        Parameters:
+        - message: The message to send.
+
+        Raises:
+        - aiosmtplib.SMTPException or OSError: If the message could not be sent.
+        """
+        attempt = 0
+        started = time.perf_counter()
+        while True:
+            try:
+                async with self.pool.connection() as client:
+                    await client.send_message(message)
+                self.stats["sent"] += 1
+                EMAIL_SEND_DURATION.labels("sent").observe(time.perf_counter() - started)
+                return
+            except (aiosmtplib.SMTPException, OSError) as e:
+                if attempt >= self.max_retries or not is_transient(e):
+                    self.stats["failed"] += 1
+                    EMAIL_SEND_DURATION.labels("failed").observe(time.perf_counter() - started)
+                    raise
+                self.stats["retries"] += 1
+                # Back off without holding a pooled connection
+                await asyncio.sleep(self.retry_backoff * 2 ** attempt)
+                attempt += 1
+
+    async def send_batch(self, messages: Iterable[EmailMessage]) -> List[Optional[Exception]]:
+        """
+        Sends messages concurrently, at most one per pooled connection at a time.
+
+        Parameters:
+        - messages: The messages to send.
+
+        Returns:
+        - For each message, None if it was sent or the error it failed with.
+        """
+        messages = list(messages)
+        results = await asyncio.gather(*(self.send(message) for message in messages), return_exceptions=True)
+        for message, result in zip(messages, results):
+            if result is not None:
+                logger.warning("Could not send %r to %s: %s", message["Subject"], message["To"], result)
+        return results
+
+    async def send_stream(self, messages: AsyncIterable[EmailMessage]) -> Tuple[int, int]:
+        """
+        Sends messages produced by an async iterator in batches of batch_size.
+
+        Parameters:
+        - messages: The messages to send.
+
+        Returns:
+        - A tuple of the numbers of sent and failed messages.
+        """
+        sent = failed = 0
+        batch = []
+
+        async def flush():
+            nonlocal sent, failed
+            results = await self.send_batch(batch)
+            errors = sum(result is not None for result in results)
+            sent += len(results) - errors
+            failed += errors
+            batch.clear()
+
+        async for message in messages:
+            batch.append(message)
+            if len(batch) >= self.batch_size:
+                await flush()
+        if batch:
+            await flush()
+        return sent, failed
+
+    async def close(self) -> None:
+        await self.pool.close()
+
+
+def create_mailer() -> Mailer:
+    """
+    Builds a Mailer from the MAIL_* settings.
+    """
+    pool = SMTPPool(
+        hostname=settings.MAIL_SERVER,
+        port=int(settings.MAIL_PORT or 465),
+        username=settings.MAIL_USERNAME,
+        password=settings.MAIL_PASSWORD,
+        use_tls=settings.MAIL_SSL_TLS,
+        start_tls=settings.MAIL_STARTTLS,
+        timeout=settings.MAIL_TIMEOUT,
+        size=settings.MAIL_POOL_SIZE,
+        idle_timeout=settings.MAIL_IDLE_TIMEOUT,
+    )
+    return Mailer(
+        pool,
+        sender=settings.MAIL_FROM,
+        max_retries=settings.MAIL_MAX_RETRIES,
+        retry_backoff=settings.MAIL_RETRY_BACKOFF,
+        batch_size=settings.MAIL_BATCH_SIZE,
+    )
+
+
+mailer = create_mailer()
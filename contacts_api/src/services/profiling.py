@@ -0,0 +1,175 @@
+"""
+This module profiles selected requests on demand, to see where the time of a slow endpoint goes.
+
+With PROFILING_ENABLED, ProfilingMiddleware profiles a request when it carries an
+X-Profile header equal to PROFILING_TOKEN, or at random with probability
+PROFILING_SAMPLE_RATE. The profile is written to PROFILING_DIR, of which only the newest
+PROFILING_MAX_FILES are kept. Its ID is returned in the X-Profile-Id response header, and
+profiles can be listed and downloaded with GET /profiles/ (same token in X-Profile).
+
+The profiler is pyinstrument when it is installed: a statistical profiler that follows
+the awaits of the request's task, saved as an interactive HTML report (call tree and
+timeline). Otherwise cProfile is used and the stats are saved in the pstats format, for
+snakeviz or flameprof; cProfile also records the other requests interleaved on the event loop.
+
+A worker profiles one request at a time; requests selected while a profile is running
+are served unprofiled.
+
+Functions:
+- start_profiler: Starts pyinstrument, or cProfile as a fallback.
+- save_profile: Writes a profile and drops the oldest ones.
+- list_profiles: Lists the stored profiles, newest first.
+- profile_path: Returns the file of a profile.
+
+Classes:
+- ProfilingMiddleware: ASGI middleware profiling selected requests.
+"""
+import asyncio
+import cProfile
+import logging
+import marshal
+import random
+import re
+import secrets
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+HEADER = b"x-profile"
+ID_HEADER = b"x-profile-id"
+
+_PROFILE_ID = re.compile(r"^\d{8}T\d{6}-[0-9a-f]{8}\.(html|prof)$")
+
+
+def token_matches(value: Optional[str], token: Optional[str] = None) -> bool:
+    """
+    Checks a token sent in the X-Profile header against token (PROFILING_TOKEN by default);
+    without a configured token nothing matches.
+    """
+    token = token or settings.PROFILING_TOKEN
+    return bool(token and value and secrets.compare_digest(value.encode(), token.encode()))
+
+
+def start_profiler() -> Tuple[str, Callable[[], bytes]]:
+    """
+    Starts profiling the current task with pyinstrument, or the current thread with cProfile if pyinstrument is not installed.
+
+    Returns:
+    - The file extension of the profile ("html" or "prof") and a function stopping the
+      profiler and returning the profile.
+    """
+    try:
+        from pyinstrument import Profiler
+    except ImportError:
+        profile = cProfile.Profile()
+        profile.enable()
+
+        def stop_cprofile() -> bytes:
+            profile.disable()
+            profile.create_stats()
+            # The format of pstats.Stats files, as written by Profile.dump_stats
+            return marshal.dumps(profile.stats)
+        return "prof", stop_cprofile
+
+    profiler = Profiler(async_mode="enabled")
+    profiler.start()
+
+    def stop_pyinstrument() -> bytes:
+        profiler.stop()
+        return profiler.output_html().encode()
+    return "html", stop_pyinstrument
+
+
+def save_profile(directory: str, profile_id: str, data: bytes, max_files: int = settings.PROFILING_MAX_FILES) -> None:
+    """
+    Writes a profile to directory and removes the oldest profiles beyond max_files.
+    """
+    path = Path(directory)
+    path.mkdir(parents=True, exist_ok=True)
+    (path / profile_id).write_bytes(data)
+    # IDs start with their UTC timestamp, so they sort by age
+    for old in sorted(p for p in path.iterdir() if _PROFILE_ID.match(p.name))[:-max_files or None]:
+        old.unlink(missing_ok=True)
+
+
+def list_profiles(directory: Optional[str] = None) -> List[dict]:
+    """
+    Returns the ID, size and creation time of the profiles stored in directory (PROFILING_DIR by default), newest first.
+    """
+    path = Path(directory or settings.PROFILING_DIR)
+    if not path.is_dir():
+        return []
+    profiles = sorted((p for p in path.iterdir() if _PROFILE_ID.match(p.name)), reverse=True)
+    return [
+        {"id": p.name, "size": p.stat().st_size, "created_at": datetime.strptime(p.name[:15], "%Y%m%dT%H%M%S").replace(tzinfo=timezone.utc)}
+        for p in profiles
+    ]
+
+
+def profile_path(profile_id: str, directory: Optional[str] = None) -> Path:
+    """
+    Returns the file of a profile stored in directory (PROFILING_DIR by default).
+
+    Raises:
+    - FileNotFoundError: If the ID is malformed or the profile does not exist (anymore).
+    """
+    path = Path(directory or settings.PROFILING_DIR) / profile_id
+    if not _PROFILE_ID.match(profile_id) or not path.is_file():
+        raise FileNotFoundError(profile_id)
+    return path
+
+
+class ProfilingMiddleware:
+    """
+    Pure ASGI middleware profiling the requests selected by header or sampling.
+
+    - **sample_rate**: Probability of profiling a request without the header.
+    - **token**: Value of the X-Profile header requesting a profile (PROFILING_TOKEN by default).
+    - **directory**: Where profiles are stored (PROFILING_DIR by default).
+    """
+
+    def __init__(
+        self,
+        app,
+        sample_rate: float = settings.PROFILING_SAMPLE_RATE,
+        token: Optional[str] = None,
+        directory: Optional[str] = None,
+    ):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.token = token
+        self.directory = directory or settings.PROFILING_DIR
+        self._running = False
+
+    def selected(self, scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == HEADER:
+                return token_matches(value.decode("latin-1"), self.token)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self._running or not self.selected(scope):
+            await self.app(scope, receive, send)
+            return
+        self._running = True
+        extension, stop = start_profiler()
+        profile_id = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}.{extension}"
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message = dict(message, headers=[*message.get("headers", []), (ID_HEADER, profile_id.encode())])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            data = stop()
+            self._running = False
+            try:
+                await asyncio.to_thread(save_profile, self.directory, profile_id, data)
+            except OSError as e:
+                logger.warning("Could not save profile %s: %s", profile_id, e)
@@ -0,0 +1,268 @@
+"""
+This module rate-limits requests per authenticated user (or per client address on public routes).
+
+Limits are configured per route in settings.RATE_LIMITS as "times/seconds" strings, e.g.
+{"contacts_create": "5/60"}, and enforced by the dependency returned by rate_limit(name).
+Every limited response carries RateLimit-Limit, RateLimit-Remaining and RateLimit-Reset
+headers; rejected requests get 429 Too Many Requests with a Retry-After header.
+
+Two backends are available, selected by RATE_LIMIT_BACKEND:
+
+- "local": LocalTokenBucket, an in-process token bucket per key. It needs no network round
+  trip but each worker process counts on its own, so it suits single-node deployments.
+- "redis": RedisSlidingWindow, a sliding-window counter shared by all workers, checked and
+  updated atomically by one Lua script (one EVALSHA per call). To skip Redis for most
+  requests, a call may reserve up to RATE_LIMIT_BATCH of the limit at once; the worker then
+  admits requests from its reservation locally until it is used up or the window ends.
+  Reserved permits count as used, so a limit is never exceeded, but permits reserved by one
+  worker cannot be used by another until the window slides.
+
+If Redis is unavailable the Redis backend falls back to the local token bucket.
+
+Classes:
+- RateLimit: A number of requests allowed per period.
+- Decision: The outcome of a rate limit check.
+- LocalTokenBucket: In-process token bucket backend.
+- RedisSlidingWindow: Redis sliding-window backend with local pre-admission.
+
+Functions:
+- parse_limit: Parses a "times/seconds" limit.
+- get_limiter: Returns the configured backend.
+- rate_limit: Returns a FastAPI dependency enforcing the limit of a route.
+"""
+import logging
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Tuple
+import redis.asyncio as redis
+from fastapi import Depends, HTTPException, Request, Response
+from redis.exceptions import RedisError
+from src.config import settings
+from src.services.auth import auth_service
+from src.services.local_cache import LocalCache
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimit(NamedTuple):
+    times: int
+    seconds: float
+
+
+class Decision(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    # Seconds until the full limit is available again
+    reset: float
+    # Seconds until the next request may be admitted (0 if allowed)
+    retry_after: float = 0.0
+
+    def headers(self) -> Dict[str, str]:
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(max(self.remaining, 0)),
+            "RateLimit-Reset": str(math.ceil(self.reset)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(math.ceil(self.retry_after), 1))
+        return headers
+
+
+def parse_limit(value: str) -> RateLimit:
+    """
+    Parses a limit written as "times/seconds", e.g. "5/60" for 5 requests per minute.
+
+    Raises:
+    - ValueError: If the value is malformed.
+    """
+    times, _, seconds = value.partition("/")
+    limit = RateLimit(int(times), float(seconds))
+    if limit.times < 1 or limit.seconds <= 0:
+        raise ValueError(f"Invalid rate limit {value!r}")
+    return limit
+
+
+class LocalTokenBucket:
+    """
+    In-process token bucket per key: a bucket holds up to times tokens and refills at
+    times / seconds tokens per second; each request takes one token.
+
+    - **maxsize**: Maximum number of tracked keys; the least recently used is dropped first
+      (a dropped key starts again with a full bucket).
+    """
+
+    def __init__(self, maxsize: int = 100_000):
+        self.maxsize = maxsize
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def hit(self, key: str, limit: RateLimit, now: Optional[float] = None) -> Decision:
+        """
+        Takes a token from the bucket of key.
+
+        Parameters:
+        - key: Identifies the limited client and route.
+        - limit: The limit of the route.
+        - now: Current monotonic time (for tests).
+
+        Returns:
+        - The decision, with the tokens left.
+        """
+        now = time.monotonic() if now is None else now
+        rate = limit.times / limit.seconds
+        tokens, updated_at = self._buckets.pop(key, (limit.times, now))
+        tokens = min(limit.times, tokens + (now - updated_at) * rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return Decision(
+            allowed=allowed,
+            limit=limit.times,
+            remaining=int(tokens),
+            reset=(limit.times - tokens) / rate,
+            retry_after=0.0 if allowed else (1 - tokens) / rate,
+        )
+
+
+# Sliding-window counter: the count of the previous fixed window, weighted by how much
+# of it still overlaps the sliding window, plus the count of the current one.
+# KEYS: current window, previous window. ARGV: limit, window (ms), now (ms), requested permits.
+# Returns the granted permits (possibly fewer than requested), the permits left and the
+# milliseconds until the current window ends.
+SLIDING_WINDOW_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local requested = tonumber(ARGV[4])
+local elapsed = now % window
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+local used = math.ceil(previous * (window - elapsed) / window) + current
+local granted = math.max(0, math.min(requested, limit - used))
+if granted > 0 then
+    redis.call('INCRBY', KEYS[1], granted)
+    redis.call('PEXPIRE', KEYS[1], window * 2)
+end
+return {granted, math.max(0, limit - used - granted), window - elapsed}
+"""
+
+
+class RedisSlidingWindow:
+    """
+    Sliding-window rate limiter shared by all workers through Redis, with local pre-admission.
+
+    - **r**: Asynchronous Redis client.
+    - **batch**: Fraction of a limit reserved per Redis call (at least one permit); 0 reserves one permit at a time.
+    - **prefix**: Prefix of the Redis keys.
+    - **maxsize**: Maximum number of keys holding a reservation; the least recently used is
+      dropped first (its unused permits are given up until the window slides).
+    """
+
+    def __init__(self, r: redis.Redis, batch: float = settings.RATE_LIMIT_BATCH, prefix: str = "ratelimit", maxsize: int = 100_000):
+        self.r = r
+        self.batch = batch
+        self.prefix = prefix
+        self.script = r.register_script(SLIDING_WINDOW_SCRIPT)
+        self.fallback = LocalTokenBucket()
+        # key -> (permits left, remaining reported by Redis, end of the window), dropped
+        # when the window ends
+        self._reserved = LocalCache(maxsize=maxsize, ttl=0)
+        self.redis_calls = 0
+
+    async def hit(self, key: str, limit: RateLimit, now: Optional[float] = None) -> Decision:
+        """
+        Admits a request from the local reservation of key, or reserves permits in Redis.
+
+        Parameters:
+        - key: Identifies the limited client and route.
+        - limit: The limit of the route.
+        - now: Current time in seconds since the epoch (for tests).
+
+        Returns:
+        - The decision.
+        """
+        now = time.time() if now is None else now
+        permits, remote_remaining, window_end = self._reserved.get(key) or (0, 0, 0.0)
+        if permits and now < window_end:
+            permits -= 1
+            if permits:
+                self._reserved.set(key, (permits, remote_remaining, window_end), ttl=window_end - now)
+            else:
+                self._reserved.pop(key)
+            return Decision(True, limit.times, remote_remaining + permits, window_end - now + limit.seconds)
+
+        window_ms = int(limit.seconds * 1000)
+        now_ms = int(now * 1000)
+        window = now_ms // window_ms
+        # The hash tag keeps both windows of a key in the same cluster slot
+        tag = f"{self.prefix}:{{{key}}}"
+        requested = max(1, int(limit.times * self.batch))
+        try:
+            granted, remaining, reset_ms = await self.script(keys=[f"{tag}:{window}", f"{tag}:{window - 1}"], args=[limit.times, window_ms, now_ms, requested])
+        except RedisError as e:
+            logger.warning("Rate limiting locally, Redis is unavailable: %s", e)
+            return await self.fallback.hit(key, limit)
+        self.redis_calls += 1
+        window_end = now + reset_ms / 1000
+        if not granted:
+            return Decision(False, limit.times, 0, window_end - now + limit.seconds, retry_after=reset_ms / 1000)
+        if granted > 1:
+            self._reserved.set(key, (granted - 1, remaining, window_end), ttl=reset_ms / 1000)
+        return Decision(True, limit.times, remaining + granted - 1, window_end - now + limit.seconds)
+
+
+_limiter = None
+
+
+def get_limiter():
+    """
+    Returns the backend selected by RATE_LIMIT_BACKEND, creating it on first use.
+    """
+    global _limiter
+    if _limiter is None:
+        if settings.RATE_LIMIT_BACKEND == "local":
+            _limiter = LocalTokenBucket()
+        else:
+            from src.services.redis_client import get_redis
+            _limiter = RedisSlidingWindow(get_redis())
+    return _limiter
+
+
+async def check(name: str, identity: str, response: Response) -> None:
+    """
+    Counts a request of identity against the limit of route name.
+
+    Raises:
+    - HTTPException: 429 if the limit is exhausted.
+    """
+    decision = await get_limiter().hit(f"{name}:{identity}", parse_limit(settings.RATE_LIMITS[name]))
+    if not decision.allowed:
+        raise HTTPException(status_code=429, detail="Too many requests", headers=decision.headers())
+    response.headers.update(decision.headers())
+
+
+def rate_limit(name: str, per_user: bool = True):
+    """
+    Returns a FastAPI dependency enforcing the limit settings.RATE_LIMITS[name].
+
+    Parameters:
+    - name: Name of the limit in settings.RATE_LIMITS.
+    - per_user: Count requests per authenticated user (the route requires authentication);
+      otherwise per client address.
+
+    Returns:
+    - The dependency, to be used as dependencies=[Depends(rate_limit(name))].
+    """
+    parse_limit(settings.RATE_LIMITS[name])
+    if per_user:
+        async def limit_user(response: Response, current_user=Depends(auth_service.get_current_user)):
+            await check(name, f"user:{current_user.id}", response)
+        return limit_user
+
+    async def limit_client(request: Request, response: Response):
+        await check(name, f"ip:{request.client.host if request.client else 'unknown'}", response)
+    return limit_client
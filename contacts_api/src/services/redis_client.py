@@ -0,0 +1,117 @@
+"""
+This module owns the shared asynchronous Redis client of the application.
+
+A single connection pool, sized by the REDIS_* settings, is used by the auth cache and the
+rate limiter. The client is created on first use and closed by the application lifespan. It records the
+duration of every command and pipeline (see telemetry).
+
+Commands blocking longer than REDIS_SOCKET_TIMEOUT (e.g. the XREADGROUP BLOCK of the job
+worker) would time out on the shared pool; they get a client of their own from create_client.
+
+Functions:
+- create_client: Creates a Redis client with its own connection pool.
+- get_redis: Returns the shared Redis client, creating it if needed.
+- close_redis: Closes the shared client and its connection pool.
+"""
+import time
+from typing import Optional
+import redis.asyncio as redis
+from redis.asyncio.client import Pipeline
+from src.config import settings
+from src.services.telemetry import REDIS_COMMAND_DURATION
+
+_client: Optional[redis.Redis] = None
+
+
+class InstrumentedPipeline(Pipeline):
+    """
+    Pipeline recording the duration of each execution, labelled MULTI or PIPELINE.
+    """
+
+    async def execute(self, raise_on_error: bool = True):
+        started = time.perf_counter()
+        try:
+            return await super().execute(raise_on_error)
+        finally:
+            REDIS_COMMAND_DURATION.labels("MULTI" if self.is_transaction else "PIPELINE").observe(time.perf_counter() - started)
+
+
+class InstrumentedRedis(redis.Redis):
+    """
+    Redis client recording the duration of each command by command name.
+    """
+
+    async def execute_command(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            REDIS_COMMAND_DURATION.labels(args[0]).observe(time.perf_counter() - started)
+
+    def pipeline(self, transaction: bool = True, shard_hint: Optional[str] = None) -> Pipeline:
+        if not settings.METRICS_ENABLED:
+            return super().pipeline(transaction, shard_hint)
+        return InstrumentedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
+def create_pool(**overrides) -> redis.ConnectionPool:
+    """
+    Creates the Redis connection pool from the settings.
+
+    REDIS_URL takes precedence over REDIS_HOST/REDIS_PORT.
+
+    Parameters:
+    - overrides: Connection options replacing those of the settings, e.g. socket_timeout.
+    """
+    options = {
+        "max_connections": settings.REDIS_MAX_CONNECTIONS,
+        "socket_timeout": settings.REDIS_SOCKET_TIMEOUT,
+        "socket_connect_timeout": settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+        "health_check_interval": settings.REDIS_HEALTH_CHECK_INTERVAL,
+        **overrides,
+    }
+    if settings.REDIS_URL:
+        return redis.ConnectionPool.from_url(settings.REDIS_URL, **options)
+    return redis.ConnectionPool(
+        host=settings.REDIS_HOST or "localhost",
+        port=int(settings.REDIS_PORT or 6379),
+        db=0,
+        **options,
+    )
+
+
+def create_client(**overrides) -> redis.Redis:
+    """
+    Creates a Redis client with a connection pool of its own, which the caller closes.
+
+    Parameters:
+    - overrides: Connection options replacing those of the settings, e.g. socket_timeout.
+
+    Returns:
+    - A redis.asyncio.Redis client.
+    """
+    client_class = InstrumentedRedis if settings.METRICS_ENABLED else redis.Redis
+    return client_class(connection_pool=create_pool(**overrides))
+
+
+def get_redis() -> redis.Redis:
+    """
+    Returns the shared Redis client.
+
+    Returns:
+    - A redis.asyncio.Redis client bound to the shared connection pool.
+    """
+    global _client
+    if _client is None:
+        _client = create_client()
+    return _client
+
+
+async def close_redis() -> None:
+    """
+    Closes the shared Redis client and disconnects its connection pool.
+    """
+    global _client
+    if _client is not None:
+        await _client.aclose(close_connection_pool=True)
+        _client = None
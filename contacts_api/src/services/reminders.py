@@ -0,0 +1,122 @@
+"""
+This module sends birthday reminders to users the day before the birthday of one of their contacts.
+
+send_birthday_reminders streams the contacts with a birthday on a given day through
+contacts.birthdays_on and sends one reminder per contact to its owner through the pooled
+mailer, in batches. run_daily runs it every day at BIRTHDAY_REMINDERS_HOUR in every job
+worker (worker.py), never in the API processes, so sending does not compete with
+requests; a Redis key per day makes sure only one worker sends the reminders.
+
+The job can also be run once, e.g. from cron:
+
+    python -m src.services.reminders --day 2024-06-21
+
+Functions:
+- send_birthday_reminders: Sends the reminders for the birthdays of a given day.
+- run_daily: Sends the reminders for tomorrow's birthdays once a day. Runs until cancelled.
+"""
+import argparse
+import asyncio
+import logging
+import time
+from datetime import date, datetime, timedelta
+from typing import Tuple
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from src.database.db import AsyncSessionLocal
+from src.repository import contacts
+from src.services.mailer import Mailer, mailer as default_mailer
+from src.services.telemetry import TASK_DURATION
+
+logger = logging.getLogger(__name__)
+
+LOCK_TTL = 2 * 24 * 3600
+
+
+async def send_birthday_reminders(day: date, session_factory: async_sessionmaker = AsyncSessionLocal, mailer: Mailer = default_mailer) -> Tuple[int, int]:
+    """
+    Sends a reminder to the owner of every contact with a birthday on a given day.
+
+    Contacts are streamed from the database while earlier batches are being sent, so memory
+    use does not grow with the number of reminders. Owners who have not confirmed their
+    email address are skipped.
+
+    Parameters:
+    - day: Day of the birthdays.
+    - session_factory: Factory of database sessions.
+    - mailer: Mailer used to send the reminders.
+
+    Returns:
+    - A tuple of the numbers of sent and failed reminders.
+    """
+    async with session_factory() as db:
+        messages = (
+            mailer.message(
+                contact.owner.email,
+                f"Tomorrow is {contact.first_name} {contact.last_name}'s birthday",
+                "birthday_reminder.html",
+                username=contact.owner.username,
+                first_name=contact.first_name,
+                last_name=contact.last_name,
+                email=contact.email,
+                day=day,
+            )
+            async for contact in contacts.birthdays_on(db, day)
+            if contact.owner.confirmed
+        )
+        sent, failed = await mailer.send_stream(messages)
+    logger.info("Birthday reminders for %s: %d sent, %d failed", day, sent, failed)
+    return sent, failed
+
+
+def seconds_until(hour: int, now: datetime) -> float:
+    """
+    Returns the number of seconds from now until the next full hour given.
+    """
+    run_at = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+    if run_at <= now:
+        run_at += timedelta(days=1)
+    return (run_at - now).total_seconds()
+
+
+async def run_daily(r: redis.Redis, hour: int) -> None:
+    """
+    Sends the reminders for tomorrow's birthdays every day at the given hour. Runs until cancelled.
+
+    Parameters:
+    - r: Asynchronous Redis client, used to elect the worker sending the reminders of a day.
+    - hour: Hour of the day (server local time) to send the reminders at.
+    """
+    while True:
+        await asyncio.sleep(seconds_until(hour, datetime.now()))
+        day = date.today() + timedelta(days=1)
+        try:
+            if not await r.set(f"reminders:birthdays:{day.isoformat()}", 1, nx=True, ex=LOCK_TTL):
+                continue
+        except RedisError as e:
+            logger.warning("Skipping birthday reminders for %s, Redis is unavailable: %s", day, e)
+            continue
+        started = time.perf_counter()
+        try:
+            await send_birthday_reminders(day)
+        except Exception:
+            logger.exception("Birthday reminders for %s failed", day)
+            TASK_DURATION.labels("birthday_reminders", "failed").observe(time.perf_counter() - started)
+        else:
+            TASK_DURATION.labels("birthday_reminders", "processed").observe(time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Send the reminders for the birthdays of a day.")
+    parser.add_argument("--day", type=date.fromisoformat, default=date.today() + timedelta(days=1))
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    async def main():
+        try:
+            await send_birthday_reminders(args.day)
+        finally:
+            await default_mailer.close()
+
+    asyncio.run(main())
@@ -0,0 +1,173 @@
+"""
+This module caches the JSON responses of contact reads in Redis, per owner, with strong ETags.
+
+Every owner has a version number in Redis (contacts:version:{owner_id}) that the contact
+writes of the repository bump after committing. Responses are stored under
+responses:{owner_id}:{version}:{request hash}, where the request hash covers the route and
+its query parameters, so a write makes all cached responses of the owner unreachable at once;
+they expire after RESPONSE_CACHE_TTL seconds.
+
+The ETag of a response is derived from the version and the request hash, not from the body,
+so a request whose If-None-Match matches is answered with 304 Not Modified after reading the
+version only, without loading, serializing or even fetching the cached body.
+
+Versions start from the current time in nanoseconds instead of 0, so an ETag issued before
+a version key was lost (eviction, flush) is never reused for different content.
+
+Redis errors never fail a request: the response is then served uncached.
+
+Functions:
+- get_version: Returns the version of an owner's contacts.
+- bump_version: Invalidates the cached responses of an owner.
+- cached_response: Serves a read from the cache, or produces and caches it.
+- stats: Returns the hit, miss and 304 counters.
+"""
+import hashlib
+import logging
+import time
+from typing import Any, Awaitable, Callable
+import redis.asyncio as redis
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from redis.exceptions import RedisError
+from src.config import settings
+from src.services.telemetry import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+counters = {"hits": 0, "misses": 0, "not_modified": 0, "errors": 0}
+
+
+def count(outcome: str, result: str) -> None:
+    counters[outcome] += 1
+    CACHE_REQUESTS.labels("response", result).inc()
+
+
+def version_key(owner_id: int) -> str:
+    return f"contacts:version:{owner_id}"
+
+
+async def get_version(r: redis.Redis, owner_id: int) -> int:
+    """
+    Returns the version of an owner's contacts, initializing it if needed.
+
+    Parameters:
+    - r: Asynchronous Redis client.
+    - owner_id: ID of the user.
+
+    Returns:
+    - The current version.
+    """
+    async with r.pipeline(transaction=False) as pipe:
+        pipe.set(version_key(owner_id), time.time_ns(), nx=True)
+        pipe.get(version_key(owner_id))
+        _, version = await pipe.execute()
+    return int(version)
+
+
+async def bump_version(r: redis.Redis, owner_id: int) -> None:
+    """
+    Changes the version of an owner's contacts, so their cached responses and ETags become stale.
+
+    Redis errors are logged rather than raised: the database write has already succeeded
+    and the stale entries expire after RESPONSE_CACHE_TTL.
+
+    Parameters:
+    - r: Asynchronous Redis client.
+    - owner_id: ID of the user whose contacts changed.
+    """
+    try:
+        async with r.pipeline(transaction=True) as pipe:
+            pipe.set(version_key(owner_id), time.time_ns(), nx=True)
+            pipe.incr(version_key(owner_id))
+            await pipe.execute()
+    except RedisError as e:
+        logger.warning("Could not invalidate cached responses of user %s: %s", owner_id, e)
+
+
+def request_hash(request: Request, *vary) -> str:
+    """
+    Hashes the route and the query parameters of a request (in any order), plus any extra values the response depends on.
+    """
+    query = "&".join(f"{name}={value}" for name, value in sorted(request.query_params.multi_items()))
+    text = "\n".join([request.method, request.url.path, query, *map(str, vary)])
+    return hashlib.sha256(text.encode()).hexdigest()[:32]
+
+
+def orm_serializer(adapter: TypeAdapter) -> Callable[[Any], bytes]:
+    """
+    Returns a serializer of ORM objects to JSON: they are validated with adapter first, so
+    that their attributes are read. Plain records can be passed to adapter.dump_json directly.
+    """
+    def serialize(data: Any) -> bytes:
+        return adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+    return serialize
+
+
+def if_none_match(request: Request, etag: str) -> bool:
+    # "*" is not honoured: it matches only if the resource exists, which is known only
+    # after loading it, and the point of the check is to skip loading
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return etag in (tag.strip() for tag in header.split(","))
+
+
+async def cached_response(
+    r: redis.Redis,
+    request: Request,
+    owner_id: int,
+    produce: Callable[[], Awaitable[Any]],
+    serialize: Callable[[Any], bytes],
+    *vary,
+) -> Response:
+    """
+    Serves a contact read from the response cache, or produces, serializes and caches it.
+
+    Parameters:
+    - r: Asynchronous Redis client.
+    - request: The request; its route and query parameters identify the response.
+    - owner_id: ID of the user whose contacts are read.
+    - produce: Coroutine function returning the data of the response.
+    - serialize: Turns the data into the JSON body, e.g. TypeAdapter.dump_json or orm_serializer(adapter).
+    - vary: Extra values the response depends on (e.g. the current date).
+
+    Returns:
+    - A JSON response with an ETag, or an empty 304 response if the client's copy is current.
+    """
+    headers = {"Cache-Control": "private, no-cache"}
+    key = request_hash(request, *vary)
+    try:
+        version = await get_version(r, owner_id)
+        etag = f'"{version:x}-{key[:16]}"'
+        headers["ETag"] = etag
+        if if_none_match(request, etag):
+            count("not_modified", "not_modified")
+            return Response(status_code=304, headers=headers)
+        entry_key = f"responses:{owner_id}:{version}:{key}"
+        body = await r.get(entry_key)
+    except RedisError as e:
+        logger.warning("Response cache unavailable: %s", e)
+        count("errors", "error")
+        headers.pop("ETag", None)
+        return Response(serialize(await produce()), media_type="application/json", headers=headers)
+    if body is not None:
+        count("hits", "hit")
+        return Response(body, media_type="application/json", headers=headers)
+    count("misses", "miss")
+    body = serialize(await produce())
+    try:
+        await r.set(entry_key, body, ex=settings.RESPONSE_CACHE_TTL)
+    except RedisError as e:
+        logger.warning("Could not cache response %s: %s", entry_key, e)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def stats() -> dict:
+    """
+    Returns the response cache counters of this worker, with the ratio of requests served
+    without running the query (cache hits and 304 responses).
+    """
+    served = counters["hits"] + counters["not_modified"]
+    total = served + counters["misses"]
+    return dict(counters, hit_ratio=round(served / total, 4) if total else 0.0)
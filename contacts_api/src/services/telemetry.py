@@ -0,0 +1,178 @@
+"""
+This module defines the Prometheus metrics of the application and the hooks that record them.
+
+- MetricsMiddleware times every HTTP request by method, route template (e.g.
+  /contacts/{contact_id}, never the raw path) and status code, and counts the requests in flight.
+- instrument_engine times every SQL statement through the engine's cursor events.
+- The shared Redis client (see redis_client) times every command and pipeline.
+- LocalCache, the user cache and the response cache count their hits and misses.
+- The job worker, the birthday reminders, the mailer and the password hashing time their work.
+
+Recording a value is a dictionary lookup and an in-memory update, so the hooks add
+microseconds to a request. Label values are bounded (route templates, statement verbs,
+command names) to keep the number of series small.
+
+With several worker processes (uvicorn --workers, gunicorn), start them with the
+PROMETHEUS_MULTIPROC_DIR environment variable pointing to an empty directory: every process
+then writes its values to memory-mapped files there and the /metrics endpoint of any worker
+reports the aggregate of all of them. Under gunicorn, also call mark_process_dead from the
+child_exit server hook, so the gauges of exited workers are dropped.
+
+Functions:
+- instrument_engine: Times the statements of a SQLAlchemy engine.
+- observe: Context manager timing a block into a histogram.
+- exposition: Renders the metrics in the Prometheus text (or OpenMetrics) format.
+- mark_process_dead: Drops the live gauges of an exited worker process.
+
+Classes:
+- MetricsMiddleware: ASGI middleware timing requests.
+"""
+import os
+import time
+from contextlib import contextmanager
+from typing import Optional, Tuple
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, Histogram
+from prometheus_client import multiprocess
+from prometheus_client.exposition import choose_encoder
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Database and Redis calls are mostly sub-millisecond
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Duration of HTTP requests.", ["method", "route", "status"],
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "HTTP requests being handled.", ["method"], multiprocess_mode="livesum",
+)
+DB_STATEMENT_DURATION = Histogram(
+    "db_statement_duration_seconds", "Duration of SQL statements.", ["engine", "operation"], buckets=FAST_BUCKETS,
+)
+REDIS_COMMAND_DURATION = Histogram(
+    "redis_command_duration_seconds", "Duration of Redis commands (and pipelines).", ["command"], buckets=FAST_BUCKETS,
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total", "Cache lookups by cache and result (hit, miss, not_modified, error).", ["cache", "result"],
+)
+TASK_DURATION = Histogram(
+    "background_task_duration_seconds", "Duration of background jobs and tasks.", ["task", "outcome"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0),
+)
+PASSWORD_HASH_DURATION = Histogram(
+    "password_hash_duration_seconds", "Duration of password hashing and verification, including the wait for a worker thread.", ["operation"],
+)
+EMAIL_SEND_DURATION = Histogram(
+    "email_send_duration_seconds", "Duration of email deliveries, including retries.", ["outcome"],
+)
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+@contextmanager
+def observe(histogram, *labels):
+    """
+    Times the block into histogram with the given label values, whether or not it raises.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.labels(*labels).observe(time.perf_counter() - started)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording the duration of HTTP requests and the number in flight.
+
+    The route label is the path template of the matched route, so all contacts share
+    /contacts/{contact_id}; requests matching no route are labelled "unmatched".
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        method = scope["method"]
+        in_flight = REQUESTS_IN_FLIGHT.labels(method)
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_flight.dec()
+            route = scope.get("route")
+            REQUEST_DURATION.labels(method, getattr(route, "path", UNMATCHED_ROUTE), str(status)).observe(time.perf_counter() - started)
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """
+    Times every statement executed by an engine (for an AsyncEngine, pass its sync_engine).
+
+    Parameters:
+    - engine: The engine.
+    - name: Value of the engine label, e.g. "async".
+    """
+    @event.listens_for(engine, "before_cursor_execute")
+    def start(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("telemetry_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def stop(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["telemetry_started"].pop()
+        # The leading keyword (SELECT, INSERT, WITH, ...) keeps the label bounded
+        operation = statement.lstrip()[:8].split(None, 1)
+        DB_STATEMENT_DURATION.labels(name, operation[0].upper() if operation else "OTHER").observe(elapsed)
+
+    @event.listens_for(engine, "handle_error")
+    def failed(context):
+        # after_cursor_execute is not called for failed statements
+        started = context.connection.info.get("telemetry_started") if context.connection is not None else None
+        if started:
+            started.pop()
+
+
+def registry() -> CollectorRegistry:
+    """
+    Returns the registry to expose: the aggregate of all worker processes in multiprocess
+    mode, otherwise the default registry of this process.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        aggregate = CollectorRegistry()
+        multiprocess.MultiProcessCollector(aggregate)
+        return aggregate
+    return REGISTRY
+
+
+def exposition(accept: Optional[str]) -> Tuple[bytes, str]:
+    """
+    Renders the metrics in the format preferred by the scraper.
+
+    Parameters:
+    - accept: The Accept header of the request.
+
+    Returns:
+    - The body and its content type.
+    """
+    encoder, content_type = choose_encoder(accept or "")
+    return encoder(registry()), content_type
+
+
+def mark_process_dead(pid: int) -> None:
+    """
+    Drops the live gauges of an exited worker process (multiprocess mode only), e.g. from
+    gunicorn's child_exit hook: def child_exit(server, worker): mark_process_dead(worker.pid)
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,222 @@
+"""
+This module caches the authenticated user (the principal) in two tiers.
+
+- L1: a bounded in-process LRU (LocalCache) per worker, so hot users need no network round trip.
+- L2: Redis entries under user:{email}, shared by all workers.
+
+Instead of pickling ORM instances, only the fields needed by request handlers are stored,
+as a compact orjson array prefixed with a schema version. Entries written with another
+version, or that cannot be decoded (e.g. legacy pickles), are treated as cache misses and
+overwritten by the next lookup.
+
+Writers of user data call invalidate_user, which drops the L2 entry and publishes the email
+on a Redis pub/sub channel; every worker runs listen_for_invalidations and drops its L1 entry.
+
+Functions:
+- dumps: Serializes a user into a versioned cache record.
+- loads: Deserializes a cache record into a CachedUser.
+- get_cached_user: Reads a user from the cache.
+- cache_user: Writes a user to the cache.
+- invalidate_user: Removes a user from the cache of every worker.
+- listen_for_invalidations: Applies invalidations published by other workers to the local cache.
+"""
+import asyncio
+import logging
+from typing import Optional
+import orjson
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+from src.config import settings
+from src.services.local_cache import LocalCache
+from src.services.telemetry import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the layout of the cached record changes
+CACHE_VERSION = 1
+CACHE_TTL = 900
+INVALIDATION_CHANNEL = "user-cache:invalidate"
+
+local_users = LocalCache(maxsize=settings.USER_CACHE_L1_SIZE, ttl=settings.USER_CACHE_L1_TTL, name="user_l1")
+redis_stats = {"hits": 0, "misses": 0}
+
+
+class CachedUser:
+    """
+    Lightweight, read-only view of an authenticated user.
+    """
+
+    __slots__ = ("id", "email", "username", "confirmed", "avatar")
+
+    def __init__(self, id: int, email: str, username: Optional[str], confirmed: bool, avatar: Optional[str]):
+        self.id = id
+        self.email = email
+        self.username = username
+        self.confirmed = confirmed
+        self.avatar = avatar
+
+    @classmethod
+    def from_user(cls, user) -> "CachedUser":
+        """
+        Builds a CachedUser from a models.User instance (or any object with the same attributes).
+        """
+        return cls(user.id, user.email, user.username, bool(user.confirmed), user.avatar)
+
+    def __eq__(self, other):
+        if not isinstance(other, CachedUser):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __hash__(self):
+        # Equal users have the same id
+        return hash(self.id)
+
+    def __repr__(self):
+        return f"CachedUser(id={self.id!r}, email={self.email!r})"
+
+
+def cache_key(email: str) -> str:
+    return f"user:{email}"
+
+
+def dumps(user) -> bytes:
+    """
+    Serializes a user into a versioned cache record.
+
+    Parameters:
+    - user: A models.User or CachedUser.
+
+    Returns:
+    - The record as bytes.
+    """
+    return orjson.dumps([CACHE_VERSION, user.id, user.email, user.username, bool(user.confirmed), user.avatar])
+
+
+def loads(data: bytes) -> Optional[CachedUser]:
+    """
+    Deserializes a cache record.
+
+    Parameters:
+    - data: Bytes previously produced by dumps.
+
+    Returns:
+    - A CachedUser, or None if the record has another version or cannot be decoded.
+    """
+    try:
+        record = orjson.loads(data)
+    except orjson.JSONDecodeError:
+        return None
+    if not isinstance(record, list) or not record or record[0] != CACHE_VERSION:
+        return None
+    return CachedUser(*record[1:])
+
+
+async def get_cached_user(r: redis.Redis, email: str) -> Optional[CachedUser]:
+    """
+    Reads a user from the cache.
+
+    Parameters:
+    - r: Asynchronous Redis client.
+    - email: Email address of the user.
+
+    Returns:
+    - A CachedUser, or None on a cache miss.
+    """
+    user = local_users.get(email)
+    if user is not None:
+        return user
+    data = await r.get(cache_key(email))
+    user = loads(data) if data is not None else None
+    if user is None:
+        redis_stats["misses"] += 1
+        CACHE_REQUESTS.labels("user_l2", "miss").inc()
+        return None
+    redis_stats["hits"] += 1
+    CACHE_REQUESTS.labels("user_l2", "hit").inc()
+    local_users.set(email, user)
+    return user
+
+
+async def cache_user(r: redis.Redis, user, ttl: int = CACHE_TTL) -> CachedUser:
+    """
+    Writes a user to the cache with a single SET ... EX command.
+
+    Parameters:
+    - r: Asynchronous Redis client.
+    - user: A models.User or CachedUser.
+    - ttl: Time to live of the entry in seconds.
+
+    Returns:
+    - The CachedUser view of the user.
+    """
+    await r.set(cache_key(user.email), dumps(user), ex=ttl)
+    cached = CachedUser.from_user(user)
+    local_users.set(user.email, cached)
+    return cached
+
+
+async def invalidate_user(r: redis.Redis, email: str) -> None:
+    """
+    Removes a user from the cache of every worker.
+
+    The L2 entry is deleted and the email is published on INVALIDATION_CHANNEL, so other
+    workers drop their L1 entry within milliseconds. Redis errors are logged rather than
+    raised: the database write has already succeeded and L1 entries expire on their own.
+
+    Parameters:
+    - r: Asynchronous Redis client.
+    - email: Email address of the user.
+    """
+    local_users.pop(email)
+    try:
+        async with r.pipeline(transaction=False) as pipe:
+            pipe.delete(cache_key(email))
+            pipe.publish(INVALIDATION_CHANNEL, email)
+            await pipe.execute()
+    except RedisError as e:
+        logger.warning("Could not invalidate cached user %s: %s", email, e)
+
+
+async def listen_for_invalidations(r: redis.Redis, retry_delay: float = 1.0, poll_timeout: float = 1.0) -> None:
+    """
+    Drops L1 entries of users invalidated by any worker. Runs until cancelled.
+
+    Messages are polled with a read timeout of their own, so an idle channel is not an
+    error even on a pool with a short socket_timeout. When the subscription is lost, the
+    whole L1 cache is cleared after resubscribing, since invalidations may have been
+    missed in the meantime.
+
+    Parameters:
+    - r: Asynchronous Redis client.
+    - retry_delay: Seconds to wait before resubscribing after an error.
+    - poll_timeout: Seconds to wait for a message before polling again.
+    """
+    disconnected = False
+    while True:
+        try:
+            async with r.pubsub(ignore_subscribe_messages=True) as pubsub:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                if disconnected:
+                    local_users.clear()
+                    disconnected = False
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=poll_timeout)
+                    if message is None:
+                        continue
+                    email = message["data"]
+                    local_users.pop(email.decode() if isinstance(email, bytes) else email)
+        except RedisError as e:
+            logger.warning("User cache invalidation listener disconnected: %s", e)
+            disconnected = True
+            await asyncio.sleep(retry_delay)
+
+
+def stats() -> dict:
+    """
+    Returns hit/miss statistics of both cache tiers.
+    """
+    lookups = redis_stats["hits"] + redis_stats["misses"]
+    return {
+        "l1": local_users.stats(),
+        "l2": dict(redis_stats, hit_ratio=round(redis_stats["hits"] / lookups, 4) if lookups else 0.0),
+    }
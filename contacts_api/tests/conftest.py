@@ -0,0 +1,140 @@
+import asyncio
+import socket
+import pytest
+import pytest_asyncio
+from aiosmtpd.controller import Controller
+from fakeredis import aioredis
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database.db import Base
+from src.database.models import User
+from src.repository import search
+from src.services import redis_client
+
+
+@pytest.fixture(autouse=True)
+def fake_redis(monkeypatch):
+    # Code calling get_redis() (caches, queues) talks to an in-memory Redis
+    client = aioredis.FakeRedis()
+    monkeypatch.setattr(redis_client, "_client", client)
+    return client
+
+
+@pytest_asyncio.fixture
+async def async_engine():
+    # Every test starts from an empty database, so drop in-process indexes of earlier tests
+    search._indexes.clear()
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def session(async_engine):
+    async with async_sessionmaker(async_engine, expire_on_commit=False)() as db:
+        yield db
+
+
+@pytest_asyncio.fixture
+async def owner(session):
+    user = User(email="owner@example.com", username="owner", password="hash", confirmed=True)
+    session.add(user)
+    await session.commit()
+    return user
+
+
+class RecordingHandler:
+    """
+    aiosmtpd handler keeping received messages; the first `failures` messages get `failure_reply`.
+    """
+
+    def __init__(self):
+        self.messages = []
+        self.sessions = set()
+        self.failures = 0
+        self.failure_reply = "451 Try again later"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.sessions.add(id(session))
+        if self.failures:
+            self.failures -= 1
+            return self.failure_reply
+        self.messages.append(envelope)
+        return "250 OK"
+
+
+@pytest.fixture
+def smtp_server():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    controller = Controller(RecordingHandler(), hostname="127.0.0.1", port=port)
+    controller.start()
+    yield controller
+    controller.stop()
+
+
+class IdleRedis:
+    """
+    Minimal RESP server answering like a Redis with no traffic: subscriptions never get a
+    message and blocking stream reads return nothing once their BLOCK time is over.
+    """
+
+    def __init__(self):
+        self.commands = []
+        self.connections = set()
+
+    async def read_command(self, reader):
+        count = int((await reader.readline())[1:])
+        args = []
+        for _ in range(count):
+            length = int((await reader.readline())[1:])
+            args.append((await reader.readexactly(length + 2))[:-2].decode())
+        return args
+
+    async def handle(self, reader, writer):
+        self.connections.add(asyncio.current_task())
+        subscribed = False
+        try:
+            while True:
+                args = await self.read_command(reader)
+                name = args[0].upper()
+                self.commands.append(name)
+                if name == "SUBSCRIBE":
+                    subscribed = True
+                    reply = f"*3\r\n$9\r\nsubscribe\r\n${len(args[1])}\r\n{args[1]}\r\n:1\r\n"
+                elif name == "PING":
+                    reply = "*2\r\n$4\r\npong\r\n$0\r\n\r\n" if subscribed else "+PONG\r\n"
+                elif name == "EVALSHA":
+                    # The job worker's promotion of delayed retries: none due, none waiting
+                    reply = "*2\r\n:0\r\n:-1\r\n"
+                elif name == "XAUTOCLAIM":
+                    reply = "*3\r\n$3\r\n0-0\r\n*0\r\n*0\r\n"
+                elif name == "XREADGROUP":
+                    await asyncio.sleep(int(args[args.index("BLOCK") + 1]) / 1000)
+                    reply = "*-1\r\n"
+                else:
+                    reply = "+OK\r\n"
+                writer.write(reply.encode())
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            writer.close()
+
+
+@pytest_asyncio.fixture
+async def idle_redis():
+    handler = IdleRedis()
+    server = await asyncio.start_server(handler.handle, "127.0.0.1", 0)
+    handler.url = f"redis://127.0.0.1:{server.sockets[0].getsockname()[1]}/0"
+    yield handler
+    server.close()
+    for connection in handler.connections:
+        connection.cancel()
+    await asyncio.gather(*handler.connections, return_exceptions=True)
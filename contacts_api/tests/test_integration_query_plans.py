@@ -0,0 +1,59 @@
+import pytest
+from datetime import date
+from sqlalchemy import event
+
+from src.repository import contact_reads, contacts, search
+
+
+@pytest.fixture
+def captured_statements(async_engine):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "contacts" in statement:
+            statements.append((statement, parameters))
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+    yield statements
+    event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+
+
+async def consume(iterator):
+    return [item async for item in iterator]
+
+
+async def assert_uses_index(session, statements):
+    assert statements
+    connection = await session.connection()
+    for statement, parameters in statements:
+        result = await connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        details = [row[-1] for row in result]
+        contact_steps = [detail for detail in details if " contacts" in detail]
+        assert contact_steps, details
+        for detail in contact_steps:
+            # SQLite reports "SCAN contacts" for a full table scan
+            assert detail.startswith("SEARCH") and ("INDEX" in detail or "PRIMARY KEY" in detail), (statement, details)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("query", [
+    lambda db, owner_id: contacts.get_contact(db, 1),
+    lambda db, owner_id: consume(contacts.birthdays_on(db, date(2024, 6, 1))),
+    lambda db, owner_id: consume(contacts.stream_contacts(db, owner_id)),
+    lambda db, owner_id: search.search_contacts(db, owner_id, "doe"),
+    lambda db, owner_id: contact_reads.list_contacts(db, owner_id, skip=0, limit=10),
+    lambda db, owner_id: contact_reads.list_contacts_page(db, owner_id, limit=10),
+    lambda db, owner_id: contact_reads.list_contacts_page(db, owner_id, cursor="WyJEb2UiLDVd", limit=10),
+    lambda db, owner_id: contact_reads.upcoming_birthdays(db, owner_id, date(2024, 6, 1), days=7),
+    lambda db, owner_id: contact_reads.upcoming_birthdays(db, owner_id, date(2024, 12, 28), days=7),
+    lambda db, owner_id: contact_reads.search_contacts(db, owner_id, "doe"),
+], ids=[
+    "by_id", "birthdays_on", "export", "search", "offset_page", "cursor_first_page", "cursor_next_page",
+    "birthdays", "birthdays_new_year", "records_search",
+])
+async def test_repository_queries_use_an_index(session, owner, captured_statements, query):
+    captured_statements.clear()
+
+    await query(session, owner.id)
+
+    await assert_uses_index(session, captured_statements)
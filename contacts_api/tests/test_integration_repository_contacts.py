@@ -0,0 +1,246 @@
+import pytest
+from datetime import date
+from sqlalchemy import event, insert, select
+
+from src.database import models
+from src.repository import contact_reads, contacts, search
+from src.repository.pagination import encode_cursor
+from src.schemas import ContactCreate, ContactPatch
+
+
+@pytest.fixture
+def captured_writes(async_engine):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+    yield statements
+    event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+
+
+async def seed_contacts(session, owner_id, count):
+    await session.execute(insert(models.Contact), [
+        {
+            "first_name": f"First {i}",
+            "last_name": f"Last {i % 7}",
+            "email": f"contact{i}@example.com",
+            "phone_number": "123456789",
+            "birthday": date(1990, 1 + i % 12, 1 + i % 28),
+            "owner_id": owner_id,
+        }
+        for i in range(count)
+    ])
+    await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_list_contacts_page_walks_all_contacts_in_order(session, owner):
+    await seed_contacts(session, owner.id, 25)
+    await seed_contacts(session, owner.id + 1, 5)
+
+    seen, cursor = [], None
+    while True:
+        page = await contact_reads.list_contacts_page(session, owner.id, cursor=cursor, limit=10)
+        seen.extend(page["items"])
+        if (cursor := page["next_cursor"]) is None:
+            break
+
+    assert len(seen) == 25
+    assert all(record["owner_id"] == owner.id for record in seen)
+    keys = [(record["last_name"], record["id"]) for record in seen]
+    assert keys == sorted(keys)
+
+
+@pytest.mark.asyncio
+# Not base64, a single value, ["a", "b"], ["Doe", true]
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "WyJhIl0", "WyJhIiwiYiJd", "WyJEb2UiLHRydWVd"])
+async def test_list_contacts_page_rejects_malformed_cursor(session, owner, cursor):
+    with pytest.raises(ValueError):
+        await contact_reads.list_contacts_page(session, owner.id, cursor=cursor)
+
+
+@pytest.mark.asyncio
+async def test_contact_reads_return_column_records_without_orm_instances(session, owner):
+    await seed_contacts(session, owner.id, 25)
+    await seed_contacts(session, owner.id + 1, 5)
+    session.expunge_all()
+
+    records = await contact_reads.list_contacts(session, owner.id, skip=5, limit=10)
+    page = await contact_reads.list_contacts_page(session, owner.id, limit=10)
+
+    assert len(records) == 10
+    assert set(records[0]) == {"id", "first_name", "last_name", "email", "phone_number", "birthday", "owner_id"}
+    assert isinstance(records[0]["birthday"], date)
+    assert set(page["items"][0]) == set(records[0])
+    assert not session.identity_map
+
+
+@pytest.mark.asyncio
+async def test_search_contacts_ranks_and_paginates(session, owner):
+    await seed_contacts(session, owner.id, 30)
+    await seed_contacts(session, owner.id + 1, 30)
+
+    exact, _ = await search.search_contacts(session, owner.id, "contact12@example.com")
+    assert exact[0].email == "contact12@example.com"
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = await search.search_contacts(session, owner.id, "Last 3", limit=2, cursor=cursor)
+        seen.extend(page)
+        if cursor is None:
+            break
+    assert sorted(contact.id for contact in seen) == sorted({contact.id for contact in seen})
+    assert {contact.last_name for contact in seen} >= {"Last 3"}
+    assert all(contact.owner_id == owner.id for contact in seen)
+
+
+@pytest.mark.asyncio
+async def test_search_contacts_checks_cursor_types(session, owner):
+    await seed_contacts(session, owner.id, 5)
+    with pytest.raises(ValueError):
+        # ["a", 1]: the score must be a number
+        await search.search_contacts(session, owner.id, "Last", cursor=encode_cursor("a", 1))
+    with pytest.raises(ValueError):
+        await search.search_contacts(session, owner.id, "Last", cursor=encode_cursor(0.5, "1"))
+
+    # JSON may carry a whole score without its fraction
+    found, _ = await search.search_contacts(session, owner.id, "Last", cursor=encode_cursor(1, 0))
+    assert found
+
+
+@pytest.mark.asyncio
+async def test_search_index_is_rebuilt_after_writes(session, owner):
+    assert (await search.search_contacts(session, owner.id, "Zelda"))[0] == []
+
+    await contacts.create_contact(session, ContactCreate(
+        first_name="Zelda", last_name="Hyrule", email="zelda@example.com", phone_number="1", birthday=date(1986, 2, 21),
+    ), owner.id)
+
+    found, _ = await search.search_contacts(session, owner.id, "zeld")
+    assert [contact.first_name for contact in found] == ["Zelda"]
+
+
+
+@pytest.mark.asyncio
+async def test_search_finds_queries_with_repeated_trigrams(session, owner):
+    await contacts.create_contact(session, ContactCreate(
+        first_name="Baaaab", last_name="Hyrule", email="b@example.com", phone_number="1", birthday=date(1986, 2, 21),
+    ), owner.id)
+
+    found, _ = await search.search_contacts(session, owner.id, "aaaa")
+    assert [contact.first_name for contact in found] == ["Baaaab"]
+
+async def add_birthdays(session, owner_id, *birthdays):
+    await session.execute(insert(models.Contact), [
+        {"first_name": f"Born {day}", "last_name": "B", "email": f"{day}@example.com", "phone_number": "1", "birthday": day, "owner_id": owner_id}
+        for day in birthdays
+    ])
+    await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_upcoming_birthdays_ignores_year_and_wraps_around_new_year(session, owner):
+    await add_birthdays(session, owner.id, date(1980, 12, 30), date(1995, 1, 2), date(2001, 1, 10), date(1970, 6, 1))
+
+    upcoming = await contact_reads.upcoming_birthdays(session, owner.id, date(2024, 12, 28), days=7)
+
+    assert [record["birthday"] for record in upcoming] == [date(1980, 12, 30), date(1995, 1, 2)]
+
+
+@pytest.mark.asyncio
+async def test_upcoming_birthdays_reports_feb_29_on_feb_28_of_common_years(session, owner):
+    await add_birthdays(session, owner.id, date(2000, 2, 29))
+
+    assert await contact_reads.upcoming_birthdays(session, owner.id, date(2023, 2, 21), days=7)
+    assert not await contact_reads.upcoming_birthdays(session, owner.id, date(2024, 2, 21), days=7)
+    assert await contact_reads.upcoming_birthdays(session, owner.id, date(2024, 2, 22), days=7)
+
+
+@pytest.mark.asyncio
+async def test_contact_reads_search_matches_the_orm_search(session, owner):
+    await seed_contacts(session, owner.id, 40)
+    await seed_contacts(session, owner.id + 1, 5)
+    session.expunge_all()
+
+    found, cursor = await contact_reads.search_contacts(session, owner.id, "Last 3", limit=3)
+    orm_found, orm_cursor = await search.search_contacts(session, owner.id, "Last 3", limit=3)
+    assert [record["id"] for record in found] == [contact.id for contact in orm_found]
+    assert cursor == orm_cursor
+    more, _ = await contact_reads.search_contacts(session, owner.id, "Last 3", limit=3, cursor=cursor)
+    assert more and not {record["id"] for record in more} & {record["id"] for record in found}
+
+    session.expunge_all()
+    await contact_reads.upcoming_birthdays(session, owner.id, date(2024, 12, 20), days=30)
+    await contact_reads.search_contacts(session, owner.id, "Last 3")
+    assert not session.identity_map
+
+
+@pytest.mark.asyncio
+async def test_birthdays_on_streams_contacts_of_all_users(session, owner):
+    other = models.User(email="other@example.com", username="other", password="hash", confirmed=True)
+    session.add(other)
+    await session.commit()
+    await add_birthdays(session, owner.id, date(1990, 2, 28), date(1992, 2, 29), date(1990, 3, 1))
+    await add_birthdays(session, other.id, date(1985, 2, 28))
+
+    found = [contact async for contact in contacts.birthdays_on(session, date(2023, 2, 28), batch_size=2)]
+
+    assert sorted((contact.owner.email, contact.birthday) for contact in found) == [
+        ("other@example.com", date(1985, 2, 28)),
+        ("owner@example.com", date(1990, 2, 28)),
+        ("owner@example.com", date(1992, 2, 29)),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_update_contacts_applies_each_patch_to_owned_contacts_only(session, owner, captured_writes):
+    await seed_contacts(session, owner.id, 3)
+    await seed_contacts(session, owner.id + 1, 1)
+    mine = (await session.scalars(select(models.Contact.id).where(models.Contact.owner_id == owner.id).order_by(models.Contact.id))).all()
+    captured_writes.clear()
+
+    updated = await contacts.update_contacts(session, owner.id, {
+        mine[0]: {"first_name": "Ann"},
+        mine[1]: {"email": "bob@example.com", "birthday": date(2000, 2, 29)},
+        4: {"first_name": "Mallory"},
+        999: {"first_name": "Nobody"},
+    })
+
+    assert len(captured_writes) == 1
+    assert sorted(updated) == mine[:2]
+    assert (updated[mine[0]].first_name, updated[mine[0]].email) == ("Ann", "contact0@example.com")
+    assert (updated[mine[1]].first_name, updated[mine[1]].birthday) == ("First 1", date(2000, 2, 29))
+    assert await session.scalar(select(models.Contact.first_name).where(models.Contact.id == 4)) == "First 0"
+
+
+@pytest.mark.asyncio
+async def test_delete_contacts_deletes_owned_contacts_only(session, owner, captured_writes):
+    await seed_contacts(session, owner.id, 3)
+    await seed_contacts(session, owner.id + 1, 1)
+    captured_writes.clear()
+
+    deleted = await contacts.delete_contacts(session, owner.id, [1, 2, 4, 999])
+
+    # One DELETE for all contacts, plus the owner's contact counter
+    assert [statement.split()[0] for statement in captured_writes] == ["DELETE", "UPDATE"]
+    assert sorted(deleted) == [1, 2]
+    remaining = (await session.scalars(select(models.Contact.id).order_by(models.Contact.id))).all()
+    assert remaining == [3, 4]
+
+
+@pytest.mark.asyncio
+async def test_update_and_delete_contact_are_scoped_to_the_owner(session, owner, captured_writes):
+    await seed_contacts(session, owner.id, 1)
+    await seed_contacts(session, owner.id + 1, 1)
+    captured_writes.clear()
+
+    assert await contacts.update_contact(session, 2, ContactPatch(first_name="Mallory"), owner.id) is None
+    assert await contacts.delete_contact(session, 2, owner.id) is None
+    patched = await contacts.update_contact(session, 1, ContactPatch(first_name="Ann"), owner.id)
+
+    assert len(captured_writes) == 3
+    assert (patched.first_name, patched.email) == ("Ann", "contact0@example.com")
+    other = await session.scalar(select(models.Contact).where(models.Contact.id == 2))
+    assert other.first_name == "First 0"
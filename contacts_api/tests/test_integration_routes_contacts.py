@@ -0,0 +1,128 @@
+import asyncio
+
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.database import db, models
+from src.database.db import Base
+from src.routes import contacts
+from src.services import response_cache
+from src.services.auth import auth_service
+
+CONTACT = {"first_name": "Ann", "last_name": "Smith", "email": "ann@example.com", "phone_number": "123", "birthday": "1990-01-02"}
+
+
+@pytest_asyncio.fixture
+async def file_engine(tmp_path):
+    # A database file, so that concurrent requests use separate connections and transactions
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'contacts.db'}", connect_args={"timeout": 30})
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def client(file_engine):
+    session_factory = async_sessionmaker(file_engine, expire_on_commit=False)
+    async with session_factory() as session:
+        user = models.User(email="owner@example.com", username="owner", password="hash", confirmed=True, contact_quota=10)
+        session.add(user)
+        await session.commit()
+
+    async def get_db():
+        async with session_factory() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(contacts.router, prefix="/contacts")
+    app.dependency_overrides[db.get_db] = get_db
+    app.dependency_overrides[auth_service.get_current_user] = lambda: user
+    for route in app.routes:
+        for dependency in getattr(route, "dependencies", []):
+            # Rate limiting is not under test and needs Redis
+            app.dependency_overrides[dependency.dependency] = lambda: None
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        client.user = user
+        client.session_factory = session_factory
+        yield client
+
+
+@pytest.mark.asyncio
+async def test_concurrent_creations_stop_exactly_at_the_quota(client):
+    responses = await asyncio.gather(*(client.post("/contacts/", json=dict(CONTACT, email=f"c{i}@example.com")) for i in range(50)))
+
+    assert sorted(response.status_code for response in responses) == [200] * 10 + [400] * 40
+    async with client.session_factory() as session:
+        count = await session.scalar(select(func.count()).select_from(models.Contact))
+        user = await session.get(models.User, client.user.id)
+    assert count == user.contact_count == 10
+
+
+@pytest.mark.asyncio
+async def test_deleting_a_contact_frees_quota(client):
+    created = [(await client.post("/contacts/", json=CONTACT)).json() for _ in range(10)]
+    assert (await client.post("/contacts/", json=CONTACT)).status_code == 400
+
+    response = await client.request("DELETE", "/contacts/batch", json={"ids": [created[0]["id"], created[1]["id"]]})
+    assert [outcome["status"] for outcome in response.json()] == ["deleted", "deleted"]
+    assert (await client.delete(f"/contacts/contacts/{created[2]['id']}")).status_code == 200
+
+    statuses = [(await client.post("/contacts/", json=CONTACT)).status_code for _ in range(4)]
+    assert statuses == [200, 200, 200, 400]
+
+
+@pytest.mark.asyncio
+async def test_reads_are_cached_with_etags_until_a_write(client):
+    created = (await client.post("/contacts/", json=CONTACT)).json()
+    hits = response_cache.counters["hits"]
+
+    first = await client.get("/contacts/", params={"limit": 5, "skip": 0})
+    again = await client.get("/contacts/", params={"skip": 0, "limit": 5})
+    not_modified = await client.get("/contacts/?limit=5&skip=0", headers={"If-None-Match": first.headers["etag"]})
+
+    assert first.status_code == again.status_code == 200
+    assert again.content == first.content and again.headers["etag"] == first.headers["etag"]
+    assert response_cache.counters["hits"] == hits + 1
+    assert not_modified.status_code == 304 and not_modified.content == b""
+
+    await client.patch(f"/contacts/contacts/{created['id']}", json={"first_name": "Anna"})
+    changed = await client.get("/contacts/?limit=5&skip=0", headers={"If-None-Match": first.headers["etag"]})
+
+    assert changed.status_code == 200 and changed.headers["etag"] != first.headers["etag"]
+    assert changed.json()[0]["first_name"] == "Anna"
+
+
+@pytest.mark.asyncio
+async def test_read_contact_is_scoped_to_the_owner(client):
+    async with client.session_factory() as session:
+        other = models.User(email="other@example.com", username="other", password="hash")
+        session.add(other)
+        await session.flush()
+        contact = models.Contact(**dict(CONTACT, birthday=None), owner_id=other.id)
+        session.add(contact)
+        await session.commit()
+
+    assert (await client.get(f"/contacts/{contact.id}")).status_code == 404
+    # A wildcard ETag must not turn a missing contact into 304 Not Modified
+    assert (await client.get(f"/contacts/{contact.id}", headers={"If-None-Match": "*"})).status_code == 404
+    assert (await client.get("/contacts/999", headers={"If-None-Match": "*"})).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_import_rejects_bodies_over_the_limit(client, monkeypatch):
+    monkeypatch.setattr(contacts.settings, "IMPORT_MAX_BYTES", 16)
+    body = b"first_name,last_name\nAnn,Smith\n"
+
+    response = await client.post("/contacts/import", content=body, headers={"content-type": "text/csv"})
+
+    async def chunks():
+        yield body
+
+    streamed = await client.post("/contacts/import", content=chunks(), headers={"content-type": "text/csv"})
+
+    assert response.status_code == streamed.status_code == 413
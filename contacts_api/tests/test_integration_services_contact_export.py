@@ -0,0 +1,87 @@
+import csv
+import io
+import os
+from datetime import date
+
+import orjson
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.database import models
+from src.services import contact_export
+
+
+async def export(async_engine, owner, format, batch_size=1000):
+    chunks = contact_export.export_contacts(async_sessionmaker(async_engine), owner.id, format, batch_size)
+    return "".join([chunk.decode() if isinstance(chunk, bytes) else chunk async for chunk in chunks])
+
+
+@pytest.fixture
+def contacts(session, owner):
+    async def add():
+        session.add_all([
+            models.Contact(first_name="Zoë", last_name="Adams", email="zoe@example.com", phone_number="+48 123", birthday=date(1990, 2, 3), owner_id=owner.id),
+            models.Contact(first_name="Bob, Jr.", last_name="Brown;Black", email="bob@example.com", phone_number="456", birthday=date(1985, 12, 31), owner_id=owner.id),
+        ])
+        await session.commit()
+    return add
+
+
+@pytest.mark.asyncio
+async def test_export_csv(async_engine, owner, contacts):
+    await contacts()
+
+    rows = list(csv.DictReader(io.StringIO(await export(async_engine, owner, "csv", batch_size=1))))
+
+    assert [(row["first_name"], row["last_name"], row["birthday"]) for row in rows] == [
+        ("Zoë", "Adams", "1990-02-03"),
+        ("Bob, Jr.", "Brown;Black", "1985-12-31"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_export_ndjson(async_engine, owner, contacts):
+    await contacts()
+
+    rows = [orjson.loads(line) for line in (await export(async_engine, owner, "ndjson")).splitlines()]
+
+    assert [row["email"] for row in rows] == ["zoe@example.com", "bob@example.com"]
+    assert rows[0]["birthday"] == "1990-02-03"
+
+
+@pytest.mark.asyncio
+async def test_export_vcard_escapes_values(async_engine, owner, contacts):
+    await contacts()
+
+    body = await export(async_engine, owner, "vcard")
+
+    assert body.count("BEGIN:VCARD\r\nVERSION:4.0\r\n") == 2
+    assert "N:Brown\\;Black;Bob\\, Jr.;;;\r\n" in body
+    assert "BDAY:19900203\r\n" in body and body.endswith("END:VCARD\r\n")
+
+
+def rss() -> int:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not os.path.exists("/proc/self/statm"), reason="needs /proc to read the RSS")
+async def test_export_of_1m_contacts_keeps_rss_flat(async_engine, owner):
+    async with async_engine.begin() as connection:
+        # Generate the rows in the database, building them in Python would dominate the test
+        await connection.execute(text(
+            "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 1000000) "
+            "INSERT INTO contacts (first_name, last_name, email, phone_number, birthday, owner_id) "
+            "SELECT 'First' || i, 'Last' || i, 'c' || i || '@example.com', '+48 600 000 000', '1990-01-01', :owner_id FROM n"
+        ), {"owner_id": owner.id})
+    baseline = peak = rss()
+    size = 0
+    async for chunk in contact_export.export_contacts(async_sessionmaker(async_engine), owner.id, "csv", 1000):
+        size += len(chunk)
+        peak = max(peak, rss())
+
+    assert size > 60_000_000
+    # Holding the export (or the rows) in memory would take several hundred MB
+    assert peak - baseline < 32 * 1024 * 1024
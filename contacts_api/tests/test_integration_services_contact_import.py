@@ -0,0 +1,116 @@
+import pytest
+from sqlalchemy import select
+
+from src.database import models
+from src.repository import contacts
+from src.schemas import ContactCreate
+from src.services import contact_import
+
+
+async def stream(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+async def collect(iterator):
+    return [item async for item in iterator]
+
+
+@pytest.mark.asyncio
+async def test_iter_lines_handles_chunk_boundaries():
+    lines = await collect(contact_import.iter_lines(stream(b"first,Zo", "ë\r\nsec".encode()[:-1], b"c\nlast")))
+
+    assert lines == ["first,Zoë", "sec", "last"]
+
+
+@pytest.mark.asyncio
+async def test_iter_csv_rows_joins_quoted_multiline_fields():
+    body = b'first_name,last_name\nAnn,"Smith, Jr."\n"Bob\nBobby",Brown\nonly one field\n'
+
+    rows = await collect(contact_import.iter_csv_rows(contact_import.iter_lines(stream(body))))
+
+    assert rows == [
+        {"first_name": "Ann", "last_name": "Smith, Jr."},
+        {"first_name": "Bob\nBobby", "last_name": "Brown"},
+        "Expected 2 fields, got 1",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_iter_lines_drops_lines_over_the_limit():
+    lines = await collect(contact_import.iter_lines(stream(b"short\nmuch ", b"too long", b"\nok\n", b"x" * 9), max_line=8))
+
+    assert lines == ["short", None, "ok", None]
+
+
+@pytest.mark.asyncio
+async def test_iter_lines_rejects_bodies_over_the_limit():
+    with pytest.raises(contact_import.BodyTooLarge):
+        await collect(contact_import.iter_lines(stream(b"a\n" * 4, b"b\n"), max_bytes=9))
+
+
+@pytest.mark.asyncio
+async def test_iter_csv_rows_reports_records_over_the_limit():
+    body = b'first_name,last_name\n"' + b"x\n" * 20 + b'",Brown\nAnn,Smith\n"unterminated\n'
+
+    rows = await collect(contact_import.iter_csv_rows(contact_import.iter_lines(stream(body)), max_record=30))
+
+    assert rows == ["Record longer than 30 characters", {"first_name": "Ann", "last_name": "Smith"}, "Unterminated quoted field"]
+
+
+@pytest.mark.asyncio
+async def test_import_contacts_from_csv_reports_row_errors(session, owner):
+    body = (
+        b"first_name,last_name,email,phone_number,birthday\n"
+        b"Ann,Smith,ann@example.com,123,1990-01-02\n"
+        b"Bob,Brown,bob@example.com,456,not a date\n"
+        b"Cid,Moe,cid@example.com,789,1985-12-31\n"
+    )
+    rows = contact_import.iter_csv_rows(contact_import.iter_lines(stream(body)))
+
+    result = await contact_import.import_contacts(session, owner.id, rows, quota=100, chunk_size=2)
+
+    assert (result["imported"], result["failed"]) == (2, 1)
+    [error] = result["errors"]
+    assert error["row"] == 2 and error["errors"][0].startswith("birthday:")
+    names = (await session.scalars(select(models.Contact.first_name).where(models.Contact.owner_id == owner.id))).all()
+    assert sorted(names) == ["Ann", "Cid"]
+
+
+@pytest.mark.asyncio
+async def test_import_contacts_from_ndjson_enforces_quota(session, owner):
+    lines = [
+        b'{"first_name": "C%d", "last_name": "L", "email": "c%d@example.com", "phone_number": "1", "birthday": "1990-01-01"}' % (i, i)
+        for i in range(5)
+    ]
+    body = b"\n".join(lines[:2] + [b"{broken"] + lines[2:]) + b"\n"
+    rows = contact_import.iter_ndjson_rows(contact_import.iter_lines(stream(body)))
+
+    result = await contact_import.import_contacts(session, owner.id, rows, quota=3, chunk_size=4)
+
+    assert (result["imported"], result["failed"]) == (3, 3)
+    assert result["errors"][0]["row"] == 3 and result["errors"][0]["errors"][0].startswith("Invalid JSON")
+    assert result["errors"][1:] == [
+        {"row": 5, "errors": [contact_import.QUOTA_EXCEEDED]},
+        {"row": 6, "errors": [contact_import.QUOTA_EXCEEDED]},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_import_contacts_holds_no_transaction_while_reading_the_upload(session, owner):
+    contact = {"first_name": "C", "last_name": "L", "email": "c@example.com", "phone_number": "1", "birthday": "1990-01-01"}
+
+    async def slow_upload():
+        for _ in range(2):
+            yield contact
+        # The first chunk is committed: no lock on the user row while the client is slow
+        assert not session.in_transaction()
+        # Another request of the same user takes the last contact of the quota meanwhile
+        await contacts.create_contact(session, ContactCreate(**contact), owner.id, quota=3)
+        for _ in range(2):
+            yield contact
+
+    result = await contact_import.import_contacts(session, owner.id, slow_upload(), quota=3, chunk_size=2)
+
+    assert (result["imported"], result["failed"]) == (2, 2)
+    assert await session.scalar(select(models.User.contact_count).where(models.User.id == owner.id)) == 3
@@ -0,0 +1,35 @@
+import pytest
+from datetime import date, datetime
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.database import models
+from src.services.mailer import Mailer, SMTPPool
+from src.services.reminders import seconds_until, send_birthday_reminders
+
+
+@pytest.mark.asyncio
+async def test_send_birthday_reminders_notifies_owners(async_engine, session, owner, smtp_server):
+    unconfirmed = models.User(email="new@example.com", username="new", password="hash", confirmed=False)
+    session.add(unconfirmed)
+    await session.commit()
+    await session.execute(insert(models.Contact), [
+        {"first_name": "Ann", "last_name": "Smith", "email": "ann@example.com", "phone_number": "1", "birthday": date(1990, 6, 21), "owner_id": owner.id},
+        {"first_name": "Bob", "last_name": "Brown", "email": "bob@example.com", "phone_number": "1", "birthday": date(1985, 6, 22), "owner_id": owner.id},
+        {"first_name": "Cid", "last_name": "Moe", "email": "cid@example.com", "phone_number": "1", "birthday": date(1970, 6, 21), "owner_id": unconfirmed.id},
+    ])
+    await session.commit()
+    mailer = Mailer(SMTPPool(smtp_server.hostname, smtp_server.port, use_tls=False, start_tls=False), sender="noreply@example.com")
+
+    sent, failed = await send_birthday_reminders(date(2024, 6, 21), async_sessionmaker(async_engine), mailer)
+    await mailer.close()
+
+    assert (sent, failed) == (1, 0)
+    [envelope] = smtp_server.handler.messages
+    assert envelope.rcpt_tos == ["owner@example.com"]
+    assert b"Ann Smith" in envelope.content
+
+
+def test_seconds_until_next_run():
+    assert seconds_until(8, datetime(2024, 6, 21, 7, 30)) == 1800
+    assert seconds_until(8, datetime(2024, 6, 21, 8, 0)) == 24 * 3600
@@ -0,0 +1,58 @@
+import logging
+
+import pytest
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from src.database import models, query_log
+
+
+def test_normalize_statement_strips_values():
+    statement = """SELECT contacts.id
+        FROM contacts WHERE contacts.owner_id = $1 AND contacts.email = 'bob@example.com'
+        AND contacts.id IN (?, ?, ?) AND contacts.birthday_key > 229 AND contacts.first_name::text = :first_name"""
+
+    assert query_log.normalize_statement(statement) == (
+        "SELECT contacts.id FROM contacts WHERE contacts.owner_id = ? AND contacts.email = ? "
+        "AND contacts.id IN (...) AND contacts.birthday_key > ? AND contacts.first_name::text = ?"
+    )
+
+
+def test_redact_parameters_keeps_only_types():
+    assert query_log.redact_parameters(("bob@example.com", 7)) == ["str", "int"]
+    assert query_log.redact_parameters({"email": "bob@example.com"}) == {"email": "str"}
+    assert query_log.redact_parameters([("a",), ("b",)], executemany=True) == "<2 parameter sets>"
+
+
+def test_slow_statements_are_logged_without_their_values(caplog):
+    engine = create_engine("sqlite://")
+    query_log.instrument_engine(engine, threshold_ms=0)
+    with caplog.at_level(logging.WARNING, logger=query_log.__name__), engine.connect() as connection:
+        connection.execute(text("SELECT :email AS email"), {"email": "secret@example.com"})
+
+    [record] = caplog.records
+    assert record.getMessage().startswith("Slow query (")
+    assert "SELECT ? AS email" in record.getMessage()
+    assert "secret@example.com" not in record.getMessage()
+
+
+@pytest.mark.asyncio
+async def test_statements_repeated_within_a_request_are_reported(caplog):
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    query_log.instrument_engine(engine.sync_engine, threshold_ms=None)
+    async with engine.begin() as connection:
+        await connection.run_sync(models.Base.metadata.create_all)
+    try:
+        with caplog.at_level(logging.WARNING, logger=query_log.__name__):
+            async with engine.connect() as connection:
+                with query_log.track_queries("GET /contacts/", threshold=3) as queries:
+                    for contact_id in range(5):
+                        await connection.execute(select(models.Contact).where(models.Contact.id == contact_id))
+                    await connection.execute(select(models.User))
+    finally:
+        await engine.dispose()
+
+    assert sorted(queries.values()) == [1, 5]
+    [record] = caplog.records
+    assert record.getMessage().startswith("Possible N+1 query in GET /contacts/: executed 5 times: SELECT contacts.id")
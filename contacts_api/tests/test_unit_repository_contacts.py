@@ -1,19 +1,22 @@
 import unittest
-from unittest.mock import MagicMock
-from sqlalchemy.orm import Session
+from unittest.mock import AsyncMock, MagicMock, patch
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
 
 import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from src.repository import contacts
+from src.config import settings
+from src.repository import contact_reads, contacts, search
 from src.database import models
-from src.schemas import ContactCreate, ContactUpdate
+from src.schemas import ContactCreate, ContactPatch, ContactUpdate
 
-class TestContactsRepository(unittest.TestCase):
+class TestContactsRepository(unittest.IsolatedAsyncioTestCase):
 
     def setUp(self):
-        self.db = MagicMock(spec=Session)
+        self.db = AsyncMock(spec=AsyncSession)
+        self.db.add = MagicMock()
         self.contact_data = ContactCreate(
             first_name="John",
             last_name="Doe",
@@ -29,14 +32,14 @@ class TestContactsRepository(unittest.TestCase):
             birthday="1991-02-02"
         )
 
-    def test_create_contact(self):
+    async def test_create_contact(self):
         user_id = 1
         result_contact = models.Contact(**self.contact_data.model_dump(), owner_id=user_id)
         self.db.add.return_value = None
         self.db.commit.return_value = None
         self.db.refresh.return_value = None
         
-        created_contact = contacts.create_contact(self.db, self.contact_data, user_id)
+        created_contact = await contacts.create_contact(self.db, self.contact_data, user_id)
         
         self.db.add.assert_called_once()
         self.db.commit.assert_called_once()
@@ -48,56 +51,101 @@ class TestContactsRepository(unittest.TestCase):
         self.assertEqual(created_contact.phone_number, self.contact_data.phone_number)
         self.assertEqual(created_contact.birthday, self.contact_data.birthday)
 
-    def test_get_contacts(self):
-        user_id = 1
-        mock_contacts = [models.Contact(id=i, first_name=f"Contact {i}", last_name=f"Last {i}", owner_id=user_id) for i in range(10)]
-        self.db.query.return_value.filter.return_value.offset.return_value.limit.return_value.all.return_value = mock_contacts
+    async def test_create_contact_over_quota(self):
+        self.db.scalar.return_value = None
         
-        contacts_list = contacts.get_contacts(self.db, user_id, skip=0, limit=10)
+        with self.assertRaises(contacts.QuotaExceeded):
+            await contacts.create_contact(self.db, self.contact_data, 1)
         
-        self.db.query.assert_called_once_with(models.Contact)
-        self.db.query.return_value.filter.assert_called_once()
-        self.assertEqual(contacts_list, mock_contacts)
+        statement = str(self.db.scalar.await_args.args[0])
+        self.assertTrue(statement.startswith("UPDATE users SET contact_count="))
+        self.db.add.assert_not_called()
+        self.db.commit.assert_not_called()
+
+    async def test_list_contacts(self):
+        user_id = 1
+        # Columns in the order of contact_reads.FIELDS
+        rows = [(f"Contact {i}", f"Last {i}", None, None, None, i, user_id) for i in range(10)]
+        self.db.execute.return_value = rows
+
+        contacts_list = await contact_reads.list_contacts(self.db, user_id, skip=0, limit=10)
+
+        self.db.execute.assert_awaited_once()
+        self.assertEqual([contact["id"] for contact in contacts_list], list(range(10)))
+        self.assertEqual(set(contacts_list[0]), set(contact_reads.FIELDS))
 
-    def test_get_contact(self):
+    async def test_get_contact(self):
         contact_id = 1
         mock_contact = models.Contact(id=contact_id, first_name="Contact", last_name="1", owner_id=1)
-        self.db.query.return_value.filter.return_value.first.return_value = mock_contact
+        self.db.scalar.return_value = mock_contact
         
-        fetched_contact = contacts.get_contact(self.db, contact_id)
+        fetched_contact = await contacts.get_contact(self.db, contact_id)
         
-        self.db.query.assert_called_once_with(models.Contact)
-        self.db.query.return_value.filter.assert_called_once()
+        self.db.scalar.assert_awaited_once()
         self.assertEqual(fetched_contact, mock_contact)
 
-    def test_update_contact(self):
+    async def test_update_contact(self):
         contact_id = 1
-        mock_contact = models.Contact(id=contact_id, first_name="Contact", last_name="1", owner_id=1)
-        self.db.query.return_value.filter.return_value.first.return_value = mock_contact
+        mock_contact = models.Contact(id=contact_id, **self.contact_update_data.model_dump(), owner_id=1)
+        self.db.scalar.return_value = mock_contact
         
-        updated_contact = contacts.update_contact(self.db, contact_id, self.contact_update_data)
+        updated_contact = await contacts.update_contact(self.db, contact_id, self.contact_update_data, 1)
         
+        self.db.scalar.assert_awaited_once()
+        statement = str(self.db.scalar.await_args.args[0])
+        self.assertTrue(statement.startswith("UPDATE contacts SET"))
+        self.assertIn("contacts.owner_id = :owner_id_1", statement)
+        self.assertIn("RETURNING", statement)
         self.db.commit.assert_called_once()
-        self.db.refresh.assert_called_once()
-        self.assertEqual(updated_contact.first_name, self.contact_update_data.first_name)
-        self.assertEqual(updated_contact.last_name, self.contact_update_data.last_name)
-        self.assertEqual(updated_contact.email, self.contact_update_data.email)
-        self.assertEqual(updated_contact.phone_number, self.contact_update_data.phone_number)
-        self.assertEqual(updated_contact.birthday, self.contact_update_data.birthday)
+        self.db.refresh.assert_not_called()
+        self.assertEqual(updated_contact, mock_contact)
+
+    async def test_patch_contact_writes_only_given_fields(self):
+        self.db.scalar.return_value = models.Contact(id=1, first_name="Jane", owner_id=1)
+        
+        await contacts.update_contact(self.db, 1, ContactPatch(first_name="Jane"), 1)
+        
+        statement = str(self.db.scalar.await_args.args[0])
+        self.assertIn("SET first_name=:first_name WHERE", statement)
 
-    def test_delete_contact(self):
+    async def test_update_contact_of_another_user(self):
+        self.db.scalar.return_value = None
+        
+        updated_contact = await contacts.update_contact(self.db, 1, self.contact_update_data, 2)
+        
+        self.assertIsNone(updated_contact)
+
+    async def test_delete_contact(self):
         contact_id = 1
         mock_contact = models.Contact(id=contact_id, first_name="Contact", last_name="1", owner_id=1)
-        self.db.query.return_value.filter.return_value.first.return_value = mock_contact
+        self.db.scalar.return_value = mock_contact
         
-        deleted_contact = contacts.delete_contact(self.db, contact_id)
+        deleted_contact = await contacts.delete_contact(self.db, contact_id, 1)
         
-        self.db.query.assert_called_once_with(models.Contact)
-        self.db.query.return_value.filter.assert_called_once()
-        self.db.delete.assert_called_once_with(mock_contact)
+        self.db.scalar.assert_awaited_once()
+        statement = str(self.db.scalar.await_args.args[0])
+        self.assertTrue(statement.startswith("DELETE FROM contacts WHERE"))
+        self.assertIn("contacts.owner_id = :owner_id_1", statement)
+        self.db.delete.assert_not_called()
         self.db.commit.assert_called_once()
         self.assertEqual(deleted_contact, mock_contact)
 
+
+class TestPostgresqlSearch(unittest.IsolatedAsyncioTestCase):
+
+    async def test_similarity_threshold_is_applied_to_the_trigram_operator(self):
+        db = AsyncMock(spec=AsyncSession)
+        db.get_bind = MagicMock(return_value=MagicMock(dialect=postgresql.dialect()))
+        db.execute.return_value = []
+
+        with patch.object(settings, "SEARCH_SIMILARITY_THRESHOLD", 0.45):
+            await search.search_contacts(db, 1, "john")
+
+        (set_threshold, parameters), (query,) = (call.args for call in db.execute.call_args_list)
+        self.assertIn("pg_trgm.similarity_threshold", str(set_threshold))
+        self.assertEqual(parameters, {"threshold": "0.45"})
+        self.assertIn("%", str(query.compile(dialect=postgresql.dialect())))
+
 if __name__ == '__main__':
     unittest.main()
 
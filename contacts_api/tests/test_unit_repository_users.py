@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import MagicMock, AsyncMock
+from unittest.mock import MagicMock, AsyncMock, patch
 from fastapi import UploadFile
 
 import sys
@@ -12,7 +12,7 @@ from src.schemas import UserModel
 
 @pytest.fixture
 def db():
-    return MagicMock()
+    return AsyncMock()
 
 @pytest.fixture
 def user_data():
@@ -42,21 +42,23 @@ async def test_create_user_with_avatar(db, user_data):
     db.refresh = AsyncMock()
 
     avatar_file = MagicMock(spec=UploadFile)
-    avatar_file.file = MagicMock()
     user_data.avatar = avatar_file
 
-    await users.create_user(user_data, db)
+    with patch.object(users.avatars, "save_avatar", AsyncMock(return_value="/static/avatars/1-abc.webp")) as save_avatar:
+        new_user = await users.create_user(user_data, db)
 
     db.add.assert_called_once()
-    db.commit.assert_called_once()
     db.refresh.assert_called_once()
+    assert db.commit.await_count == 2
+    save_avatar.assert_awaited_once_with(new_user.id, avatar_file)
+    assert new_user.avatar == "/static/avatars/1-abc.webp"
 
 
 @pytest.mark.asyncio
 async def test_get_user_by_email(db):
     email = "john@example.com"
     mock_user = User(email=email, username="johndoe", password="securepwd")
-    db.query.return_value.filter.return_value.first.return_value = mock_user
+    db.scalar.return_value = mock_user
     result = await users.get_user_by_email(email, db)
     
     assert result == mock_user
@@ -66,7 +68,8 @@ async def test_get_user_by_email(db):
 async def test_update_token(db):
     mock_user = User(email="john@example.com", username="johndoe", password="securepwd", refresh_token=None)
     token = "new_refresh_token"
-    db.commit = MagicMock()
     
-    await users.update_token(mock_user, token, db)
-    assert mock_user.refresh_token == token
\ No newline at end of file
+    with patch.object(users.user_cache, "invalidate_user", AsyncMock()) as invalidate_user:
+        await users.update_token(mock_user, token, db)
+    assert mock_user.refresh_token == token
+    invalidate_user.assert_awaited_once()
\ No newline at end of file
@@ -20,8 +20,8 @@ class TestAuthRoutes(unittest.TestCase):
     def _get_session(self):
         return SessionLocal()
 
-    @patch("src.routes.auth.send_email")
-    def test_create_user(self, mock_send_email):
+    @patch("src.routes.auth.jobs.enqueue")
+    def test_create_user(self, mock_enqueue):
         session = self._get_session()
         user = session.query(User).filter_by(email=self.user["email"]).first()
         if user:
@@ -36,6 +36,8 @@ class TestAuthRoutes(unittest.TestCase):
         data = response.json()
         self.assertEqual(data["user"]["email"], self.user.get("email"))
         self.assertIn("id", data["user"])
+        mock_enqueue.assert_awaited_once()
+        self.assertEqual(mock_enqueue.await_args.args[1], "send_email")
 
     def test_repeat_create_user(self):
         self.client.post("/api/auth/signup", json=self.user)
@@ -0,0 +1,77 @@
+import asyncio
+import time
+import pytest
+from jose import JWTError
+from passlib.context import CryptContext
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.auth import auth_service
+
+
+@pytest.mark.asyncio
+async def test_get_password_hash_uses_default_scheme():
+    password_hash = await auth_service.get_password_hash("zaq1@WSX")
+
+    assert auth_service.pwd_context.identify(password_hash) == auth_service.pwd_context.default_scheme()
+    assert await auth_service.verify_password("zaq1@WSX", password_hash)
+    assert not await auth_service.verify_password("wrong", password_hash)
+
+
+@pytest.mark.asyncio
+async def test_verify_and_update_password_rehashes_legacy_bcrypt():
+    legacy_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("zaq1@WSX")
+
+    verified, new_hash = await auth_service.verify_and_update_password("zaq1@WSX", legacy_hash)
+
+    assert verified
+    assert new_hash is not None
+    assert auth_service.pwd_context.identify(new_hash) == "argon2"
+    assert await auth_service.verify_and_update_password("zaq1@WSX", new_hash) == (True, None)
+
+
+@pytest.mark.asyncio
+async def test_hashing_does_not_block_event_loop():
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.001)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    await asyncio.gather(*(auth_service.get_password_hash("zaq1@WSX") for _ in range(4)))
+    elapsed = time.perf_counter() - started
+    task.cancel()
+
+    # The loop kept running while the hashes were computed in the thread pool
+    assert ticks >= elapsed * 1000 / 10
+
+
+@pytest.mark.asyncio
+async def test_decode_token_caches_verified_claims():
+    auth_service.token_cache.clear()
+    token = await auth_service.create_access_token(data={"sub": "john@example.com"})
+
+    first = auth_service.decode_token(token)
+    hits = auth_service.token_cache.hits
+    second = auth_service.decode_token(token)
+
+    assert first["sub"] == second["sub"] == "john@example.com"
+    assert auth_service.token_cache.hits == hits + 1
+
+
+@pytest.mark.asyncio
+async def test_decode_token_does_not_cache_invalid_tokens():
+    auth_service.token_cache.clear()
+    expired = await auth_service.create_access_token(data={"sub": "john@example.com"}, expires_delta=-10)
+
+    with pytest.raises(JWTError):
+        auth_service.decode_token(expired)
+    with pytest.raises(JWTError):
+        auth_service.decode_token(expired[:-2] + "xx")
+    assert len(auth_service.token_cache) == 0
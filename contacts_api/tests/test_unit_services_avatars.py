@@ -0,0 +1,88 @@
+import base64
+import io
+import httpx
+import pytest
+from unittest.mock import AsyncMock, patch
+from fastapi import FastAPI, File, UploadFile
+from PIL import Image
+
+from src.services import avatars
+
+
+def png(width=640, height=480, mode="RGB"):
+    output = io.BytesIO()
+    Image.new(mode, (width, height), "red").save(output, "PNG")
+    return output.getvalue()
+
+
+@pytest.mark.asyncio
+async def test_read_limited_rejects_oversized_uploads():
+    data = b"x" * (3 * avatars.CHUNK_SIZE)
+
+    assert await avatars.read_limited(UploadFile(io.BytesIO(data)), max_bytes=len(data)) == data
+    with pytest.raises(avatars.AvatarError):
+        await avatars.read_limited(UploadFile(io.BytesIO(data)), max_bytes=len(data) - 1)
+
+
+@pytest.mark.asyncio
+async def test_upload_limit_rejects_oversized_bodies_before_parsing():
+    app = FastAPI()
+    app.add_middleware(avatars.UploadLimitMiddleware, path="/upload", max_bytes=1000)
+    handled = []
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        handled.append(file.filename)
+
+    async def chunks(data):
+        for start in range(0, len(data), 100):
+            yield data[start:start + 100]
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        small = await client.post("/upload", files={"file": ("a.png", b"x" * 100)})
+        large = await client.post("/upload", files={"file": ("b.png", b"x" * 2000)})
+        # Without Content-Length, the body is cut off while it is received
+        body = b'--x\r\nContent-Disposition: form-data; name="file"; filename="c.png"\r\n\r\n' + b"x" * 2000 + b"\r\n--x--\r\n"
+        streamed = await client.post("/upload", content=chunks(body), headers={"content-type": "multipart/form-data; boundary=x"})
+
+    assert (small.status_code, large.status_code, streamed.status_code) == (200, 413, 413)
+    assert handled == ["a.png"]
+
+
+@pytest.mark.parametrize("mode", ["RGB", "RGBA", "P"])
+def test_resize_to_webp_makes_square_thumbnails(mode):
+    thumbnail = avatars.resize_to_webp(png(mode=mode), 128, 80)
+
+    with Image.open(io.BytesIO(thumbnail)) as image:
+        assert (image.format, image.size) == ("WEBP", (128, 128))
+
+
+def test_resize_to_webp_rejects_non_images():
+    with pytest.raises(avatars.AvatarError):
+        avatars.resize_to_webp(b"not an image", 128, 80)
+
+
+@pytest.mark.asyncio
+async def test_save_avatar_stores_thumbnail(tmp_path):
+    storage = avatars.LocalStorage(str(tmp_path), "/static/avatars/")
+
+    url = await avatars.save_avatar(7, UploadFile(io.BytesIO(png(2000, 1500))), storage)
+
+    [stored] = list(tmp_path.iterdir())
+    assert url == f"/static/avatars/{stored.name}"
+    assert stored.name.startswith("7-") and stored.suffix == ".webp"
+    assert len(stored.read_bytes()) < 20000
+
+
+@pytest.mark.asyncio
+async def test_store_avatar_job_persists_url(tmp_path):
+    storage = avatars.LocalStorage(str(tmp_path), "/static/avatars")
+    thumbnail = avatars.resize_to_webp(png(), 64, 80)
+    key = avatars.avatar_key(7, thumbnail)
+
+    with patch.object(avatars, "get_storage", return_value=storage), \
+            patch.object(avatars.repository_users, "update_avatar", AsyncMock()) as update_avatar:
+        await avatars.store_avatar("john@example.com", key, base64.b64encode(thumbnail).decode())
+
+    assert (tmp_path / key).read_bytes() == thumbnail
+    assert update_avatar.await_args.args[:2] == ("john@example.com", f"/static/avatars/{key}")
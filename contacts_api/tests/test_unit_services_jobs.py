@@ -0,0 +1,131 @@
+import asyncio
+import time
+import pytest
+from fakeredis import aioredis
+
+from src.config import settings
+from src.services import jobs
+
+
+@pytest.fixture
+def r():
+    return aioredis.FakeRedis()
+
+
+@pytest.fixture
+def calls():
+    calls = []
+
+    async def record(**kwargs):
+        calls.append(kwargs)
+
+    async def fail(**kwargs):
+        calls.append(kwargs)
+        raise RuntimeError("SMTP is down")
+
+    jobs.handlers.update(test_record=record, test_fail=fail)
+    yield calls
+    jobs.handlers.pop("test_record")
+    jobs.handlers.pop("test_fail")
+
+
+async def make_worker(r, consumer="worker-1", **options):
+    worker = jobs.Worker(r, consumer, block_ms=1, **options)
+    await worker.ensure_group()
+    return worker
+
+
+@pytest.mark.asyncio
+async def test_enqueued_job_is_run_and_acknowledged(r, calls):
+    worker = await make_worker(r)
+    await jobs.enqueue(r, "test_record", email="john@example.com", user_id=7)
+
+    assert await worker.run_once() == 1
+    assert await worker.run_once() == 0
+
+    assert calls == [{"email": "john@example.com", "user_id": 7}]
+    stats = await jobs.queue_stats(r)
+    assert (stats["depth"], stats["pending"], stats["processed"], stats["dead_letter"]) == (0, 0, 1, 0)
+
+
+@pytest.mark.asyncio
+async def test_failed_job_is_retried_then_dead_lettered(r, calls):
+    worker = await make_worker(r, max_attempts=2, retry_backoff_ms=0)
+    await jobs.enqueue(r, "test_fail", email="john@example.com")
+
+    await worker.run_once()
+    assert (await jobs.queue_stats(r))["delayed"] == 1
+    await worker.run_once()
+
+    assert len(calls) == 2
+    stats = await jobs.queue_stats(r)
+    assert (stats["depth"], stats["retried"], stats["dead_lettered"], stats["dead_letter"]) == (0, 1, 1, 1)
+    [(_, fields)] = await r.xrange(jobs.DEAD_LETTER_STREAM)
+    assert fields[b"name"] == b"test_fail" and b"SMTP is down" in fields[b"error"]
+
+
+@pytest.mark.asyncio
+async def test_retries_are_spaced_out_exponentially(r, calls):
+    worker = await make_worker(r, max_attempts=4, retry_backoff_ms=100)
+    await jobs.enqueue(r, "test_fail", email="john@example.com", user_id=7)
+
+    delays = []
+    for _ in range(2):
+        while not await worker.run_once():
+            await asyncio.sleep(0.01)
+        [(_, due_ms)] = await r.zrange(jobs.DELAYED_KEY, 0, -1, withscores=True)
+        delays.append(due_ms - time.time() * 1000)
+        # Not retried before it is due
+        assert await worker.run_once() == 0
+
+    assert [round(delay, -2) for delay in delays] == [100, 200]
+    while not await worker.run_once():
+        await asyncio.sleep(0.01)
+    assert calls == [{"email": "john@example.com", "user_id": 7}] * 3
+    assert jobs.retry_delay_ms(1, 100, 1000) == 100 and jobs.retry_delay_ms(5, 100, 1000) == 1000
+
+
+@pytest.mark.asyncio
+async def test_jobs_of_a_dead_worker_are_claimed(r, calls):
+    await make_worker(r)
+    await jobs.enqueue(r, "test_record", email="john@example.com")
+    # A worker receives the job and dies before acknowledging it
+    await r.xreadgroup(jobs.GROUP, "dead-worker", {jobs.STREAM: ">"}, count=10)
+    assert (await jobs.queue_stats(r))["pending"] == 1
+
+    worker = await make_worker(r, "worker-2", claim_idle_ms=0)
+    assert await worker.run_once() == 1
+
+    assert calls == [{"email": "john@example.com"}]
+    assert (await jobs.queue_stats(r))["pending"] == 0
+
+
+@pytest.mark.asyncio
+async def test_job_killing_workers_is_dead_lettered(r, calls):
+    await make_worker(r)
+    await jobs.enqueue(r, "test_record", email="john@example.com")
+    await r.xreadgroup(jobs.GROUP, "dead-worker", {jobs.STREAM: ">"}, count=10)
+
+    worker = await make_worker(r, "worker-2", claim_idle_ms=0, max_attempts=1)
+    await worker.run_once()
+
+    assert calls == []
+    stats = await jobs.queue_stats(r)
+    assert (stats["depth"], stats["dead_letter"]) == (0, 1)
+
+
+@pytest.mark.asyncio
+async def test_worker_waits_on_an_idle_queue_without_timing_out(idle_redis, monkeypatch, caplog):
+    # Reads block for longer than the socket timeout of the shared pool
+    monkeypatch.setattr(settings, "REDIS_URL", idle_redis.url)
+    monkeypatch.setattr(settings, "REDIS_SOCKET_TIMEOUT", 0.1)
+    r = jobs.create_worker_client(block_ms=200)
+    task = asyncio.create_task(jobs.Worker(r, "worker-1", block_ms=200).run(retry_delay=0))
+
+    await asyncio.sleep(0.5)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    await r.aclose(close_connection_pool=True)
+
+    assert idle_redis.commands.count("XREADGROUP") >= 2
+    assert "lost Redis" not in caplog.text
@@ -0,0 +1,84 @@
+import pytest
+import aiosmtplib
+
+from src.services.mailer import Mailer, SMTPPool
+
+
+def make_mailer(smtp_server, size=2):
+    pool = SMTPPool(smtp_server.hostname, smtp_server.port, use_tls=False, start_tls=False, size=size)
+    return Mailer(pool, sender="noreply@example.com", retry_backoff=0, batch_size=5)
+
+
+def make_message(mailer, i):
+    return mailer.message(f"user{i}@example.com", "Confirm your email", "email_template.html", host="http://test/", username=f"user{i}", token="t")
+
+
+@pytest.mark.asyncio
+async def test_send_batch_reuses_pooled_connections(smtp_server):
+    mailer = make_mailer(smtp_server, size=2)
+
+    results = await mailer.send_batch([make_message(mailer, i) for i in range(20)])
+    await mailer.send(make_message(mailer, 20))
+    await mailer.close()
+
+    assert results == [None] * 20
+    assert len(smtp_server.handler.messages) == 21
+    assert mailer.pool.connects == 2
+    assert len(smtp_server.handler.sessions) == 2
+
+
+@pytest.mark.asyncio
+async def test_send_retries_transient_errors(smtp_server):
+    mailer = make_mailer(smtp_server)
+    smtp_server.handler.failures = 2
+
+    await mailer.send(make_message(mailer, 1))
+    await mailer.close()
+
+    assert len(smtp_server.handler.messages) == 1
+    assert mailer.stats == {"sent": 1, "failed": 0, "retries": 2}
+
+
+@pytest.mark.asyncio
+async def test_send_does_not_retry_permanent_errors(smtp_server):
+    mailer = make_mailer(smtp_server)
+    smtp_server.handler.failures = 1
+    smtp_server.handler.failure_reply = "550 Mailbox unavailable"
+
+    with pytest.raises(aiosmtplib.SMTPResponseException):
+        await mailer.send(make_message(mailer, 1))
+    await mailer.close()
+
+    assert mailer.stats == {"sent": 0, "failed": 1, "retries": 0}
+
+
+@pytest.mark.asyncio
+async def test_dropped_connection_is_replaced(smtp_server):
+    mailer = make_mailer(smtp_server, size=1)
+    await mailer.send(make_message(mailer, 1))
+    mailer.pool._idle[0][0].close()
+
+    await mailer.send(make_message(mailer, 2))
+    await mailer.close()
+
+    assert len(smtp_server.handler.messages) == 2
+    assert mailer.pool.connects == 2
+
+
+@pytest.mark.asyncio
+async def test_send_stream_sends_in_batches(smtp_server):
+    mailer = make_mailer(smtp_server)
+
+    async def messages():
+        for i in range(12):
+            yield make_message(mailer, i)
+
+    assert await mailer.send_stream(messages()) == (12, 0)
+    await mailer.close()
+
+
+def test_templates_are_compiled_once(smtp_server):
+    mailer = make_mailer(smtp_server)
+
+    assert mailer.templates.get_template("email_template.html") is mailer.templates.get_template("email_template.html")
+    assert "Hi user0," in make_message(mailer, 0).get_content()
@@ -0,0 +1,62 @@
+import sys
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from src.routes import profiles
+from src.services import profiling
+
+TOKEN = "profiling-token"
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling.settings, "PROFILING_TOKEN", TOKEN)
+    monkeypatch.setattr(profiling.settings, "PROFILING_DIR", str(tmp_path))
+    app = FastAPI()
+    app.add_middleware(profiling.ProfilingMiddleware)
+    app.include_router(profiles.router)
+
+    @app.get("/work")
+    async def work():
+        return {"total": sum(i * i for i in range(10000))}
+
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+@pytest.mark.asyncio
+async def test_requests_with_the_token_are_profiled_and_downloadable(client):
+    async with client:
+        plain = await client.get("/work")
+        wrong = await client.get("/work", headers={"X-Profile": "guess"})
+        profiled = await client.get("/work", headers={"X-Profile": TOKEN})
+        profile_id = profiled.headers["X-Profile-Id"]
+        listed = await client.get("/profiles/", headers={"X-Profile": TOKEN})
+        downloaded = await client.get(f"/profiles/{profile_id}", headers={"X-Profile": TOKEN})
+        forbidden = await client.get(f"/profiles/{profile_id}", headers={"X-Profile": "guess"})
+        missing = await client.get("/profiles/..%2Fmain.py", headers={"X-Profile": TOKEN})
+
+    assert "X-Profile-Id" not in plain.headers and "X-Profile-Id" not in wrong.headers
+    assert profiled.json() == plain.json()
+    assert [profile["id"] for profile in listed.json()] == [profile_id]
+    assert downloaded.status_code == 200 and downloaded.content
+    assert forbidden.status_code == 403
+    assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_cprofile_without_pyinstrument(client, monkeypatch):
+    monkeypatch.setitem(sys.modules, "pyinstrument", None)
+    async with client:
+        profiled = await client.get("/work", headers={"X-Profile": TOKEN})
+
+    assert profiled.headers["X-Profile-Id"].endswith(".prof")
+
+
+def test_save_profile_keeps_the_newest_profiles(tmp_path):
+    ids = [f"2024010{day}T120000-0000000{day}.html" for day in range(1, 6)]
+    for profile_id in ids:
+        profiling.save_profile(str(tmp_path), profile_id, b"profile", max_files=3)
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ids[2:]
@@ -0,0 +1,108 @@
+import httpx
+import pytest
+from fakeredis import aioredis
+from fastapi import Depends, FastAPI
+from redis.exceptions import ConnectionError
+
+from src.services import rate_limit
+from src.services.auth import auth_service
+from src.services.rate_limit import LocalTokenBucket, RateLimit, RedisSlidingWindow
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_refills_over_time():
+    bucket = LocalTokenBucket()
+    limit = RateLimit(5, 60)
+
+    decisions = [await bucket.hit("user:1", limit, now=0.0) for _ in range(6)]
+
+    assert [decision.allowed for decision in decisions] == [True] * 5 + [False]
+    assert decisions[4].remaining == 0 and decisions[5].retry_after == pytest.approx(12)
+    assert not (await bucket.hit("user:1", limit, now=11.0)).allowed
+    assert (await bucket.hit("user:1", limit, now=12.0)).allowed
+    assert (await bucket.hit("user:2", limit, now=12.0)).remaining == 4
+
+
+@pytest.mark.asyncio
+async def test_sliding_window_reserves_permits_in_batches():
+    r = aioredis.FakeRedis()
+    limiter = RedisSlidingWindow(r, batch=0.5)
+    limit = RateLimit(10, 60)
+
+    decisions = [await limiter.hit("user:1", limit, now=1000.0 + i / 100) for i in range(11)]
+
+    assert [decision.allowed for decision in decisions] == [True] * 10 + [False]
+    assert [decision.remaining for decision in decisions[:10]] == list(range(9, -1, -1))
+    # Two reservations of 5 permits, then one call to learn that the limit is exhausted
+    assert limiter.redis_calls == 3
+
+
+@pytest.mark.asyncio
+async def test_sliding_window_bounds_its_reservations():
+    limiter = RedisSlidingWindow(aioredis.FakeRedis(), batch=0.5, maxsize=3)
+    limit = RateLimit(10, 60)
+
+    for i in range(10):
+        assert (await limiter.hit(f"user:{i}", limit)).allowed
+
+    assert len(limiter._reserved) == 3
+
+
+@pytest.mark.asyncio
+async def test_sliding_window_is_shared_between_workers():
+    r = aioredis.FakeRedis()
+    workers = [RedisSlidingWindow(r, batch=0.3) for _ in range(3)]
+    limit = RateLimit(10, 60)
+
+    admitted = sum([(await workers[i % 3].hit("user:1", limit, now=1000.0)).allowed for i in range(30)])
+
+    assert admitted == 10
+
+
+@pytest.mark.asyncio
+async def test_sliding_window_weights_the_previous_window():
+    limiter = RedisSlidingWindow(aioredis.FakeRedis(), batch=0)
+    limit = RateLimit(10, 60)
+    for _ in range(10):
+        assert (await limiter.hit("user:1", limit, now=60.0)).allowed
+
+    # A quarter into the next window three quarters of the previous one still count
+    admitted = [(await limiter.hit("user:1", limit, now=135.0)).allowed for _ in range(4)]
+
+    assert admitted == [True, True, False, False]
+
+
+@pytest.mark.asyncio
+async def test_sliding_window_falls_back_to_local_bucket_without_redis():
+    limiter = RedisSlidingWindow(aioredis.FakeRedis())
+
+    async def unavailable(**kwargs):
+        raise ConnectionError("Redis is down")
+
+    limiter.script = unavailable
+
+    assert (await limiter.hit("user:1", RateLimit(1, 60))).allowed
+    assert not (await limiter.hit("user:1", RateLimit(1, 60))).allowed
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_dependency_sets_headers_per_user(monkeypatch):
+    monkeypatch.setattr(rate_limit, "_limiter", LocalTokenBucket())
+    monkeypatch.setitem(rate_limit.settings.RATE_LIMITS, "test", "2/60")
+    app = FastAPI()
+
+    @app.get("/", dependencies=[Depends(rate_limit.rate_limit("test"))])
+    async def root():
+        return {}
+
+    user_id = 1
+    app.dependency_overrides[auth_service.get_current_user] = lambda: type("User", (), {"id": user_id})()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        responses = [await client.get("/") for _ in range(3)]
+        user_id = 2
+        other_user = await client.get("/")
+
+    assert [response.status_code for response in responses] == [200, 200, 429]
+    assert responses[0].headers["RateLimit-Limit"] == "2" and responses[0].headers["RateLimit-Remaining"] == "1"
+    assert responses[2].headers["Retry-After"] == "30"
+    assert other_user.status_code == 200
@@ -0,0 +1,128 @@
+import subprocess
+import sys
+
+import fakeredis.aioredis as aioredis
+import httpx
+import pytest
+from fastapi import FastAPI
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from src.config import settings
+from src.routes import metrics
+from src.services import telemetry
+from src.services.local_cache import LocalCache
+from src.services.redis_client import InstrumentedRedis
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def app_with_middleware():
+    app = FastAPI()
+    app.add_middleware(telemetry.MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        assert sample("http_requests_in_flight", method="GET") == 1
+        return {"id": item_id}
+
+    app.include_router(metrics.router)
+    return app
+
+
+@pytest.mark.asyncio
+async def test_middleware_labels_requests_with_the_route_template():
+    route = dict(method="GET", route="/items/{item_id}", status="200")
+    unmatched = dict(method="GET", route="unmatched", status="404")
+    before, before_unmatched = sample("http_request_duration_seconds_count", **route), sample("http_request_duration_seconds_count", **unmatched)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app_with_middleware()), base_url="http://test") as client:
+        assert (await client.get("/items/1")).status_code == 200
+        assert (await client.get("/items/2")).status_code == 200
+        assert (await client.get("/nowhere")).status_code == 404
+
+    assert sample("http_request_duration_seconds_count", **route) == before + 2
+    assert sample("http_request_duration_seconds_count", **unmatched) == before_unmatched + 1
+    assert sample("http_requests_in_flight", method="GET") == 0
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_negotiates_prometheus_text_and_json(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-secret")
+    auth = {"Authorization": "Bearer scrape-secret"}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app_with_middleware()), base_url="http://test") as client:
+        await client.get("/items/1")
+        scraped = await client.get("/metrics", headers={"Accept": "text/plain;version=0.0.4;q=0.5,*/*;q=0.1", **auth})
+        snapshot = await client.get("/metrics", headers={"Accept": "application/json", **auth})
+
+    assert scraped.headers["content-type"].startswith("text/plain")
+    assert 'http_request_duration_seconds_bucket{le="0.005",method="GET",route="/items/{item_id}",status="200"}' in scraped.text
+    assert {"database", "user_cache", "response_cache", "jobs"} <= snapshot.json().keys()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("token, authorization", [
+    (None, None),
+    (None, "Bearer "),
+    ("scrape-secret", None),
+    ("scrape-secret", "Bearer wrong"),
+    ("scrape-secret", "Basic scrape-secret"),
+])
+async def test_metrics_endpoint_requires_the_metrics_token(monkeypatch, token, authorization):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", token)
+    headers = {"Authorization": authorization} if authorization else {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app_with_middleware()), base_url="http://test") as client:
+        assert (await client.get("/metrics", headers=headers)).status_code == 403
+
+
+def test_instrument_engine_times_statements_by_operation():
+    engine = create_engine("sqlite://")
+    telemetry.instrument_engine(engine, "test")
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        connection.execute(text("  select 2"))
+        with pytest.raises(OperationalError):
+            connection.execute(text("SELECT * FROM missing"))
+        assert connection.info["telemetry_started"] == []
+
+    assert sample("db_statement_duration_seconds_count", engine="test", operation="SELECT") == 2
+
+
+@pytest.mark.asyncio
+async def test_redis_client_times_commands_and_pipelines():
+    r = InstrumentedRedis(connection_pool=aioredis.FakeRedis().connection_pool)
+    before_set, before_multi = sample("redis_command_duration_seconds_count", command="SET"), sample("redis_command_duration_seconds_count", command="MULTI")
+
+    await r.set("key", 1)
+    async with r.pipeline(transaction=True) as pipe:
+        pipe.incr("key")
+        pipe.get("key")
+        assert await pipe.execute() == [2, b"2"]
+
+    assert sample("redis_command_duration_seconds_count", command="SET") == before_set + 1
+    assert sample("redis_command_duration_seconds_count", command="MULTI") == before_multi + 1
+
+
+def test_named_local_cache_counts_hits_and_misses():
+    cache = LocalCache(maxsize=10, ttl=60, name="test_cache")
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("b")
+    LocalCache(maxsize=10, ttl=60).get("a")
+
+    assert sample("cache_requests_total", cache="test_cache", result="hit") == 1
+    assert sample("cache_requests_total", cache="test_cache", result="miss") == 1
+
+
+def test_multiprocess_mode_aggregates_the_values_of_all_processes(tmp_path):
+    env = {"PROMETHEUS_MULTIPROC_DIR": str(tmp_path), "PATH": ""}
+    record = "from src.services import telemetry; telemetry.CACHE_REQUESTS.labels('shared', 'hit').inc(3)"
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", record], env=env, check=True)
+    report = "from src.services import telemetry; print(telemetry.exposition('text/plain')[0].decode())"
+    output = subprocess.run([sys.executable, "-c", report], env=env, check=True, capture_output=True, text=True).stdout
+
+    assert 'cache_requests_total{cache="shared",result="hit"} 6.0' in output
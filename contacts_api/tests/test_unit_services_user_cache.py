@@ -0,0 +1,99 @@
+import asyncio
+import pickle
+import pytest
+import redis.asyncio as redis
+from fakeredis import aioredis
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database.models import User
+from src.services import user_cache
+
+
+@pytest.fixture
+def user():
+    return User(id=7, email="john@example.com", username="johndoe", password="hash", confirmed=True, avatar=None)
+
+
+@pytest.fixture
+def r():
+    user_cache.local_users.clear()
+    return aioredis.FakeRedis()
+
+
+def test_dumps_and_loads_round_trip(user):
+    cached = user_cache.loads(user_cache.dumps(user))
+
+    assert cached == user_cache.CachedUser(7, "john@example.com", "johndoe", True, None)
+    assert not hasattr(cached, "__dict__")
+    assert {cached, user_cache.CachedUser.from_user(user)} == {cached}
+
+
+def test_loads_rejects_other_versions_and_legacy_pickles(user):
+    assert user_cache.loads(b'[0,7,"john@example.com","johndoe",true,null]') is None
+    assert user_cache.loads(pickle.dumps({"email": user.email})) is None
+
+
+@pytest.mark.asyncio
+async def test_cache_user_and_get_cached_user(r, user):
+    assert await user_cache.get_cached_user(r, user.email) is None
+
+    await user_cache.cache_user(r, user)
+
+    assert (await user_cache.get_cached_user(r, user.email)).id == user.id
+    assert 0 < await r.ttl(user_cache.cache_key(user.email)) <= user_cache.CACHE_TTL
+
+
+@pytest.mark.asyncio
+async def test_get_cached_user_is_served_from_local_cache(r, user):
+    await user_cache.cache_user(r, user)
+    await r.flushall()
+
+    assert (await user_cache.get_cached_user(r, user.email)).id == user.id
+
+
+@pytest.mark.asyncio
+async def test_invalidate_user_reaches_other_workers(r, user):
+    listener = asyncio.create_task(user_cache.listen_for_invalidations(r))
+    await asyncio.sleep(0.05)
+    await user_cache.cache_user(r, user)
+    # Simulate another worker that only holds the entry in its local cache
+    await r.delete(user_cache.cache_key(user.email))
+    assert user_cache.local_users.get(user.email) is not None
+
+    await r.publish(user_cache.INVALIDATION_CHANNEL, user.email)
+    await asyncio.sleep(0.05)
+    listener.cancel()
+    await asyncio.gather(listener, return_exceptions=True)
+
+    assert await user_cache.get_cached_user(r, user.email) is None
+
+
+@pytest.mark.asyncio
+async def test_listener_keeps_local_cache_on_an_idle_channel(idle_redis, user, caplog):
+    # A socket timeout shorter than the idle period used to drop the subscription and the L1 cache
+    r = redis.Redis.from_url(idle_redis.url, socket_timeout=0.1)
+    listener = asyncio.create_task(user_cache.listen_for_invalidations(r, retry_delay=0, poll_timeout=0.05))
+    await asyncio.sleep(0.05)
+    user_cache.local_users.set(user.email, user_cache.CachedUser.from_user(user))
+
+    await asyncio.sleep(0.4)
+    listener.cancel()
+    await asyncio.gather(listener, return_exceptions=True)
+    await r.aclose()
+
+    assert user_cache.local_users.get(user.email) is not None
+    assert idle_redis.commands.count("SUBSCRIBE") == 1
+    assert "disconnected" not in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_invalidate_user_deletes_shared_entry(r, user):
+    await user_cache.cache_user(r, user)
+
+    await user_cache.invalidate_user(r, user.email)
+
+    assert await r.get(user_cache.cache_key(user.email)) is None
+    assert await user_cache.get_cached_user(r, user.email) is None
@@ -0,0 +1,45 @@
+"""
+Background job worker.
+
+Runs the jobs enqueued by the API (see src.services.jobs). Start any number of workers,
+on any number of nodes, next to the API processes:
+
+    python worker.py
+
+With BIRTHDAY_REMINDERS_ENABLED, workers also send the daily birthday reminders (see
+src.services.reminders); only one of them sends them each day.
+"""
+import asyncio
+import logging
+import os
+import socket
+from src.config import settings
+from src.services import jobs, reminders
+# Importing the modules registers their job handlers
+from src.services import avatars, email  # noqa: F401
+from src.services.mailer import mailer
+from src.services.redis_client import close_redis, get_redis
+
+
+async def main():
+    # Job handlers use the shared client (get_redis); the blocking reads get their own
+    r = jobs.create_worker_client()
+    worker = jobs.Worker(r, consumer=f"{socket.gethostname()}-{os.getpid()}")
+    tasks = [asyncio.create_task(worker.run())]
+    if settings.BIRTHDAY_REMINDERS_ENABLED:
+        tasks.append(asyncio.create_task(reminders.run_daily(get_redis(), settings.BIRTHDAY_REMINDERS_HOUR)))
+    try:
+        # Both run until cancelled; stop the other one if either fails
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await mailer.close()
+        await r.aclose(close_connection_pool=True)
+        await close_redis()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())